@@ -0,0 +1,136 @@
+import queue
+import sqlite3
+import threading
+import tkinter as tk
+from tkinter import messagebox
+from typing import Any, Callable, Optional
+
+from db_pool import ConnectionPool
+
+
+class BackgroundLoader:
+    """
+    一覧データをワーカースレッドで取得し、結果を Tk メインスレッドへ渡す
+
+    ・ワーカーは 1 本、待ち行列は「最新の 1 件」だけ保持
+      （コンボを素早く切り替えても問い合わせが溜まらない）
+    ・新しい要求が来たら実行中の古い問い合わせは interrupt で打ち切り、
+      結果が返っても世代番号が古ければ捨てる
+    ・結果はキュー経由で after() ポーリングにより受け取る
+    ・読み込み中は status_label に表示し、カーソルを砂時計にする
+    """
+
+    def __init__(
+        self,
+        widget: tk.Misc,
+        pool: Optional[ConnectionPool] = None,
+        status_label: Optional[tk.Label] = None,
+        poll_ms: int = 50,
+    ):
+        self.widget = widget
+        self.pool = pool
+        self.status_label = status_label
+        self.poll_ms = poll_ms
+
+        self._results: "queue.Queue" = queue.Queue()
+        self._cond = threading.Condition()
+        self._pending = None
+        self._running_generation: Optional[int] = None
+        self._generation = 0
+        self._polling = False
+
+        self._thread = threading.Thread(target=self._worker, name="list-loader", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # 要求（メインスレッド）
+    # ------------------------------------------------------------------
+    def submit(
+        self,
+        fetch: Callable[[], Any],
+        on_done: Callable[[Any], None],
+        on_error: Optional[Callable[[Exception], None]] = None
+    ):
+        """
+        fetch() をワーカーで実行し、完了後メインスレッドで on_done(結果) を呼ぶ
+
+        既に待機中 / 実行中の要求は置き換えられる（on_done は呼ばれない）
+        """
+        with self._cond:
+            self._generation += 1
+            self._pending = (self._generation, fetch, on_done, on_error)
+            superseded = self._running_generation is not None
+            self._cond.notify()
+
+        if superseded and self.pool is not None:
+            self.pool.interrupt(self._thread.ident)
+
+        self._set_busy(True)
+        if not self._polling:
+            self._polling = True
+            self.widget.after(self.poll_ms, self._poll)
+
+    @property
+    def busy(self) -> bool:
+        with self._cond:
+            return self._pending is not None or self._running_generation is not None
+
+    # ------------------------------------------------------------------
+    # ワーカースレッド
+    # ------------------------------------------------------------------
+    def _worker(self):
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                generation, fetch, on_done, on_error = self._pending
+                self._pending = None
+                self._running_generation = generation
+
+            try:
+                result = self._run(generation, fetch)
+                self._results.put((generation, on_done, result))
+            except Exception as e:
+                self._results.put((generation, on_error, e))
+            finally:
+                with self._cond:
+                    self._running_generation = None
+
+    def _run(self, generation: int, fetch: Callable[[], Any]) -> Any:
+        try:
+            return fetch()
+        except sqlite3.OperationalError as e:
+            # 直前の要求に向けた interrupt を受けてしまった場合は 1 回だけやり直す
+            if "interrupted" in str(e) and generation == self._generation:
+                return fetch()
+            raise
+
+    # ------------------------------------------------------------------
+    # 結果受け取り（メインスレッド）
+    # ------------------------------------------------------------------
+    def _poll(self):
+        try:
+            while True:
+                generation, callback, result = self._results.get_nowait()
+                if generation != self._generation:
+                    continue  # 置き換え済みの古い結果
+                self._set_busy(False)
+                if callback is not None:
+                    callback(result)
+                elif isinstance(result, Exception):
+                    messagebox.showerror("エラー", f"一覧の取得に失敗しました\n{result}")
+        except queue.Empty:
+            pass
+        finally:
+            if self.busy or not self._results.empty():
+                self.widget.after(self.poll_ms, self._poll)
+            else:
+                self._polling = False
+
+    def _set_busy(self, busy: bool):
+        if self.status_label is not None:
+            self.status_label.config(text="読み込み中…" if busy else "")
+        try:
+            self.widget.winfo_toplevel().config(cursor="watch" if busy else "")
+        except tk.TclError:
+            pass
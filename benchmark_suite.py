@@ -0,0 +1,557 @@
+import argparse
+import inspect
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from db_pool import close_all_pools
+from doc_service import DocumentService, DocumentServiceClient
+from document_info import DocumentInfo
+from document_query import column_sort
+from master_data_fetcher_document import MasterDataFetcherDocument, Range, Prefix
+from pagination import KeysetBlockSource
+from query_cache import VersionedLRUCache
+from tree_reconcile import TreeReconciler
+from synthetic_db import ensure_database
+
+
+# ------------------------------------------------------------------
+# ベンチマーク（データ層 / 一覧の行組み立て）
+# ・synthetic_db.py で作った件数別の DB に対し、各処理を repeat 回計測
+# ・結果は JSON に保存し、--compare で以前の結果と比較（中央値の悪化を検出）
+# ・Treeview は表示環境（Windows / X / Xvfb）があれば実物、無ければスタブ
+# ------------------------------------------------------------------
+
+
+class StubTree:
+    """
+    表示環境が無いとき用の Treeview 代替（TreeReconciler が使う操作のみ）
+    """
+
+    def __init__(self):
+        self._children: List[str] = []
+        self._items: Dict[str, Tuple[tuple, tuple]] = {}
+
+    def insert(self, parent, index, iid=None, values=(), tags=()):
+        if index == "end":
+            index = len(self._children)
+        self._children.insert(index, iid)
+        self._items[iid] = (values, tags)
+        return iid
+
+    def item(self, iid, values=(), tags=()):
+        self._items[iid] = (values, tags)
+
+    def delete(self, *iids):
+        removed = set(iids)
+        self._children = [iid for iid in self._children if iid not in removed]
+        for iid in iids:
+            del self._items[iid]
+
+    def move(self, iid, parent, index):
+        self._children.remove(iid)
+        self._children.insert(index, iid)
+
+    def get_children(self, item=""):
+        return tuple(self._children)
+
+    def destroy(self):
+        pass
+
+
+class TreeFactory:
+    """
+    計測用の Treeview を作る（Tk が使えなければ StubTree）
+    """
+
+    def __init__(self, use_tk: bool = True):
+        self.root = None
+        if use_tk:
+            try:
+                import tkinter as tk
+                self.root = tk.Tk()
+                self.root.withdraw()
+            except Exception:
+                self.root = None
+        self.kind = "tk" if self.root is not None else "stub"
+
+    def create(self, columns: int = 6):
+        if self.root is None:
+            return StubTree()
+        from tkinter import ttk
+        return ttk.Treeview(
+            self.root, columns=[f"c{i}" for i in range(columns)], show="headings"
+        )
+
+    def close(self):
+        if self.root is not None:
+            self.root.destroy()
+            self.root = None
+
+
+class Case:
+    """
+    計測 1 件
+
+    fn() の戻り値が list なら行数を記録（それ以外の戻り値は行数なし）
+    setup() は毎回 fn() の前に呼ぶ（計測外）
+    """
+
+    def __init__(
+        self,
+        name: str,
+        fn: Callable[[], Any],
+        covers: Tuple[str, ...] = (),
+        setup: Optional[Callable[[], None]] = None
+    ):
+        self.name = name
+        self.fn = fn
+        self.covers = covers
+        self.setup = setup
+
+
+def _consume(iterator) -> int:
+    count = 0
+    for _ in iterator:
+        count += 1
+    return count
+
+
+# ------------------------------------------------------------------
+# 計測対象
+# ------------------------------------------------------------------
+def document_info_cases(db: DocumentInfo, work: DocumentInfo, repeat: int) -> List[Case]:
+    total = db.count_editions()
+    middle = db.fetch_editions_window(None, total // 2, 1)
+    middle_cursor = db.page_cursor(middle[0]) if middle else None
+    by_date = column_sort("effective_date", descending=True)
+    date_middle = db.fetch_editions_window(None, total // 2, 1, sort=by_date)
+    date_cursor = db.page_cursor(date_middle[0], by_date) if date_middle else None
+
+    # 更新系は作業用コピーで（繰り返しごとに別の修正中版を承認）
+    drafts = [(r[6], r[7]) for r in work.fetch_editions_by_status(DocumentInfo.DRAFT)]
+    singles = drafts[:repeat]
+    bulk_size = min(200, max(0, (len(drafts) - repeat) // repeat))
+    bulks = [
+        drafts[repeat + i * bulk_size: repeat + (i + 1) * bulk_size]
+        for i in range(repeat)
+    ]
+    document_ids = [r[0] for r in work.fetch_document_master()]
+    history_ids = document_ids[::max(1, len(document_ids) // 100)][:100]
+    shared = DocumentInfo(db.db_path, cache=VersionedLRUCache())
+
+    cases = [
+        Case("DocumentInfo.fetch_all_editions", db.fetch_all_editions, ("fetch_all_editions",)),
+        Case("DocumentInfo.iter_all_editions", lambda: _consume(db.iter_all_editions()),
+             ("iter_all_editions", "iter_editions")),
+        Case("DocumentInfo.fetch_latest_documents", db.fetch_latest_documents,
+             ("fetch_latest_documents",)),
+        Case("DocumentInfo.iter_latest_documents", lambda: _consume(db.iter_latest_documents()),
+             ("iter_latest_documents",)),
+        Case("DocumentInfo.fetch_editions_by_status(修正中)",
+             lambda: db.fetch_editions_by_status(DocumentInfo.DRAFT), ("fetch_editions_by_status",)),
+        Case("DocumentInfo.fetch_editions_by_status(最新版＋修正中)",
+             lambda: db.fetch_editions_by_status((DocumentInfo.LATEST, DocumentInfo.DRAFT))),
+        Case("DocumentInfo.iter_editions_by_status(旧版)",
+             lambda: _consume(db.iter_editions_by_status(DocumentInfo.ARCHIVED)),
+             ("iter_editions_by_status",)),
+        Case("DocumentInfo.count_editions(すべて)", db.count_editions, ("count_editions",)),
+        Case("DocumentInfo.count_editions(最新版)", lambda: db.count_editions(DocumentInfo.LATEST)),
+        Case("DocumentInfo.fetch_editions_window(先頭)",
+             lambda: db.fetch_editions_window(None, 0, 200), ("fetch_editions_window",)),
+        Case("DocumentInfo.fetch_editions_window(中央)",
+             lambda: db.fetch_editions_window(None, total // 2, 200)),
+        Case("DocumentInfo.fetch_all_editions_page(先頭)",
+             lambda: db.fetch_all_editions_page(200)[0], ("fetch_all_editions_page",)),
+        Case("DocumentInfo.fetch_all_editions_page(中央)",
+             lambda: db.fetch_all_editions_page(200, middle_cursor)[0]),
+        Case("DocumentInfo.fetch_latest_documents_page",
+             lambda: db.fetch_latest_documents_page(200)[0], ("fetch_latest_documents_page",)),
+        Case("DocumentInfo.fetch_editions_by_status_page",
+             lambda: db.fetch_editions_by_status_page(DocumentInfo.DRAFT, 200)[0],
+             ("fetch_editions_by_status_page",)),
+        # 列見出しの並び替え（発行日降順：索引を逆順に読む）
+        Case("DocumentInfo.fetch_editions_by_status_page(発行日降順・先頭)",
+             lambda: db.fetch_editions_by_status_page(None, 200, sort=by_date)[0]),
+        Case("DocumentInfo.fetch_editions_by_status_page(発行日降順・中央)",
+             lambda: db.fetch_editions_by_status_page(None, 200, date_cursor, sort=by_date)[0]),
+        Case("DocumentInfo.page_cursor",
+             lambda: [db.page_cursor(middle[0]) for _ in range(1000)], ("page_cursor",)),
+        Case("DocumentInfo.search_documents(2 文字)", lambda: db.search_documents("検査"),
+             ("search_documents", "require_schema")),
+        Case("DocumentInfo.search_documents(4 文字)", lambda: db.search_documents("受入検査")),
+        Case("DocumentInfo.search_pdf_text", lambda: db.search_pdf_text("手順"),
+             ("search_pdf_text",)),
+        Case("DocumentInfo.ensure_schema(最新版)", db.ensure_schema, ("ensure_schema",)),
+        Case("DocumentInfo.fetch_edition_history(100 文書)",
+             lambda: [db.fetch_edition_history(d) for d in history_ids],
+             ("fetch_edition_history",)),
+        Case("DocumentInfo.fetch_editions_by_document",
+             lambda: db.fetch_editions_by_document(history_ids[0]),
+             ("fetch_editions_by_document",)),
+        Case("DocumentInfo.fetch_document_master", db.fetch_document_master,
+             ("fetch_document_master",)),
+        Case("DocumentInfo.iter_document_master", lambda: _consume(db.iter_document_master()),
+             ("iter_document_master",)),
+        Case("DocumentInfo.status_text",
+             lambda: [db.status_text(s) for s in (0, 1, 9) * 1000], ("status_text",)),
+        # launcher と同じく結果キャッシュ付き（2 回目以降はキャッシュから）
+        Case("DocumentInfo.fetch_latest_documents(共有キャッシュ)", shared.fetch_latest_documents),
+        Case("DocumentInfo.fetch_editions_by_status(修正中・共有キャッシュ)",
+             lambda: shared.fetch_editions_by_status(DocumentInfo.DRAFT)),
+        Case("DocumentInfo.cache_stats", shared.cache_stats, ("cache_stats",)),
+    ]
+
+    if singles:
+        cases.append(Case(
+            "DocumentInfo.approve_edition",
+            lambda: work.approve_edition(*singles.pop()),
+            ("approve_edition",)
+        ))
+    if bulk_size:
+        cases.append(Case(
+            f"DocumentInfo.approve_editions({bulk_size} 件)",
+            lambda: work.approve_editions(bulks.pop()),
+            ("approve_editions",)
+        ))
+    cases.append(Case(
+        "DocumentInfo.create_draft_edition",
+        lambda: work.create_draft_edition(document_ids.pop(), 999, "99", "2030-01-01"),
+        ("create_draft_edition",)
+    ))
+    return cases
+
+
+def master_fetcher_cases(fetcher: MasterDataFetcherDocument, db: DocumentInfo) -> List[Case]:
+    edition_ids = [r[7] for r in db.fetch_editions_window(None, 0, 20000)]
+    cold = fetcher.cache.clear
+
+    return [
+        Case("Master.fetch_all(小マスタ / キャッシュなし)",
+             lambda: fetcher.fetch_all("department_master"), ("fetch_all",), setup=cold),
+        Case("Master.fetch_all(小マスタ / キャッシュあり)",
+             lambda: fetcher.fetch_all("department_master")),
+        Case("Master.iter_all(版)",
+             lambda: _consume(fetcher.iter_all("Document_Edition_Master")), ("iter_all",)),
+        Case("Master.fetch_value_by_id(キャッシュなし)",
+             lambda: fetcher.fetch_value_by_id("department_master", "ID", "NAME", 3),
+             ("fetch_value_by_id",), setup=cold),
+        Case("Master.fetch_value_by_id(キャッシュあり)",
+             lambda: fetcher.fetch_value_by_id("department_master", "ID", "NAME", 3)),
+        Case("Master.fetch_values_by_ids(1000 件)",
+             lambda: fetcher.fetch_values_by_ids(
+                 "Document_Edition_Master", "edition_id", "pdf_path", edition_ids[:1000]),
+             ("fetch_values_by_ids",), setup=cold),
+        Case("Master.fetch_values_by_ids(20000 件)",
+             lambda: fetcher.fetch_values_by_ids(
+                 "Document_Edition_Master", "edition_id", "pdf_path", edition_ids),
+             setup=cold),
+        Case("Master.fetch_columns",
+             lambda: fetcher.fetch_columns("document_master", ["document_number"]),
+             ("fetch_columns",)),
+        Case("Master.iter_columns",
+             lambda: _consume(fetcher.iter_columns("document_master", ["document_number"])),
+             ("iter_columns",)),
+        Case("Master.fetch_by_conditions(IN 100 件)",
+             lambda: fetcher.fetch_by_conditions(
+                 "Document_Edition_Master", {"edition_id": edition_ids[:100]}),
+             ("fetch_by_conditions",)),
+        Case("Master.fetch_by_conditions(前方一致)",
+             lambda: fetcher.fetch_by_conditions(
+                 "document_master", {"document_number": Prefix("SOP-001")},
+                 order_by=["document_number"])),
+        Case("Master.iter_by_conditions(範囲)",
+             lambda: _consume(fetcher.iter_by_conditions(
+                 "Document_Edition_Master", {"document_id": Range(1, 1000)})),
+             ("iter_by_conditions",)),
+        Case("Master.fetch_one(キャッシュなし)",
+             lambda: fetcher.fetch_one("document_master", "document_id", 1),
+             ("fetch_one",), setup=cold),
+        Case("Master.fetch_one(キャッシュあり)",
+             lambda: fetcher.fetch_one("document_master", "document_id", 1)),
+        Case("Master.fetch_latest_documents", fetcher.fetch_latest_documents,
+             ("fetch_latest_documents",)),
+        Case("Master.iter_latest_documents",
+             lambda: _consume(fetcher.iter_latest_documents()), ("iter_latest_documents",)),
+        Case("Master.fetch_editions_by_status(修正中)",
+             lambda: fetcher.fetch_editions_by_status(DocumentInfo.DRAFT),
+             ("fetch_editions_by_status",)),
+        Case("Master.iter_editions_by_status(修正中)",
+             lambda: _consume(fetcher.iter_editions_by_status(DocumentInfo.DRAFT)),
+             ("iter_editions_by_status",)),
+        Case("Master.cache_stats", fetcher.cache_stats, ("cache_stats",)),
+    ]
+
+
+def gui_cases(db: DocumentInfo, trees: TreeFactory) -> List[Case]:
+    """
+    各画面の _load_* / _show_* の行組み立て（Tk ウィジェットは使わず self を模擬）
+    """
+    from document_all_list_gui import DocumentAllListView
+    from latest_edition_list_gui import LatestEditionListView
+    from edit_edition_list_gui import DraftEditionApprovalView
+    from editihg_edition_list_gui import EditingEditionListView
+    from pdf_availability import get_availability
+
+    latest = db.fetch_latest_documents()
+    drafts = db.fetch_editions_by_status(DocumentInfo.DRAFT)
+    block = db.fetch_editions_window(None, 0, 200)
+
+    view = SimpleNamespace(
+        db=db, reconciler=None, tree=None, _document_ids={}, _pdf_paths={},
+        pdf_status=get_availability(db)
+    )
+
+    def fresh_tree():
+        if view.tree is not None:
+            view.tree.destroy()
+        view.tree = trees.create()
+        view.reconciler = TreeReconciler(view.tree)
+
+    def filled_tree(show: Callable, rows: List[Tuple]):
+        def setup():
+            fresh_tree()
+            show(view, rows)
+        return setup
+
+    def first_block():
+        source = KeysetBlockSource(
+            lambda limit, cursor: db.fetch_editions_by_status_page(None, limit, cursor),
+            lambda offset, limit: db.fetch_editions_window(None, offset, limit),
+            db.page_cursor
+        )
+        return db.count_editions(None), source(0, 200)
+
+    return [
+        Case("GUI.DocumentAllListView._load_list(件数＋先頭ブロック)", first_block),
+        Case("GUI.DocumentAllListView._render_row(200 行)",
+             lambda: [DocumentAllListView._render_row(view, r) for r in block]),
+        Case("GUI.LatestEditionListView._show_latest_list(初回)",
+             lambda: LatestEditionListView._show_latest_list(view, latest), setup=fresh_tree),
+        Case("GUI.LatestEditionListView._show_latest_list(再読込・変更なし)",
+             lambda: LatestEditionListView._show_latest_list(view, latest),
+             setup=filled_tree(LatestEditionListView._show_latest_list, latest)),
+        Case("GUI.DraftEditionApprovalView._show_draft_list(初回)",
+             lambda: DraftEditionApprovalView._show_draft_list(view, drafts), setup=fresh_tree),
+        Case("GUI.EditingEditionListView._show_editing_list(初回)",
+             lambda: EditingEditionListView._show_editing_list(view, drafts), setup=fresh_tree),
+        Case("GUI.EditingEditionListView._show_editing_list(再読込・変更なし)",
+             lambda: EditingEditionListView._show_editing_list(view, drafts),
+             setup=filled_tree(EditingEditionListView._show_editing_list, drafts)),
+    ]
+
+
+def service_cases(db: DocumentInfo, service: DocumentService) -> List[Case]:
+    """
+    doc_service 経由の取得（同一端末のローカル起動。通信・JSON・gzip を含む）
+    """
+    client = DocumentServiceClient(service.url)
+    client.fetch_latest_documents()
+
+    def cold_latest():
+        client._cache.clear()
+        service.responses._data.clear()
+        return client.fetch_latest_documents()
+
+    def first_block():
+        return client.count_editions(None), client.fetch_editions_window(None, 0, 200)
+
+    return [
+        Case("Service.fetch_latest_documents(初回)", cold_latest),
+        Case("Service.fetch_latest_documents(304)", client.fetch_latest_documents),
+        Case("Service.件数＋先頭ブロック", first_block),
+    ]
+
+
+# ------------------------------------------------------------------
+# 実行
+# ------------------------------------------------------------------
+def run_case(case: Case, repeat: int) -> Dict[str, Any]:
+    timings = []
+    rows = None
+    for _ in range(repeat):
+        if case.setup is not None:
+            case.setup()
+        started = time.perf_counter()
+        result = case.fn()
+        timings.append(time.perf_counter() - started)
+
+        if isinstance(result, list):
+            rows = len(result)
+
+    return {
+        "min": min(timings),
+        "median": statistics.median(timings),
+        "max": max(timings),
+        "repeat": repeat,
+        "rows": rows,
+    }
+
+
+def uncovered(cases: List[Case]) -> List[str]:
+    """
+    計測していない公開メソッド（メソッドを追加したらケースも追加する）
+    """
+    covered = {
+        "DocumentInfo": set(),
+        "MasterDataFetcherDocument": set(),
+    }
+    for case in cases:
+        owner = "MasterDataFetcherDocument" if case.name.startswith("Master.") else "DocumentInfo"
+        covered[owner].update(case.covers)
+
+    missing = []
+    for cls in (DocumentInfo, MasterDataFetcherDocument):
+        for name, _ in inspect.getmembers(cls, predicate=inspect.isroutine):
+            if not name.startswith("_") and name not in covered[cls.__name__]:
+                missing.append(f"{cls.__name__}.{name}")
+    return missing
+
+
+def run_size(
+    editions: int,
+    data_dir: str,
+    repeat: int,
+    seed: int,
+    trees: TreeFactory,
+    only: Optional[str] = None,
+    log=print
+) -> Tuple[Dict[str, Any], List[str]]:
+    db_path = ensure_database(data_dir, editions, seed)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_path = os.path.join(tmp, "work.db")
+        shutil.copyfile(db_path, work_path)
+
+        db = DocumentInfo(db_path)
+        work = DocumentInfo(work_path)
+        fetcher = MasterDataFetcherDocument(db_path)
+        service = DocumentService(db_path, port=0, scan_pdfs=False).start_in_thread()
+
+        cases = (
+            document_info_cases(db, work, repeat)
+            + master_fetcher_cases(fetcher, db)
+            + gui_cases(db, trees)
+            + service_cases(db, service)
+        )
+        missing = uncovered(cases)
+
+        results = {}
+        for case in cases:
+            if only and only not in case.name:
+                continue
+            results[case.name] = run_case(case, repeat)
+            r = results[case.name]
+            rows = f"  ({r['rows']} 行)" if r["rows"] is not None else ""
+            log(f"  {case.name:<60} {r['median'] * 1000:10.2f} ms{rows}")
+
+        service.stop()
+        close_all_pools()
+
+    return {"db": os.path.basename(db_path), "cases": results}, missing
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any], threshold: float, min_delta: float):
+    """
+    中央値が threshold 倍を超えて遅くなった（かつ min_delta 秒以上の差）ケースを返す
+    """
+    regressions = []
+    for size, result in current["sizes"].items():
+        before_cases = baseline.get("sizes", {}).get(size, {}).get("cases", {})
+        for name, now in result["cases"].items():
+            before = before_cases.get(name)
+            if before is None:
+                continue
+            ratio = now["median"] / before["median"] if before["median"] else float("inf")
+            if ratio > threshold and now["median"] - before["median"] > min_delta:
+                regressions.append((size, name, before["median"], now["median"], ratio))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="データ層 / 一覧表示のベンチマーク")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 100000],
+                        help="Edition 件数（複数可、例：1000 100000 1000000）")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--data-dir", default="bench_data", help="生成した DB の置き場所（再利用）")
+    parser.add_argument("--output", default=None, help="結果 JSON（既定：bench_results/日時_コミット.json）")
+    parser.add_argument("--compare", default=None, help="比較する以前の結果 JSON")
+    parser.add_argument("--threshold", type=float, default=1.25, help="悪化とみなす倍率")
+    parser.add_argument("--min-delta", type=float, default=0.002, help="悪化とみなす最小差（秒）")
+    parser.add_argument("--only", default=None, help="名前にこの文字列を含むケースのみ")
+    parser.add_argument("--no-tk", action="store_true", help="Treeview をスタブにする")
+    args = parser.parse_args()
+
+    trees = TreeFactory(use_tk=not args.no_tk)
+    commit = _git_commit()
+    report: Dict[str, Any] = {
+        "meta": {
+            "commit": commit,
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "tree": trees.kind,
+            "repeat": args.repeat,
+            "seed": args.seed,
+        },
+        "sizes": {},
+        "not_covered": [],
+    }
+
+    try:
+        for editions in args.sizes:
+            print(f"[{editions} 件]")
+            report["sizes"][str(editions)], report["not_covered"] = run_size(
+                editions, args.data_dir, args.repeat, args.seed, trees, args.only
+            )
+    finally:
+        trees.close()
+
+    if report["not_covered"]:
+        print("未計測の公開メソッド: " + ", ".join(report["not_covered"]))
+
+    output = args.output or os.path.join(
+        "bench_results",
+        f"{datetime.now():%Y%m%d_%H%M%S}_{commit or 'nocommit'}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"結果を保存しました: {output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(baseline, report, args.threshold, args.min_delta)
+        for size, name, before, now, ratio in regressions:
+            print(f"[悪化] {size} 件 {name}: {before * 1000:.2f} → {now * 1000:.2f} ms（×{ratio:.2f}）")
+        if regressions:
+            sys.exit(1)
+        print(f"悪化なし（基準：{baseline['meta'].get('commit')}）")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+import argparse
+import csv
+import json
+import os
+from typing import Iterable, Optional, Tuple
+
+from document_info import DocumentInfo
+
+try:
+    from openpyxl import Workbook
+except ImportError:  # XLSX 出力を使わない端末では未導入でもよい
+    Workbook = None
+
+
+# 出力列（DocumentInfo.EDITION_COLUMNS の順）と見出し
+HEADINGS = {
+    "document_number": "文書番号",
+    "document_name": "文書名",
+    "edition_no": "版",
+    "effective_date": "発行日",
+    "edition_status": "状態",
+    "pdf_path": "PDF",
+    "document_id": "文書ID",
+    "edition_id": "版ID",
+}
+
+FORMATS = ("csv", "jsonl", "xlsx")
+
+
+def _records(rows: Iterable[Tuple]) -> Iterable[Tuple]:
+    """
+    状態は表示文字列に変換（件数に関わらず 1 行ずつ流す）
+    """
+    status_index = DocumentInfo.EDITION_COLUMNS.index("edition_status")
+    for row in rows:
+        row = list(row)
+        row[status_index] = DocumentInfo.status_text(row[status_index])
+        yield row
+
+
+# ------------------------------------------------------------------
+# 形式別の書き出し
+# ------------------------------------------------------------------
+def write_csv(path: str, rows: Iterable[Tuple]) -> int:
+    """
+    CSV（Excel で開けるよう BOM 付き UTF-8）
+    """
+    count = 0
+    with open(path, "w", newline="", encoding="utf-8-sig") as f:
+        writer = csv.writer(f)
+        writer.writerow([HEADINGS[c] for c in DocumentInfo.EDITION_COLUMNS])
+        for record in _records(rows):
+            writer.writerow(record)
+            count += 1
+    return count
+
+
+def write_jsonl(path: str, rows: Iterable[Tuple]) -> int:
+    """
+    JSON Lines（キーは列名）
+    """
+    count = 0
+    with open(path, "w", encoding="utf-8") as f:
+        for record in _records(rows):
+            f.write(json.dumps(dict(zip(DocumentInfo.EDITION_COLUMNS, record)), ensure_ascii=False))
+            f.write("\n")
+            count += 1
+    return count
+
+
+def write_xlsx(path: str, rows: Iterable[Tuple]) -> int:
+    """
+    XLSX（openpyxl の write_only モード：行を保持せず順に書き出す）
+    """
+    if Workbook is None:
+        raise RuntimeError("XLSX 出力には openpyxl が必要です（pip install openpyxl）")
+
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("文書一覧")
+    ws.append([HEADINGS[c] for c in DocumentInfo.EDITION_COLUMNS])
+
+    count = 0
+    for record in _records(rows):
+        ws.append(record)
+        count += 1
+    wb.save(path)
+    return count
+
+
+WRITERS = {
+    "csv": write_csv,
+    "jsonl": write_jsonl,
+    "xlsx": write_xlsx,
+}
+
+
+# ------------------------------------------------------------------
+# エクスポート
+# ------------------------------------------------------------------
+def export_catalog(
+    db_path: str,
+    output: str,
+    status: str = "すべて",
+    fmt: Optional[str] = None,
+    chunk_size: int = 1000
+) -> int:
+    """
+    Edition 一覧を output へ書き出す
+
+    Args:
+        status: DocumentInfo.STATUS_FILTERS のキー（画面の絞り込みと同じ）
+        fmt: csv / jsonl / xlsx（省略時は拡張子から判定）
+
+    ・DB からは fetchmany(chunk_size) で逐次読み出し、件数によらずメモリは一定
+    ・一時ファイルへ書いてから置き換えるため、途中で失敗しても既存ファイルは残る
+
+    Returns:
+        書き出した行数
+    """
+    if status not in DocumentInfo.STATUS_FILTERS:
+        raise ValueError(f"不明な状態です: {status}")
+
+    fmt = fmt or os.path.splitext(output)[1].lstrip(".").lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"出力形式は {' / '.join(FORMATS)} のいずれかです: {fmt}")
+
+    db = DocumentInfo(db_path)
+    rows = db.iter_editions(DocumentInfo.STATUS_FILTERS[status], arraysize=chunk_size)
+
+    tmp_path = output + ".tmp"
+    try:
+        count = WRITERS[fmt](tmp_path, rows)
+        os.replace(tmp_path, output)
+    finally:
+        rows.close()
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文書一覧（Edition 単位）のエクスポート")
+    parser.add_argument("output", help="出力ファイル（.csv / .jsonl / .xlsx）")
+    parser.add_argument("--db", default=r"C:\DataBase\document_master.db")
+    parser.add_argument("--status", default="すべて", choices=list(DocumentInfo.STATUS_FILTERS))
+    parser.add_argument("--format", choices=FORMATS, default=None,
+                        help="出力形式（省略時は拡張子から判定）")
+    parser.add_argument("--chunk-size", type=int, default=1000)
+    args = parser.parse_args()
+
+    count = export_catalog(
+        args.db, args.output, status=args.status, fmt=args.format, chunk_size=args.chunk_size
+    )
+    print(f"{count} 件を出力しました: {args.output}")
+
+
+if __name__ == "__main__":
+    main()
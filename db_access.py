@@ -1,14 +1,34 @@
-import sqlite3
-from typing import List, Tuple, Optional
+from typing import Iterator, List, Tuple, Optional
+
+from db_pool import get_pool
+from document_query import DocumentQuery, EditionFilter
+
+# 一覧表示の並び（文書番号順、同じ文書は新しい版から）
+VIEW_SORT = ("document_number", "edition_no DESC")
+
+
+def _view_row(row) -> Tuple:
+    """
+    EditionRow → 一覧表示用の列順
+    """
+    return (
+        row.document_id,
+        row.document_number,
+        row.document_name,
+        row.edition_no,
+        row.effective_date,
+        row.edition_status
+    )
 
 
 class DocumentInfo:
     def __init__(self, db_name: str):
         self.db_name = db_name
+        self.pool = get_pool(db_name)
+        self.query = DocumentQuery(self.pool)
 
     def _connect(self):
-        conn = sqlite3.connect(self.db_name)
-        return conn
+        return self.pool.connection()
 
     def fetch_all_documents_for_view(
         self,
@@ -34,36 +54,44 @@ class DocumentInfo:
                 edition_status
             ) の list
         """
+        return list(self.iter_all_documents_for_view(status_filter))
 
-        sql = """
-            SELECT
-                d.document_id,
-                d.document_number,
-                d.document_name,
-                e.edition_no,
-                e.effective_date,
-                e.edition_status
-            FROM document_master d
-            JOIN document_edition_master e
-              ON d.document_id = e.document_id
+    def iter_all_documents_for_view(
+        self,
+        status_filter: Optional[int] = None,
+        arraysize: int = 1000
+    ) -> Iterator[Tuple]:
         """
+        fetch_all_documents_for_view の逐次版（fetchmany(arraysize) 単位で 1 行ずつ）
 
-        params = []
-
-        if status_filter is not None:
-            sql += " WHERE e.edition_status = ?"
-            params.append(status_filter)
+        途中で止めた場合もカーソルは閉じ、接続はプールへ戻る
+        """
+        rows = self.query.iter(EditionFilter(statuses=status_filter, sort=VIEW_SORT), arraysize)
+        return (_view_row(row) for row in rows)
 
-        sql += """
-            ORDER BY
-                d.document_number,
-                e.edition_no DESC
+    def fetch_documents_for_view_page(
+        self,
+        status_filter: Optional[int] = None,
+        page_size: int = 500,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple], Optional[str]]:
         """
+        fetch_all_documents_for_view のキーセット・ページ版
+
+        Args:
+            status_filter: fetch_all_documents_for_view と同じ
+            page_size: 1 ページの行数
+            cursor: 前ページが返したカーソル（先頭ページは None）
 
-        with self._connect() as conn:
-            cur = conn.cursor()
-            cur.execute(sql, params)
-            return cur.fetchall()
+        Returns:
+            (rows, next_cursor)
+            rows は fetch_all_documents_for_view と同じ列順
+            next_cursor は最終ページで None
+        """
+        rows, next_cursor = self.query.page(
+            EditionFilter(statuses=status_filter, sort=VIEW_SORT), page_size, cursor
+        )
+        return [_view_row(row) for row in rows], next_cursor
 
     @staticmethod
     def status_text(status: int) -> str:
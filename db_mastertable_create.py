@@ -1,31 +1,30 @@
+import argparse
 import sqlite3
 
-# データベースを作成または接続
-db_name = "equipment_management.db"
-conn = sqlite3.connect(db_name)
+from db_migrations import migrate, verify_indexes, analyze, SCHEMA_VERSION
 
-# カーソルを作成
-cursor = conn.cursor()
+# データベースを作成または接続し、スキーマを最新版へ（何度実行してもよい）
+parser = argparse.ArgumentParser(description="document_master.db のスキーマ作成 / 更新")
+parser.add_argument("db_name", nargs="?", default=r"C:\DataBase\document_master.db")
+parser.add_argument("--analyze", action="store_true", help="統計情報（ANALYZE）を更新する")
+args = parser.parse_args()
 
-# テーブルを作成
-tables_name = ["categorie_master","statuse_master","department_master"]
-for create_table_name in tables_name:
-    print(create_table_name)
-    query = f"CREATE TABLE {create_table_name} (ID INT NOT NULL PRIMARY KEY,NAME VARCHAR(255) NOT NULL);"
-    # クエリを実行
-    cursor.execute(query)
-# # カラム名変更　変更したいカラムのマッピング
-# rename_columns = {
-#     "department": "department_id"
-# }
-# # ALTER TABLE クエリを順番に実行
-# for old_name, new_name in rename_columns.items():
-#     query = f"ALTER TABLE equipment RENAME COLUMN {old_name} TO {new_name};"
-#     cursor.execute(query)
+conn = sqlite3.connect(args.db_name)
 
+before, after = migrate(conn)
+if before == after:
+    print(f"スキーマは最新です（版 {after}）")
+else:
+    print(f"スキーマを更新しました（版 {before} → {after} / 最新 {SCHEMA_VERSION}）")
 
-print("テーブルが正常に作成されました。")
+if args.analyze:
+    analyze(conn)
+    print("統計情報を更新しました")
+
+# 主要クエリがインデックスで実行されるか確認
+for name, ok, plan in verify_indexes(conn):
+    print(f"[{'OK' if ok else 'NG'}] {name}")
+    for line in plan:
+        print(f"      {line}")
 
-# コミットして接続を閉じる
-conn.commit()
 conn.close()
@@ -0,0 +1,304 @@
+import sqlite3
+from typing import Callable, Dict, List, Tuple, Union
+
+from document_search import SEARCH_INDEX_DDL, PDF_TEXT_DDL
+from pdf_availability import PDF_AVAILABILITY_DDL
+
+
+# ------------------------------------------------------------------
+# スキーマ定義（版ごと）
+# ・適用済みの版は PRAGMA user_version で管理
+# ・各版は 1 トランザクション（BEGIN IMMEDIATE）で適用
+# ・既存 DB を壊さないよう CREATE は全て IF NOT EXISTS
+# ------------------------------------------------------------------
+BASE_TABLES_DDL = """
+CREATE TABLE IF NOT EXISTS document_master (
+    document_id     INTEGER PRIMARY KEY,
+    document_number TEXT NOT NULL,
+    document_name   TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS Document_Edition_Master (
+    edition_id      INTEGER PRIMARY KEY,
+    document_id     INTEGER NOT NULL REFERENCES document_master (document_id),
+    edition_no      INTEGER NOT NULL,
+    edition_code    TEXT,
+    effective_date  TEXT,
+    edition_status  INTEGER NOT NULL DEFAULT 1,
+    pdf_path        TEXT
+);
+
+CREATE TABLE IF NOT EXISTS categorie_master (ID INT NOT NULL PRIMARY KEY, NAME VARCHAR(255) NOT NULL);
+CREATE TABLE IF NOT EXISTS statuse_master (ID INT NOT NULL PRIMARY KEY, NAME VARCHAR(255) NOT NULL);
+CREATE TABLE IF NOT EXISTS department_master (ID INT NOT NULL PRIMARY KEY, NAME VARCHAR(255) NOT NULL);
+"""
+
+# 一覧 / 承認クエリ用の索引
+# ・状態別一覧・承認時の旧版化：(edition_status, document_id, ...) をカバリングで
+# ・JOIN / 文書単位の履歴：(document_id, edition_no)
+# ・文書番号順の並び：(document_number, document_name) をカバリングで
+INDEXES_DDL = """
+CREATE INDEX IF NOT EXISTS idx_edition_status_document
+    ON Document_Edition_Master (edition_status, document_id, edition_no, effective_date, pdf_path);
+
+CREATE INDEX IF NOT EXISTS idx_edition_document
+    ON Document_Edition_Master (document_id, edition_no);
+
+CREATE INDEX IF NOT EXISTS idx_document_number
+    ON document_master (document_number, document_name);
+"""
+
+
+# 列見出しでの並び替え用（document_query.COLUMN_SORTS と対応）
+# ・状態指定あり / なし の両方を索引順で読めるよう 2 本ずつ
+# ・発行日は NULL を '' に寄せた式索引（キーセットの行値比較で NULL を扱わないため）
+# ・末尾の edition_id（rowid）は索引に暗黙に含まれる
+SORT_INDEXES_DDL = """
+CREATE INDEX IF NOT EXISTS idx_edition_effective_date
+    ON Document_Edition_Master (COALESCE(effective_date, ''));
+
+CREATE INDEX IF NOT EXISTS idx_edition_status_effective_date
+    ON Document_Edition_Master (edition_status, COALESCE(effective_date, ''));
+
+CREATE INDEX IF NOT EXISTS idx_edition_no
+    ON Document_Edition_Master (edition_no);
+
+CREATE INDEX IF NOT EXISTS idx_edition_status_no
+    ON Document_Edition_Master (edition_status, edition_no);
+
+CREATE INDEX IF NOT EXISTS idx_edition_status
+    ON Document_Edition_Master (edition_status);
+
+CREATE INDEX IF NOT EXISTS idx_document_name
+    ON document_master (document_name);
+"""
+
+
+def _rebuild_search_index(conn: sqlite3.Connection):
+    conn.execute("INSERT INTO document_search (document_search) VALUES ('rebuild')")
+
+
+Step = Union[str, Callable[[sqlite3.Connection], None]]
+
+MIGRATIONS: List[Tuple[int, str, List[Step]]] = [
+    (1, "文書 / 版テーブル", [BASE_TABLES_DDL]),
+    (2, "一覧・承認用インデックス", [INDEXES_DDL]),
+    (3, "文書名検索（FTS5）", [SEARCH_INDEX_DDL, _rebuild_search_index]),
+    (4, "PDF 本文検索（FTS5）", [PDF_TEXT_DDL]),
+    (5, "PDF 存在確認キャッシュ", [PDF_AVAILABILITY_DDL]),
+    (6, "列見出しの並び替え用インデックス", [SORT_INDEXES_DDL]),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1][0]
+
+
+# ------------------------------------------------------------------
+# 実行
+# ------------------------------------------------------------------
+def _split_statements(script: str) -> List[str]:
+    """
+    複数文の SQL を 1 文ずつに分割（トリガの BEGIN ... END も考慮）
+    """
+    statements = []
+    buffer = ""
+    for line in script.splitlines(keepends=True):
+        buffer += line
+        if sqlite3.complete_statement(buffer):
+            if buffer.strip():
+                statements.append(buffer.strip())
+            buffer = ""
+    if buffer.strip():
+        statements.append(buffer.strip())
+    return statements
+
+
+def schema_version(conn: sqlite3.Connection) -> int:
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+class SchemaOutdatedError(RuntimeError):
+    """
+    DB のスキーマが必要な版より古い（読み出し側では移行しない）
+    """
+
+
+def require_schema(conn: sqlite3.Connection, version: int = SCHEMA_VERSION) -> int:
+    """
+    スキーマが version 以上であることを確認する（移行はしない）
+
+    ・移行は db_mastertable_create.py か doc_service の起動時にだけ行う
+      （版 3 の検索インデックス再構築などは共有 DB の書込みロックを長く持つため、
+        一覧・検索を読むだけの画面からは実行しない）
+
+    Returns:
+        現在の版（古ければ SchemaOutdatedError）
+    """
+    current = schema_version(conn)
+    if current < version:
+        raise SchemaOutdatedError(
+            f"DB のスキーマが古いため利用できません（版 {current} / 必要 {version}）。"
+            "db_mastertable_create.py でスキーマを更新してください"
+        )
+    return current
+
+
+def migrate(conn: sqlite3.Connection) -> Tuple[int, int]:
+    """
+    未適用の版を順に適用する（何度実行してもよい）
+
+    Returns:
+        (適用前の版, 適用後の版)
+    """
+    start = schema_version(conn)
+    if start >= SCHEMA_VERSION:
+        return start, start
+
+    if conn.in_transaction:
+        conn.commit()
+
+    for version, _title, steps in MIGRATIONS:
+        if version <= start:
+            continue
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            # 他端末が先に適用済みなら飛ばす
+            if schema_version(conn) >= version:
+                conn.rollback()
+                continue
+
+            for step in steps:
+                if callable(step):
+                    step(conn)
+                else:
+                    for statement in _split_statements(step):
+                        conn.execute(statement)
+
+            conn.execute(f"PRAGMA user_version = {version}")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+
+    end = schema_version(conn)
+    if end > start:
+        analyze(conn)
+
+    return start, end
+
+
+def analyze(conn: sqlite3.Connection):
+    """
+    統計情報を更新（インデックス作成後・一括変更後に実行）
+    """
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("ANALYZE")
+    conn.commit()
+
+
+# ------------------------------------------------------------------
+# インデックス検証（EXPLAIN QUERY PLAN）
+# ------------------------------------------------------------------
+HOT_QUERIES: Dict[str, Tuple[str, Tuple]] = {
+    "状態別一覧": (
+        """
+        SELECT d.document_number, d.document_name, e.edition_no,
+               e.effective_date, e.edition_status, e.pdf_path
+        FROM Document_Edition_Master AS e
+        JOIN document_master AS d ON e.document_id = d.document_id
+        WHERE e.edition_status = ?
+        ORDER BY d.document_number, e.edition_no
+        """,
+        (1,),
+    ),
+    "複数状態の一覧（最新版＋修正中）": (
+        """
+        SELECT d.document_number, d.document_name, e.edition_no,
+               e.effective_date, e.edition_status, e.pdf_path
+        FROM Document_Edition_Master AS e
+        JOIN document_master AS d ON e.document_id = d.document_id
+        WHERE e.edition_status IN (SELECT value FROM json_each(?))
+        ORDER BY d.document_number, e.edition_no, e.edition_id
+        """,
+        ("[0, 1]",),
+    ),
+    "全版一覧": (
+        """
+        SELECT d.document_number, d.document_name, e.edition_no,
+               e.effective_date, e.edition_status, e.pdf_path
+        FROM Document_Edition_Master AS e
+        JOIN document_master AS d ON e.document_id = d.document_id
+        ORDER BY d.document_number, e.edition_no
+        """,
+        (),
+    ),
+    "列見出しの並び替え（発行日降順）": (
+        """
+        SELECT d.document_number, d.document_name, e.edition_no,
+               e.effective_date, e.edition_status, e.pdf_path
+        FROM Document_Edition_Master AS e
+        JOIN document_master AS d ON e.document_id = d.document_id
+        ORDER BY COALESCE(e.effective_date, '') DESC, e.edition_id DESC
+        LIMIT 200
+        """,
+        (),
+    ),
+    "列見出しの並び替え（状態別・版数順）": (
+        """
+        SELECT d.document_number, d.document_name, e.edition_no,
+               e.effective_date, e.edition_status, e.pdf_path
+        FROM Document_Edition_Master AS e
+        JOIN document_master AS d ON e.document_id = d.document_id
+        WHERE e.edition_status = ?
+        ORDER BY e.edition_no, e.edition_id
+        LIMIT 200
+        """,
+        (0,),
+    ),
+    "承認：現行版の旧版化": (
+        """
+        UPDATE Document_Edition_Master SET edition_status = ?
+        WHERE document_id = ? AND edition_status = ?
+        """,
+        (9, 1, 0),
+    ),
+    "承認：指定版の最新化": (
+        "UPDATE Document_Edition_Master SET edition_status = ? WHERE edition_id = ?",
+        (0, 1),
+    ),
+    "文書単位の履歴": (
+        """
+        SELECT edition_id, edition_no, effective_date, edition_status, pdf_path
+        FROM Document_Edition_Master
+        WHERE document_id = ?
+        ORDER BY edition_no
+        """,
+        (1,),
+    ),
+}
+
+
+def explain(conn: sqlite3.Connection, sql: str, params: Tuple = ()) -> List[str]:
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return [r[3] for r in rows]
+
+
+def verify_indexes(conn: sqlite3.Connection) -> List[Tuple[str, bool, List[str]]]:
+    """
+    HOT_QUERIES の実行計画を確認
+
+    Returns:
+        (クエリ名, 索引のみで実行できるか, 計画行) の list
+        テーブル全走査（SCAN ... に USING が付かない）があれば False
+        （json_each などの仮想表の走査は対象外）
+    """
+    results = []
+    for name, (sql, params) in HOT_QUERIES.items():
+        plan = explain(conn, sql, params)
+        ok = not any(
+            line.startswith("SCAN") and "USING" not in line and "VIRTUAL TABLE" not in line
+            for line in plan
+        )
+        results.append((name, ok, plan))
+    return results
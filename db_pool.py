@@ -0,0 +1,314 @@
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional, Sequence
+
+
+# ------------------------------------------------------------------
+# 既定 PRAGMA
+# ・DB はネットワーク共有上にあるため WAL / mmap は使わない
+# ------------------------------------------------------------------
+DEFAULT_PRAGMAS: Dict[str, Any] = {
+    "cache_size": -16000,     # 約 16MB のページキャッシュ
+    "temp_store": "MEMORY",
+}
+
+# 接続の生成に使うクラス（query_trace が計測用の派生クラスに差し替える）
+_connection_factory = sqlite3.Connection
+
+
+def set_connection_factory(factory=None):
+    """
+    以後に開く接続のクラスを差し替える（None で標準に戻す）
+
+    既存のプール接続は、次に最外側で取り出されたときに開き直される
+    """
+    global _connection_factory
+    _connection_factory = factory or sqlite3.Connection
+
+
+class ConnectionPool:
+    """
+    SQLite 接続プール（スレッドローカル）
+
+    ・1 スレッド × 1 DB につき 1 接続を保持し、使い回す
+    ・取り出し時に一定間隔でヘルスチェック（SELECT 1）
+    ・接続生成時に PRAGMA を適用
+    ・connection() は従来の _connect() と同じく
+      正常終了で commit / 例外で rollback（最外側のみ）
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        pragmas: Optional[Dict[str, Any]] = None,
+        timeout: float = 10.0,
+        health_check_interval: float = 30.0,
+        cached_statements: int = 256,
+    ):
+        self.db_path = db_path
+        self.pragmas = dict(DEFAULT_PRAGMAS if pragmas is None else pragmas)
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.cached_statements = cached_statements
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._connections = []
+        self._by_thread: Dict[int, sqlite3.Connection] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.health_failures = 0
+
+        # このプールの接続で行が変更されたコミットの回数（キャッシュ無効化用）
+        self.write_generation = 0
+
+    # ------------------------------------------------------------------
+    # 接続生成
+    # ------------------------------------------------------------------
+    def _open(self) -> sqlite3.Connection:
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=self.timeout,
+            cached_statements=self.cached_statements,
+            factory=_connection_factory,
+        )
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except sqlite3.Error:
+            return False
+
+    def _discard(self, conn: sqlite3.Connection):
+        with self._lock:
+            if conn in self._connections:
+                self._connections.remove(conn)
+            for ident, c in list(self._by_thread.items()):
+                if c is conn:
+                    del self._by_thread[ident]
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    # ------------------------------------------------------------------
+    # 接続取得（スレッド単位で再利用）
+    # ------------------------------------------------------------------
+    def acquire(self) -> sqlite3.Connection:
+        return self._thread_connection(count=True)
+
+    def probe(self) -> sqlite3.Connection:
+        """
+        acquire と同じ接続を返すが、再利用の統計（hits）には数えない
+
+        キャッシュの更新確認（PRAGMA data_version）など、問い合わせ本体ではない参照用
+        """
+        return self._thread_connection(count=False)
+
+    def _thread_connection(self, count: bool) -> sqlite3.Connection:
+        local = self._local
+        conn = getattr(local, "conn", None)
+
+        # connection() の内側 / iter_query の読み出し中は開き直さない
+        idle = (
+            getattr(local, "depth", 0) == 0
+            and getattr(local, "readers", 0) == 0
+        )
+
+        if (
+            conn is not None
+            and type(conn) is not _connection_factory
+            and idle
+        ):
+            self._discard(conn)
+            conn = None
+
+        if conn is not None:
+            now = time.monotonic()
+            if idle and now - local.checked_at >= self.health_check_interval:
+                if self._is_healthy(conn):
+                    local.checked_at = now
+                else:
+                    with self._lock:
+                        self.health_failures += 1
+                    self._discard(conn)
+                    conn = None
+
+        if conn is not None:
+            if count:
+                with self._lock:
+                    self.hits += 1
+            return conn
+
+        conn = self._open()
+        local.conn = conn
+        local.depth = 0
+        local.readers = 0
+        local.checked_at = time.monotonic()
+        with self._lock:
+            self.misses += 1        # 接続を開いた回数なので probe でも数える
+            self._connections.append(conn)
+            self._by_thread[threading.get_ident()] = conn
+        return conn
+
+    @contextmanager
+    def connection(self):
+        """
+        プール接続を取得するコンテキストマネージャ
+
+        入れ子で使われた場合は最外側でのみ commit / rollback する
+        ・内側のブロックは SAVEPOINT で囲み、例外で抜けたらその中の変更だけを取り消す
+          （外側がその例外を捕まえて続けても、内側の途中までの書込みは commit されない）
+        ・例外には KeyboardInterrupt / GeneratorExit も含める
+        """
+        conn = self.acquire()
+        local = self._local
+        local.depth += 1
+        depth = local.depth
+        savepoint = None
+        if depth == 1:
+            local.changes_at_start = conn.total_changes
+        else:
+            # トランザクション外の SAVEPOINT は RELEASE で commit されてしまうため、先に BEGIN
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            savepoint = f"pool_depth_{depth}"
+            conn.execute(f"SAVEPOINT {savepoint}")
+        try:
+            yield conn
+            if savepoint is not None:
+                self._end_savepoint(conn, savepoint, rollback=False)
+            else:
+                conn.commit()
+                if conn.total_changes != local.changes_at_start:
+                    with self._lock:
+                        self.write_generation += 1
+        except BaseException:
+            if savepoint is not None:
+                self._end_savepoint(conn, savepoint, rollback=True)
+            else:
+                conn.rollback()
+            raise
+        finally:
+            local.depth -= 1
+
+    @staticmethod
+    def _end_savepoint(conn: sqlite3.Connection, savepoint: str, rollback: bool):
+        """
+        内側ブロックの SAVEPOINT を閉じる（rollback=True なら中の変更を取り消してから）
+
+        内側で明示的に commit / rollback 済みなら SAVEPOINT は既に無いので何もしない
+        """
+        try:
+            if rollback:
+                conn.execute(f"ROLLBACK TO SAVEPOINT {savepoint}")
+            conn.execute(f"RELEASE SAVEPOINT {savepoint}")
+        except sqlite3.OperationalError as e:
+            if "no such savepoint" not in str(e):
+                raise
+
+    def iter_query(
+        self,
+        sql: str,
+        params: Sequence[Any] = (),
+        arraysize: int = 1000
+    ) -> Iterator[tuple]:
+        """
+        SELECT の結果を fetchmany(arraysize) 単位で 1 行ずつ返すジェネレータ
+
+        ・スレッドの接続をそのまま使うが、connection() の入れ子深さには
+          数えない（読み出しの途中で connection() を使った書き込みは
+          その場で最外側として commit / rollback される）
+        ・カーソルは読み切り / close()（for の break・ジェネレータの破棄）/
+          例外のいずれでも必ず閉じる
+        ・connection() の外で呼ばれた場合、閉じた時点で残っている
+          トランザクションは rollback する（ロックを残さない）
+        ・読み出し中は接続の開き直し（ヘルスチェック / 接続クラスの差し替え）を行わない
+        """
+        conn = self.acquire()
+        local = self._local
+        local.readers = getattr(local, "readers", 0) + 1
+        cur = conn.cursor()
+        cur.arraysize = arraysize
+        try:
+            cur.execute(sql, params)
+            while True:
+                rows = cur.fetchmany()
+                if not rows:
+                    return
+                yield from rows
+        finally:
+            cur.close()
+            local.readers -= 1
+            if local.depth == 0 and conn.in_transaction:
+                conn.rollback()
+
+    def interrupt(self, thread_ident: int):
+        """
+        指定スレッドの接続で実行中のクエリを中断させる（他スレッドから呼ぶ）
+        """
+        with self._lock:
+            conn = self._by_thread.get(thread_ident)
+        if conn is not None:
+            conn.interrupt()
+
+    # ------------------------------------------------------------------
+    # 後始末 / 統計
+    # ------------------------------------------------------------------
+    def close_all(self):
+        """
+        プールが保持する全接続を閉じる（アプリ終了時）
+        """
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._by_thread.clear()
+        for conn in connections:
+            try:
+                conn.close()
+            except sqlite3.Error:
+                pass
+        self._local = threading.local()
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "health_failures": self.health_failures,
+                "open_connections": len(self._connections),
+            }
+
+
+# ------------------------------------------------------------------
+# DB パス単位の共有プール
+# ------------------------------------------------------------------
+_pools: Dict[str, ConnectionPool] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(db_path: str, pragmas: Optional[Dict[str, Any]] = None) -> ConnectionPool:
+    """
+    db_path ごとに 1 つのプールを返す（全データアクセスクラスで共有）
+
+    pragmas は初回生成時のみ有効
+    """
+    with _pools_lock:
+        pool = _pools.get(db_path)
+        if pool is None:
+            pool = ConnectionPool(db_path, pragmas=pragmas)
+            _pools[db_path] = pool
+        return pool
+
+
+def close_all_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+    for pool in pools:
+        pool.close_all()
@@ -0,0 +1,996 @@
+import argparse
+import asyncio
+import gzip
+import http.client
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+from document_info import DocumentInfo, SortSpec, StatusSpec
+from document_query import EditionRow
+from pdf_availability import PdfAvailability, get_availability
+from query_cache import VersionedLRUCache
+
+
+# ------------------------------------------------------------------
+# 文書 DB の HTTP/JSON サービス
+# ・各端末が共有上の DB を直接開く代わりに、DB のある側で 1 プロセスだけが開く
+#   （SMB 越しのファイルロック待ち / "database is locked" を避ける）
+# ・読み出しはスレッドプール、書込み（承認・PDF 存在確認）は 1 本のスレッドで順に実行
+# ・応答は DB の版（PRAGMA data_version ＋ 自プロセスの書込み回数）を ETag にして保持
+#   → 同じ一覧の再読込は If-None-Match で 304（DB へも行かない）
+# ・JSON は gzip で返す（Accept-Encoding: gzip のとき）
+# ・GUI は DocumentServiceClient（DocumentInfo と同じ呼び出し方）で利用する
+# ------------------------------------------------------------------
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+# GUI の接続先（設定されていれば DB を直接開かずにサービス経由）
+SERVICE_URL_ENV = "DOCDB_SERVICE_URL"
+
+GZIP_MIN_BYTES = 1024          # これより小さい応答は圧縮しない
+GZIP_LEVEL = 3                 # 一覧の JSON は低い圧縮率でも十分縮む
+MAX_BODY_BYTES = 1024 ** 2     # POST 本文の上限
+MAX_PAGE_ROWS = 10000          # window / page の 1 回の上限行数
+WRITE_RETRIES = 3              # 他端末の直接書込みとぶつかったときの再試行回数
+
+
+class ServiceError(Exception):
+    """
+    サービスがエラーを返した（入力不正は ValueError、それ以外はこちら）
+    """
+
+    def __init__(self, status: int, message: Optional[str]):
+        super().__init__(f"{status} {message or HTTPStatus(status).phrase}")
+        self.status = status
+
+
+# ------------------------------------------------------------------
+# 要求パラメータ（クエリ文字列）
+# ・status : "0" / "0,1" / 省略 = すべて
+# ・sort   : 繰り返し指定（sort=effective_date%20DESC&sort=...）
+# ・per_document : "1" で文書ごとの代表の版のみ（省略 = 全版）
+# ------------------------------------------------------------------
+Params = Dict[str, List[str]]
+
+
+def _status(params: Params) -> StatusSpec:
+    value = params.get("status", [""])[-1]
+    if not value:
+        return None
+    try:
+        statuses = tuple(int(v) for v in value.split(","))
+    except ValueError:
+        raise ValueError(f"status が不正です: '{value}'")
+    return statuses[0] if len(statuses) == 1 else statuses
+
+
+def _sort(params: Params) -> SortSpec:
+    return tuple(params["sort"]) if params.get("sort") else None
+
+
+def _str(params: Params, name: str) -> Optional[str]:
+    values = params.get(name)
+    return values[-1] if values else None
+
+
+def _int(params: Params, name: str, default: Optional[int] = None, maximum: Optional[int] = None) -> int:
+    value = _str(params, name)
+    if value is None:
+        if default is None:
+            raise ValueError(f"{name} を指定してください")
+        return default
+    try:
+        number = int(value)
+    except ValueError:
+        raise ValueError(f"{name} が不正です: '{value}'")
+    if number < 0 or (maximum is not None and number > maximum):
+        raise ValueError(f"{name} は 0〜{maximum} で指定してください")
+    return number
+
+
+def _per_document(params: Params) -> bool:
+    return _str(params, "per_document") == "1"
+
+
+def _rows(rows) -> List[list]:
+    return [list(r) for r in rows]
+
+
+# ------------------------------------------------------------------
+# DB の版（ETag の元）
+# ------------------------------------------------------------------
+class VersionMonitor:
+    """
+    DB の版を返す（専用の接続で PRAGMA data_version を見る）
+
+    ・他接続（他端末 / このプロセスの別接続）のコミットで data_version が変わる
+    ・確認は check_interval 秒に 1 回まで。ただし自プロセスの書込み
+      （write_generation の変化）があれば直ちに確認する
+    ・data_version は接続ごとの値なので、起動ごとの識別子を前に付ける
+    """
+
+    def __init__(self, db_path: str, pool, check_interval: float = 0.5):
+        self.pool = pool
+        self.check_interval = check_interval
+        self.boot = uuid.uuid4().hex[:8]
+
+        self._conn = sqlite3.connect(db_path, timeout=pool.timeout, check_same_thread=False)
+        self._lock = threading.Lock()
+        self._data_version: Optional[int] = None
+        self._generation: Optional[int] = None
+        self._checked_at = 0.0
+
+    def current(self) -> str:
+        generation = self.pool.write_generation
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._data_version is None
+                or generation != self._generation
+                or now - self._checked_at >= self.check_interval
+            ):
+                self._data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+                self._generation = generation
+                self._checked_at = now
+            return f"{self.boot}.{self._data_version}.{self._generation}"
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+# ------------------------------------------------------------------
+# 応答キャッシュ（イベントループのスレッドからのみ使う）
+# ------------------------------------------------------------------
+class _Entry:
+    __slots__ = ("body", "gzipped")
+
+    def __init__(self, body: bytes, gzipped: Optional[bytes]):
+        self.body = body
+        self.gzipped = gzipped
+
+    @property
+    def size(self) -> int:
+        return len(self.body) + len(self.gzipped or b"")
+
+
+class ResponseCache:
+    """
+    (パス, クエリ文字列) → (ETag, 応答本文) の LRU
+
+    ・ETag が変わった（DB が更新された）エントリは参照時に外れとして扱い、次の登録で置き換わる
+    ・件数 maxsize / 合計 max_bytes を超えたら古いものから破棄
+    """
+
+    def __init__(self, maxsize: int = 256, max_bytes: int = 256 * 1024 ** 2):
+        self.maxsize = maxsize
+        self.max_bytes = max_bytes
+        self._data: "OrderedDict[Tuple[str, str], Tuple[str, _Entry]]" = OrderedDict()
+        self._bytes = 0
+
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, str], etag: str) -> Optional[_Entry]:
+        item = self._data.get(key)
+        if item is None or item[0] != etag:
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return item[1]
+
+    def put(self, key: Tuple[str, str], etag: str, entry: _Entry):
+        old = self._data.pop(key, None)
+        if old is not None:
+            self._bytes -= old[1].size
+        self._data[key] = (etag, entry)
+        self._bytes += entry.size
+        while self._data and (len(self._data) > self.maxsize or self._bytes > self.max_bytes):
+            _, (_, evicted) = self._data.popitem(last=False)
+            self._bytes -= evicted.size
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "bytes": self._bytes,
+        }
+
+
+# ------------------------------------------------------------------
+# サーバ
+# ------------------------------------------------------------------
+class DocumentService:
+    """
+    DocumentInfo の一覧取得・検索・承認を HTTP/JSON で提供する
+
+    GET（応答に ETag。If-None-Match が一致すれば 304）
+        /editions          ?status=&sort=                    → {"rows"}
+        /editions/count    ?status=&per_document=            → {"count"}
+        /editions/window   ?status=&offset=&limit=&sort=&per_document=
+                                                             → {"rows"}
+        /editions/page     ?status=&size=&cursor=&sort=&per_document=
+                                                             → {"rows", "next_cursor"}
+        /editions/history  ?document_id=&status=             → {"rows"}
+        /search            ?q=&status=&sort=&per_document=   → {"rows"}
+        /search/pdf-text   ?q=&status=&limit=                → {"rows"}
+        /documents                                           → {"rows"}
+        /pdf/missing                                         → {"missing", "running"}
+        /status                                              → 稼働状況（キャッシュしない）
+    POST（JSON 本文。書込み用の 1 スレッドで順に実行）
+        /approve   {"pairs": [[document_id, edition_id], ...]} → {"approved"}
+        /pdf/scan  {"paths": [...] | null}                     → 走査結果
+
+    rows の各行は EditionRow と同じ列順の配列
+    入力不正・承認できない組合せは 400 {"error"}
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        read_workers: int = 8,
+        cache_size: int = 256,
+        idle_timeout: float = 60.0,
+        scan_pdfs: bool = True
+    ):
+        self.host = host
+        self.port = port
+        self.idle_timeout = idle_timeout
+        self.scan_pdfs = scan_pdfs
+
+        # 結果は応答キャッシュ側（ETag 単位）で持つため、DocumentInfo はキャッシュなし
+        # （行のキャッシュと ETag の確認時点がずれて古い行に新しい ETag が付くのを防ぐ）
+        self.db = DocumentInfo(db_path)
+        self.monitor = VersionMonitor(db_path, self.db.pool)
+        self.responses = ResponseCache(cache_size)
+        self.availability = get_availability(self.db)
+
+        self._readers = ThreadPoolExecutor(max_workers=read_workers, thread_name_prefix="doc-service-read")
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="doc-service-write")
+        self._inflight: Dict[Tuple[Tuple[str, str], str], asyncio.Future] = {}
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._clients = set()
+
+        self.counters = {"requests": 0, "not_modified": 0, "computed": 0, "writes": 0, "errors": 0}
+
+        # パス → (処理, ETag に足す値)
+        self._routes: Dict[str, Tuple[Callable[[Params], Any], Optional[Callable[[], str]]]] = {
+            "/editions": (self._get_editions, None),
+            "/editions/count": (self._get_count, None),
+            "/editions/window": (self._get_window, None),
+            "/editions/page": (self._get_page, None),
+            "/editions/history": (self._get_history, None),
+            "/search": (self._get_search, None),
+            "/search/pdf-text": (self._get_search_pdf_text, None),
+            "/documents": (self._get_documents, None),
+            # 走査の進み具合は DB の版に出ないため、走査側の世代と実行中かを足す
+            "/pdf/missing": (self._get_pdf_missing, self._availability_tag),
+        }
+        self._posts: Dict[str, Callable[[Dict[str, Any]], Any]] = {
+            "/approve": self._post_approve,
+            "/pdf/scan": self._post_pdf_scan,
+        }
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    # ------------------------------------------------------------------
+    # GET の処理（読み出し用スレッドで実行）
+    # ------------------------------------------------------------------
+    def _get_editions(self, p: Params):
+        return {"rows": _rows(self.db.fetch_editions_by_status(_status(p), _sort(p)))}
+
+    def _get_count(self, p: Params):
+        return {"count": self.db.count_editions(_status(p), _per_document(p))}
+
+    def _get_window(self, p: Params):
+        rows = self.db.fetch_editions_window(
+            _status(p), _int(p, "offset"), _int(p, "limit", maximum=MAX_PAGE_ROWS), _sort(p),
+            _per_document(p)
+        )
+        return {"rows": _rows(rows)}
+
+    def _get_page(self, p: Params):
+        rows, next_cursor = self.db.fetch_editions_by_status_page(
+            _status(p), _int(p, "size", maximum=MAX_PAGE_ROWS), _str(p, "cursor"), _sort(p),
+            _per_document(p)
+        )
+        return {"rows": _rows(rows), "next_cursor": next_cursor}
+
+    def _get_history(self, p: Params):
+        return {"rows": _rows(self.db.fetch_edition_history(_int(p, "document_id"), _status(p)))}
+
+    def _get_search(self, p: Params):
+        rows = self.db.search_documents(_str(p, "q") or "", _status(p), _sort(p), _per_document(p))
+        return {"rows": _rows(rows)}
+
+    def _get_search_pdf_text(self, p: Params):
+        status = _status(p)
+        if isinstance(status, tuple):
+            raise ValueError("本文検索の status は 1 つだけ指定できます")
+        rows = self.db.search_pdf_text(_str(p, "q") or "", status, _int(p, "limit", 200, MAX_PAGE_ROWS))
+        return {"rows": _rows(rows)}
+
+    def _get_documents(self, p: Params):
+        return {"rows": _rows(self.db.fetch_document_master())}
+
+    def _get_pdf_missing(self, p: Params):
+        return {"missing": sorted(self.availability.missing), "running": self.availability.running}
+
+    def _availability_tag(self) -> str:
+        return f".{self.availability.generation}.{int(self.availability.running)}"
+
+    def _status_info(self) -> Dict[str, Any]:
+        return {
+            "version": self.monitor.current(),
+            "counters": dict(self.counters),
+            "responses": self.responses.stats(),
+            "pool": self.db.pool.stats(),
+            "pdf_scan": dict(self.availability.last_result, running=self.availability.running),
+        }
+
+    # ------------------------------------------------------------------
+    # POST の処理（書込み用の 1 スレッドで実行 → 書込みは常に 1 つずつ）
+    # ------------------------------------------------------------------
+    def _post_approve(self, payload: Dict[str, Any]):
+        try:
+            pairs = [(int(document_id), int(edition_id)) for document_id, edition_id in payload["pairs"]]
+        except (KeyError, TypeError, ValueError):
+            raise ValueError("pairs は [[document_id, edition_id], ...] で指定してください")
+        return {"approved": self.db.approve_editions(pairs)}
+
+    def _post_pdf_scan(self, payload: Dict[str, Any]):
+        paths = payload.get("paths")
+        if paths is not None and not isinstance(paths, list):
+            raise ValueError("paths は文字列の配列で指定してください")
+        return self.availability.scan(paths)
+
+    def _write(self, handler: Callable[[Dict[str, Any]], Any], payload: Dict[str, Any]):
+        """
+        書込み 1 件（直接 DB を開いている端末とロックがぶつかった場合は少し待って再試行）
+        """
+        for attempt in range(WRITE_RETRIES):
+            try:
+                return handler(payload)
+            except sqlite3.OperationalError as e:
+                if "locked" not in str(e) or attempt == WRITE_RETRIES - 1:
+                    raise
+                time.sleep(0.2 * (attempt + 1))
+
+    # ------------------------------------------------------------------
+    # 振り分け（イベントループ）
+    # ------------------------------------------------------------------
+    @staticmethod
+    def _render(handler: Callable[[Params], Any], params: Params) -> _Entry:
+        body = json.dumps(handler(params), ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        gzipped = gzip.compress(body, GZIP_LEVEL) if len(body) >= GZIP_MIN_BYTES else None
+        return _Entry(body, gzipped)
+
+    async def _dispatch_get(self, path: str, query: str, headers: Dict[str, str]):
+        loop = asyncio.get_running_loop()
+        if path == "/status":
+            info = await loop.run_in_executor(self._readers, self._status_info)
+            return 200, {}, json.dumps(info, ensure_ascii=False).encode("utf-8")
+
+        route = self._routes.get(path)
+        if route is None:
+            return _error(404, f"不明なパスです: {path}")
+        handler, extra = route
+
+        # 版は問い合わせより先に読む（応答の中身は常に ETag の版以降）
+        version = await loop.run_in_executor(self._readers, self.monitor.current)
+        etag = f'"{version}{extra() if extra else ""}"'
+        if headers.get("if-none-match") == etag:
+            self.counters["not_modified"] += 1
+            return 304, {"ETag": etag}, b""
+
+        key = (path, query)
+        entry = self.responses.get(key, etag)
+        if entry is None:
+            # 同じ一覧への同時要求（更新直後の一斉再読込）は 1 回の問い合わせにまとめる
+            future = self._inflight.get((key, etag))
+            if future is None:
+                future = loop.run_in_executor(self._readers, self._render, handler, parse_qs(query))
+                self._inflight[(key, etag)] = future
+                future.add_done_callback(lambda f: self._finish(key, etag, f))
+                self.counters["computed"] += 1
+            entry = await asyncio.shield(future)
+
+        response_headers = {"ETag": etag}
+        if entry.gzipped is not None and "gzip" in headers.get("accept-encoding", ""):
+            response_headers["Content-Encoding"] = "gzip"
+            return 200, response_headers, entry.gzipped
+        return 200, response_headers, entry.body
+
+    def _finish(self, key: Tuple[str, str], etag: str, future: asyncio.Future):
+        self._inflight.pop((key, etag), None)
+        if not future.cancelled() and future.exception() is None:
+            self.responses.put(key, etag, future.result())
+
+    async def _dispatch_post(self, path: str, body: bytes):
+        handler = self._posts.get(path)
+        if handler is None:
+            return _error(404, f"不明なパスです: {path}")
+        try:
+            payload = json.loads(body or b"{}")
+        except ValueError:
+            return _error(400, "本文が JSON ではありません")
+        if not isinstance(payload, dict):
+            return _error(400, "本文は JSON オブジェクトで指定してください")
+
+        loop = asyncio.get_running_loop()
+        result = await loop.run_in_executor(self._writer, self._write, handler, payload)
+        self.counters["writes"] += 1
+        return 200, {}, json.dumps(result, ensure_ascii=False).encode("utf-8")
+
+    async def _dispatch(self, method: str, target: str, headers: Dict[str, str], body: bytes):
+        parts = urlsplit(target)
+        self.counters["requests"] += 1
+        try:
+            if method in ("GET", "HEAD"):
+                return await self._dispatch_get(parts.path, parts.query, headers)
+            if method == "POST":
+                return await self._dispatch_post(parts.path, body)
+            return _error(405, f"{method} は使えません")
+        except ValueError as e:
+            return _error(400, str(e))
+        except Exception as e:
+            self.counters["errors"] += 1
+            print(f"[doc_service] エラー: {method} {target}: {e}")
+            return _error(500, str(e))
+
+    # ------------------------------------------------------------------
+    # HTTP/1.1（keep-alive 対応の最小限）
+    # ------------------------------------------------------------------
+    async def _read_request(self, reader: asyncio.StreamReader):
+        """
+        Returns:
+            (method, target, version, headers, body)。接続が閉じられた / 待ち時間切れなら None
+        """
+        try:
+            line = await asyncio.wait_for(reader.readline(), self.idle_timeout)
+        except asyncio.TimeoutError:
+            return None
+        if not line:
+            return None
+        parts = line.decode("latin-1").split()
+        if len(parts) != 3:
+            raise ValueError("要求行が不正です")
+        method, target, version = parts
+
+        headers: Dict[str, str] = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        length = int(headers.get("content-length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ValueError("本文が大きすぎます")
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, version, headers, body
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._clients.add(writer)
+        try:
+            while True:
+                try:
+                    request = await self._read_request(reader)
+                except ValueError as e:
+                    writer.write(_http_response(*_error(400, str(e)), keep_alive=False))
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                method, target, version, headers, body = request
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection == "keep-alive" if version == "HTTP/1.0" else connection != "close"
+
+                status, response_headers, payload = await self._dispatch(method, target, headers, body)
+                if method == "HEAD":
+                    payload = b""
+                writer.write(_http_response(status, response_headers, payload, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self._clients.discard(writer)
+            writer.close()
+
+    # ------------------------------------------------------------------
+    # 起動 / 停止
+    # ------------------------------------------------------------------
+    async def start(self):
+        loop = asyncio.get_running_loop()
+        self._loop = loop
+        # スキーマの移行は起動時にここで 1 回だけ（読み出しでは版の確認のみ）
+        await loop.run_in_executor(self._writer, self.db.ensure_schema)
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self._server.sockets[0].getsockname()[1]   # port=0 なら割り当てられた番号
+        if self.scan_pdfs:
+            self.availability.start()
+
+    async def serve_forever(self):
+        await self.start()
+        print(f"[doc_service] {self.url} で待受中（DB: {self.db.db_path}）")
+        async with self._server:
+            await self._server.serve_forever()
+
+    def start_in_thread(self) -> "DocumentService":
+        """
+        別スレッドのイベントループで起動し、待受開始まで待って戻る
+        （動作確認・ベンチマーク用。port=0 で空いている番号を使う）
+        """
+        started = threading.Event()
+        errors: List[BaseException] = []
+
+        def run():
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+            try:
+                loop.run_until_complete(self.start())
+            except BaseException as e:
+                errors.append(e)
+                started.set()
+                return
+            started.set()
+            loop.run_forever()
+            loop.run_until_complete(loop.shutdown_asyncgens())
+            loop.close()
+
+        self._thread = threading.Thread(target=run, name="doc-service", daemon=True)
+        self._thread.start()
+        started.wait()
+        if errors:
+            raise errors[0]
+        return self
+
+    def stop(self):
+        """
+        start_in_thread() で起動したサービスを止める
+        """
+        loop = self._loop
+        if loop is None:
+            return
+
+        async def shutdown():
+            self._server.close()
+            await self._server.wait_closed()
+            # keep-alive で待機中の接続も閉じる（読み込み側が EOF で抜ける）
+            for writer in list(self._clients):
+                writer.close()
+            handlers = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            await asyncio.gather(*handlers, return_exceptions=True)
+
+        asyncio.run_coroutine_threadsafe(shutdown(), loop).result()
+        loop.call_soon_threadsafe(loop.stop)
+        if self._thread is not None:
+            self._thread.join()
+        self._readers.shutdown(wait=True)
+        self._writer.shutdown(wait=True)
+        self.monitor.close()
+
+
+def _error(status: int, message: str):
+    return status, {}, json.dumps({"error": message}, ensure_ascii=False).encode("utf-8")
+
+
+def _http_response(status: int, headers: Dict[str, str], body: bytes, keep_alive: bool = True) -> bytes:
+    lines = [f"HTTP/1.1 {status} {HTTPStatus(status).phrase}"]
+    headers = dict(headers)
+    if status != 304:
+        headers.setdefault("Content-Type", "application/json; charset=utf-8")
+    headers["Content-Length"] = str(len(body))
+    headers["Cache-Control"] = "no-cache"
+    headers["Vary"] = "Accept-Encoding"
+    headers["Connection"] = "keep-alive" if keep_alive else "close"
+    lines.extend(f"{name}: {value}" for name, value in headers.items())
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body
+
+
+# ------------------------------------------------------------------
+# クライアント（GUI 用：DocumentInfo と同じ呼び出し方）
+# ------------------------------------------------------------------
+class DocumentServiceClient:
+    """
+    DocumentService を DocumentInfo と同じメソッド名で呼ぶ
+
+    ・GUI の読み出し / 承認に必要なメソッドのみ（pool は None）
+    ・応答は ETag ごとに手元に保持し、再要求は If-None-Match で送る
+      （304 なら前回の結果をそのまま返す）
+    ・HTTP 接続はスレッドごとに keep-alive で使い回す
+    """
+
+    LATEST = DocumentInfo.LATEST
+    DRAFT = DocumentInfo.DRAFT
+    ARCHIVED = DocumentInfo.ARCHIVED
+    STATUS_FILTERS = DocumentInfo.STATUS_FILTERS
+    EDITION_COLUMNS = DocumentInfo.EDITION_COLUMNS
+
+    status_text = DocumentInfo.status_text
+    page_cursor = staticmethod(DocumentInfo.page_cursor)
+
+    def __init__(self, base_url: str, timeout: float = 60.0, cache_size: int = 256):
+        parts = urlsplit(base_url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"サービスの URL が不正です: '{base_url}'")
+
+        self.base_url = base_url.rstrip("/")
+        self.db_path = self.base_url      # DB ごとの登録（PDF 存在確認など）のキー
+        self.pool = None
+        self.timeout = timeout
+        self.cache_size = cache_size
+
+        self._https = parts.scheme == "https"
+        self._host = parts.hostname
+        self._port = parts.port
+        self._prefix = parts.path.rstrip("/")
+
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._cache: "OrderedDict[str, Tuple[str, Any]]" = OrderedDict()
+
+        self.hits = 0       # 304（手元の結果を使用）
+        self.misses = 0
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    def _connection(self) -> http.client.HTTPConnection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            connection_class = http.client.HTTPSConnection if self._https else http.client.HTTPConnection
+            conn = connection_class(self._host, self._port, timeout=self.timeout)
+            self._local.conn = conn
+        return conn
+
+    def _request(self, method: str, target: str, body: Optional[bytes], headers: Dict[str, str]):
+        # keep-alive の接続がサーバ側で閉じられていた場合は 1 回だけ張り直す
+        for attempt in range(2):
+            conn = self._connection()
+            try:
+                conn.request(method, target, body=body, headers=headers)
+                response = conn.getresponse()
+                return response, response.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                conn.close()
+                self._local.conn = None
+                if attempt:
+                    raise
+
+    @staticmethod
+    def _decode(response, data: bytes) -> Any:
+        if response.getheader("Content-Encoding") == "gzip":
+            data = gzip.decompress(data)
+        return json.loads(data) if data else None
+
+    @staticmethod
+    def _raise(status: int, payload: Any):
+        message = payload.get("error") if isinstance(payload, dict) else None
+        if status == 400:
+            raise ValueError(message)
+        raise ServiceError(status, message)
+
+    def _get(self, path: str, params: List[Tuple[str, Any]], parse: Callable[[Any], Any]) -> Any:
+        target = self._prefix + path
+        if params:
+            target += "?" + urlencode(params)
+
+        with self._lock:
+            cached = self._cache.get(target)
+        headers = {"Accept-Encoding": "gzip"}
+        if cached is not None:
+            headers["If-None-Match"] = cached[0]
+
+        response, data = self._request("GET", target, None, headers)
+        if response.status == 304 and cached is not None:
+            with self._lock:
+                self.hits += 1
+                if target in self._cache:
+                    self._cache.move_to_end(target)
+            return cached[1]
+
+        payload = self._decode(response, data)
+        if response.status != 200:
+            self._raise(response.status, payload)
+        value = parse(payload)
+
+        etag = response.getheader("ETag")
+        with self._lock:
+            self.misses += 1
+            if etag:
+                self._cache[target] = (etag, value)
+                self._cache.move_to_end(target)
+                while len(self._cache) > self.cache_size:
+                    self._cache.popitem(last=False)
+        return value
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Any:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        response, data = self._request(
+            "POST", self._prefix + path, body, {"Content-Type": "application/json; charset=utf-8"}
+        )
+        result = self._decode(response, data)
+        if response.status != 200:
+            self._raise(response.status, result)
+        return result
+
+    @staticmethod
+    def _params(edition_status: StatusSpec = None, sort: SortSpec = None, **extra) -> List[Tuple[str, Any]]:
+        params: List[Tuple[str, Any]] = []
+        if edition_status is not None:
+            if isinstance(edition_status, int):
+                params.append(("status", str(edition_status)))
+            else:
+                params.append(("status", ",".join(str(s) for s in edition_status)))
+        for term in sort or ():
+            params.append(("sort", term))
+        for name, value in extra.items():
+            if value is not None:
+                params.append((name, value))
+        return params
+
+    @staticmethod
+    def _flag(value: bool) -> Optional[str]:
+        return "1" if value else None    # 既定値は送らない（URL＝キャッシュのキーを変えない）
+
+    @staticmethod
+    def _edition_rows(payload) -> Tuple[EditionRow, ...]:
+        return tuple(EditionRow(*r) for r in payload["rows"])
+
+    # ------------------------------------------------------------------
+    # 一覧取得（DocumentInfo と同じ）
+    # ------------------------------------------------------------------
+    def fetch_all_editions(self) -> List[Tuple]:
+        return self.fetch_editions_by_status(None)
+
+    def fetch_latest_documents(self, sort: SortSpec = None) -> List[Tuple]:
+        return self.fetch_editions_by_status(self.LATEST, sort)
+
+    def fetch_editions_by_status(self, edition_status: StatusSpec, sort: SortSpec = None) -> List[Tuple]:
+        return list(self._get("/editions", self._params(edition_status, sort), self._edition_rows))
+
+    def iter_all_editions(self, arraysize: int = 1000) -> Iterator[Tuple]:
+        return self.iter_editions(None, arraysize)
+
+    def iter_latest_documents(self, arraysize: int = 1000) -> Iterator[Tuple]:
+        return self.iter_editions(self.LATEST, arraysize)
+
+    def iter_editions_by_status(self, edition_status: StatusSpec, arraysize: int = 1000) -> Iterator[Tuple]:
+        return self.iter_editions(edition_status, arraysize)
+
+    def iter_editions(
+        self,
+        edition_status: StatusSpec = None,
+        arraysize: int = 1000,
+        sort: SortSpec = None
+    ) -> Iterator[Tuple]:
+        """
+        ページ取得（arraysize 行ずつ）を順に辿って 1 行ずつ返す
+        """
+        cursor = None
+        while True:
+            rows, cursor = self.fetch_editions_by_status_page(edition_status, arraysize, cursor, sort)
+            yield from rows
+            if cursor is None:
+                return
+
+    def count_editions(self, edition_status: StatusSpec = None, per_document: bool = False) -> int:
+        params = self._params(edition_status, per_document=self._flag(per_document))
+        return self._get("/editions/count", params, lambda p: p["count"])
+
+    def fetch_editions_window(
+        self,
+        edition_status: StatusSpec,
+        offset: int,
+        limit: int,
+        sort: SortSpec = None,
+        per_document: bool = False
+    ) -> List[Tuple]:
+        params = self._params(
+            edition_status, sort, offset=offset, limit=limit, per_document=self._flag(per_document)
+        )
+        return list(self._get("/editions/window", params, self._edition_rows))
+
+    def fetch_all_editions_page(
+        self,
+        page_size: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        return self.fetch_editions_by_status_page(None, page_size, cursor)
+
+    def fetch_latest_documents_page(
+        self,
+        page_size: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        return self.fetch_editions_by_status_page(self.LATEST, page_size, cursor)
+
+    def fetch_editions_by_status_page(
+        self,
+        edition_status: StatusSpec,
+        page_size: int,
+        cursor: Optional[str] = None,
+        sort: SortSpec = None,
+        per_document: bool = False
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        params = self._params(
+            edition_status, sort, size=page_size, cursor=cursor, per_document=self._flag(per_document)
+        )
+        rows, next_cursor = self._get(
+            "/editions/page", params, lambda p: (self._edition_rows(p), p["next_cursor"])
+        )
+        return list(rows), next_cursor
+
+    def fetch_edition_history(self, document_id: int, edition_status: StatusSpec = None) -> List[Tuple]:
+        params = self._params(edition_status, document_id=document_id)
+        return list(self._get("/editions/history", params, self._edition_rows))
+
+    def fetch_editions_by_document(self, document_id: int) -> List[Tuple]:
+        return self.fetch_edition_history(document_id)
+
+    def search_documents(
+        self,
+        keyword: str,
+        edition_status: StatusSpec = None,
+        sort: SortSpec = None,
+        per_document: bool = False
+    ) -> List[Tuple]:
+        params = self._params(edition_status, sort, q=keyword.strip(), per_document=self._flag(per_document))
+        return list(self._get("/search", params, self._edition_rows))
+
+    def search_pdf_text(
+        self,
+        keyword: str,
+        edition_status: Optional[int] = None,
+        limit: int = 200
+    ) -> List[Tuple]:
+        params = self._params(edition_status, q=keyword.strip(), limit=limit)
+        return list(self._get("/search/pdf-text", params, lambda p: tuple(tuple(r) for r in p["rows"])))
+
+    def fetch_document_master(self) -> List[Tuple]:
+        return list(self._get("/documents", [], lambda p: tuple(tuple(r) for r in p["rows"])))
+
+    def iter_document_master(self, arraysize: int = 1000) -> Iterator[Tuple]:
+        return iter(self.fetch_document_master())
+
+    def ensure_schema(self):
+        pass    # スキーマはサービス側で更新する
+
+    def require_schema(self, version: int):
+        pass    # 版の確認もサービス側（起動時に移行済み）
+
+    def cache_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "size": len(self._cache),
+                "maxsize": self.cache_size,
+            }
+
+    # ------------------------------------------------------------------
+    # 承認（サービス側で 1 件ずつ順に実行）
+    # ------------------------------------------------------------------
+    def approve_edition(self, document_id: int, edition_id: int):
+        self.approve_editions([(document_id, edition_id)])
+
+    def approve_editions(self, pairs) -> int:
+        pairs = [[int(document_id), int(edition_id)] for document_id, edition_id in pairs]
+        return self._post("/approve", {"pairs": pairs})["approved"]
+
+    # ------------------------------------------------------------------
+    # PDF 存在確認（走査はサービス側）
+    # ------------------------------------------------------------------
+    def create_availability(self) -> "RemotePdfAvailability":
+        return RemotePdfAvailability(self)
+
+
+class RemotePdfAvailability(PdfAvailability):
+    """
+    サービス側の PDF 存在確認の結果を参照する（pdf_availability.get_availability から生成）
+
+    ・start() はサービスの走査が終わるまで poll_interval 秒ごとに結果を取り直す
+    ・scan(paths) は指定分の確認をサービスへ依頼する
+    """
+
+    def __init__(self, client: DocumentServiceClient, poll_interval: float = 5.0):
+        super().__init__(client)
+        self.client = client
+        self.poll_interval = poll_interval
+        self._remote_running = False
+
+    def load_missing(self):
+        result = self.client._get(
+            "/pdf/missing", [], lambda p: (frozenset(p["missing"]), p["running"])
+        )
+        missing, self._remote_running = result
+        with self._lock:
+            if missing != self._missing:
+                self._missing = missing
+                self.generation += 1
+        return missing
+
+    def scan(self, paths=None, progress=None) -> Dict[str, float]:
+        counts = self.client._post("/pdf/scan", {"paths": list(paths) if paths is not None else None})
+        self.load_missing()
+        self.last_result = counts
+        return counts
+
+    def _run(self):
+        try:
+            while True:
+                self.load_missing()
+                if not self._remote_running:
+                    return
+                time.sleep(self.poll_interval)
+        except Exception as e:
+            print(f"[doc_service] PDF 存在確認の取得エラー: {e}")
+
+
+# ------------------------------------------------------------------
+# GUI 用の入口
+# ------------------------------------------------------------------
+def open_document_info(target: str, cache: Optional[VersionedLRUCache] = None):
+    """
+    GUI のデータアクセスを返す
+
+    ・環境変数 DOCDB_SERVICE_URL が設定されている / target が http(s):// の URL
+      → DocumentServiceClient（サービス経由）
+    ・それ以外 → DocumentInfo（DB を直接開く。cache は結果キャッシュ）
+    """
+    url = os.environ.get(SERVICE_URL_ENV) or (
+        target if target.startswith(("http://", "https://")) else None
+    )
+    if url:
+        return DocumentServiceClient(url)
+    return DocumentInfo(target, cache=cache)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文書 DB の HTTP/JSON サービス")
+    parser.add_argument("db", nargs="?", default=r"C:\DataBase\document_master.db")
+    parser.add_argument("--host", default=DEFAULT_HOST, help="待受アドレス（他端末から使うなら 0.0.0.0）")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--read-workers", type=int, default=8, help="読み出しの並列数")
+    parser.add_argument("--no-pdf-scan", action="store_true", help="PDF 存在確認の走査を行わない")
+    args = parser.parse_args()
+
+    service = DocumentService(
+        args.db,
+        host=args.host,
+        port=args.port,
+        read_workers=args.read_workers,
+        scan_pdfs=not args.no_pdf_scan
+    )
+    try:
+        asyncio.run(service.serve_forever())
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
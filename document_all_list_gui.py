@@ -1,34 +1,64 @@
 import tkinter as tk
 from tkinter import ttk
 from document_info import DocumentInfo
+from doc_service import open_document_info
+from virtual_treeview import VirtualTreeview
+from pagination import KeysetBlockSource, ExpandableBlockSource, TreeItem
+from background_loader import BackgroundLoader
+from query_trace import install_hotkey
+from pdf_availability import get_availability, MISSING_TAG, MISSING_FOREGROUND
+from pdf_cache import get_pdf_cache, start_prefetch
+from pdf_preview import PreviewPane
+from sortable_headings import SortableHeadings
 import os
 import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import messagebox
 
-class DocumentAllListGUI(tk.Tk):
+class DocumentAllListView(tk.Frame):
     """
-    全ドキュメント（Edition単位）一覧
+    全ドキュメント（Edition単位）一覧（画面本体）
     ・最新版 / 修正中 / 廃棄 をコンボで抽出
+    ・「文書ごとにまとめる」で 2 階層表示
+      （親 = 各文書の最新版〔無ければ版数の最も大きい版〕1 行、
+        子 = 版の履歴。子は展開したときに取得）
     """
 
-    STATUS_MAP = {
-        "最新版": 0,
-        "修正中": 1,
-        "廃棄文書": 9,
-        "すべて": None
-    }
+    TITLE = "ドキュメント一覧"
+    STATUS_MAP = DocumentInfo.STATUS_FILTERS
+    OPEN_POLL_MS = 50       # 文書の複製完了の確認間隔
 
-    def __init__(self, db_path: str):
-        super().__init__()
-        self.title("ドキュメント一覧")
-        self.geometry("1100x650")
+    def __init__(self, master: tk.Misc, db: DocumentInfo):
+        super().__init__(master)
 
-        self.db = DocumentInfo(db_path)
+        self.db = db
+        self.pdf_status = get_availability(db)
 
         self._create_widgets()
         self._create_context_menu()
+
+        self.loader = BackgroundLoader(self, self.db.pool, self.loading_label)
+        # 2 階層表示の展開（版の履歴取得）は一覧の読み込みとは別のワーカーで
+        self.expander = BackgroundLoader(self, self.db.pool)
+        self._tree_source = None
         self._load_list()
 
+        # PDF の存在確認（バックグラウンド。結果が変わったら再描画）
+        self.pdf_status.start()
+        self.pdf_status.watch(self, self.refresh)
+
+        # 文書はローカルキャッシュ経由で開く（最新版は背景で先読み）
+        # 共有からの複製は専用のワーカーで（一覧の読み込みとは別。続けて開いた分もすべて開く）
+        self.opener = ThreadPoolExecutor(max_workers=2, thread_name_prefix="pdf-open")
+        start_prefetch(self.db, self.pdf_status)
+
+    def refresh(self):
+        """
+        再表示時の再読込（launcher のタブ切替。位置と選択は保つ）
+        """
+        self._load_list(keep_position=True)
+
     # --------------------------------------------------
     # GUI
     # --------------------------------------------------
@@ -50,18 +80,44 @@ class DocumentAllListGUI(tk.Tk):
         self.status_combo.pack(side=tk.LEFT, padx=5)
         self.status_combo.bind("<<ComboboxSelected>>", lambda e: self._load_list())
 
+        self.tree_mode = tk.BooleanVar(value=False)
+        tk.Checkbutton(
+            cond_frame, text="文書ごとにまとめる", variable=self.tree_mode,
+            command=self._on_mode_changed
+        ).pack(side=tk.LEFT, padx=(20, 5))
+
+        tk.Label(cond_frame, text="文書名").pack(side=tk.LEFT, padx=(20, 5))
+        self.entry_docname = tk.Entry(cond_frame, width=30)
+        self.entry_docname.pack(side=tk.LEFT, padx=5)
+        self.entry_docname.bind("<Return>", lambda e: self._load_list())
+
+        tk.Button(
+            cond_frame, text="検索", command=self._load_list
+        ).pack(side=tk.LEFT, padx=10)
+
+        self.loading_label = tk.Label(cond_frame, text="", fg="#666666")
+        self.loading_label.pack(side=tk.RIGHT, padx=10)
+
         # ===== 一覧 =====
-        list_frame = tk.Frame(self)
-        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # 左：一覧 / 右：選択中の版のプレビュー（境界はドラッグで調整）
+        body = tk.PanedWindow(self, orient=tk.HORIZONTAL, sashrelief=tk.RAISED)
+        body.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        list_frame = tk.Frame(body)
+        body.add(list_frame, stretch="always")
+
+        self.preview = PreviewPane(body)
+        body.add(self.preview, stretch="never")
 
         columns = ("文書番号", "文書名", "版", "発行日", "状態", "PDFパス")
 
-        self.tree = ttk.Treeview(
+        # 表示行 ＋ 先読みブロックのみ保持する仮想リスト
+        self.list_view = VirtualTreeview(
             list_frame,
             columns=columns,
-            show="headings",
             height=20
         )
+        self.tree = self.list_view.tree
 
         widths = {
             "文書番号": 180,
@@ -77,12 +133,33 @@ class DocumentAllListGUI(tk.Tk):
             self.tree.column("PDFパス", width=0, stretch=False)
 
 
-        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.list_view.pack(fill=tk.BOTH, expand=True)
+        self.list_view.on_selection_change = self._on_row_selected
+
+        # 2 階層表示の展開 / 折りたたみ（一覧表示のときは既定の動作のまま）
+        self.tree.bind("<Double-1>", lambda e: self._toggle_selected())
+        self.tree.bind("<Return>", lambda e: self._toggle_selected())
+        self.tree.bind("<Right>", lambda e: self._toggle_selected(True))
+        self.tree.bind("<Left>", lambda e: self._toggle_selected(False))
+
+        # 見出しクリックで並び替え（SQL 側で索引順に先頭ブロックから取り直す）
+        self.headings = SortableHeadings(
+            self.tree,
+            {
+                "文書番号": "document_number",
+                "文書名": "document_name",
+                "版": "edition_no",
+                "発行日": "effective_date",
+                "状態": "edition_status",
+            },
+            lambda sort: self._load_list()
+        )
 
         # 行色
         self.tree.tag_configure("latest", background="#E8F5E9")   # 薄緑
         self.tree.tag_configure("editing", background="#FFFDE7")  # 薄黄
         self.tree.tag_configure("old", background="#F5F5F5")      # 薄灰
+        self.tree.tag_configure(MISSING_TAG, foreground=MISSING_FOREGROUND)   # PDF なし
 
     def _create_context_menu(self):
         self.menu = tk.Menu(self, tearoff=0)
@@ -99,32 +176,59 @@ class DocumentAllListGUI(tk.Tk):
             self.tree.selection_set(row_id)
             self.menu.post(event.x_root, event.y_root)
 
+    def _selected_edition(self):
+        """
+        選択中の版の行（2 階層表示でも元の行）
+        """
+        index = self.list_view.selected_index
+        return None if index is None else self._row_at(index)
+
     def open_document(self):
-        selected = self.tree.selection()
-        if not selected:
+        row = self._selected_edition()
+        if row is None:
             return
 
-        values = self.tree.item(selected[0], "values")
-        pdf_path = values[5]   # PDFパス列
+        pdf_path = row[5]
 
-        if not pdf_path or not os.path.exists(pdf_path):
+        # 存在確認は背景の走査結果で（ここで共有上のファイルを stat しない）
+        if not pdf_path or self.pdf_status.is_missing(pdf_path):
             messagebox.showerror("エラー", f"ファイルが存在しません\n{pdf_path}")
             return
 
+        self._wait_open(self.opener.submit(lambda: get_pdf_cache().get(pdf_path)), pdf_path)
+
+    def _wait_open(self, future, pdf_path: str):
+        """
+        複製の完了を after() で待ってからメインスレッドで開く
+        （一覧の読み込み表示・カーソルには触れない）
+        """
+        if not future.done():
+            self.after(self.OPEN_POLL_MS, self._wait_open, future, pdf_path)
+            return
+
+        try:
+            local_path = future.result()
+        except FileNotFoundError:
+            # 結果をキャッシュへ（次の再描画で印が付く）
+            threading.Thread(target=self.pdf_status.scan, args=([pdf_path],), daemon=True).start()
+            messagebox.showerror("エラー", f"ファイルが存在しません\n{pdf_path}")
+            return
+        except Exception as e:
+            messagebox.showerror("エラー", str(e))
+            return
+
         try:
-            os.startfile(pdf_path)
+            os.startfile(local_path)
         except Exception as e:
             messagebox.showerror("エラー", str(e))
 
     def create_revision(self):
-        selected = self.tree.selection()
-        if not selected:
+        row = self._selected_edition()
+        if row is None:
             return
 
-        values = self.tree.item(selected[0], "values")
-
-        document_number = values[0]
-        edition_no = values[2]
+        document_number = row[0]
+        edition_no = row[2]
 
         answer = messagebox.askyesno(
             "修正版作成",
@@ -140,7 +244,7 @@ class DocumentAllListGUI(tk.Tk):
         # self.db.create_revision(...)
 
         messagebox.showinfo("完了", "修正版を作成しました")
-        self._load_list()
+        self._load_list(keep_position=True)
 
 
 
@@ -148,51 +252,245 @@ class DocumentAllListGUI(tk.Tk):
     # --------------------------------------------------
     # 一覧ロード
     # --------------------------------------------------
-    def _load_list(self):
-
-        self.tree.delete(*self.tree.get_children())
+    def _load_list(self, keep_position: bool = False):
+        """
+        keep_position=True（操作後の再読込）はスクロール位置と選択を保つ
+        """
 
         selected = self.status_combo.get()
         status = self.STATUS_MAP[selected]
+        keyword = self.entry_docname.get().strip()
+        sort = self.headings.sort
+        block_size = self.list_view.block_size
 
-        if status is None:
-            rows = self.db.fetch_all_editions()
-        elif status == 0:
-            rows = self.db.fetch_latest_documents()
+        if self.tree_mode.get():
+            self._load_tree(keyword, sort, keep_position)
+            return
+        self._tree_source = None
+
+        # 問い合わせはワーカースレッドで実行し、結果だけ受け取って表示
+        if keyword:
+            # 検索結果は FTS でヒットした分だけなのでそのまま保持
+            def fetch():
+                return self.db.search_documents(keyword, status, sort)
+
+            def apply(rows):
+                self.list_view.set_source(
+                    len(rows),
+                    lambda offset, limit: rows[offset:offset + limit],
+                    self._render_row,
+                    keep_position=keep_position,
+                    key=self._row_key
+                )
         else:
-            rows = self.db.fetch_editions_by_status(status)
-
-        for r in rows:
-            # fetch_latest_documents と fetch_all_editions の差を吸収
-            document_number = r[0]
-            document_name = r[1]
-            edition_no = r[2]
-            effective_date = r[3]
-            edition_status = r[4]
-            pdf_path = r[5]
-
-            status_text = self.db.status_text(edition_status)
-
-            tag = (
-                "latest" if edition_status == 0
-                else "editing" if edition_status == 1
-                else "old"
+            # 件数と先頭ブロックだけ先に取り、残りは表示範囲のブロック単位で取得
+            # （順送りのスクロールはキーセット、ジャンプ時のみ OFFSET）
+            source = KeysetBlockSource(
+                lambda limit, cursor: self.db.fetch_editions_by_status_page(status, limit, cursor, sort),
+                lambda offset, limit: self.db.fetch_editions_window(status, offset, limit, sort),
+                lambda row: self.db.page_cursor(row, sort)
             )
 
-            self.tree.insert(
-                "",
-                tk.END,
-                values=(
-                    document_number,
-                    document_name,
-                    edition_no,
-                    effective_date,
-                    status_text,
-                    pdf_path
-                ),
-                tags=(tag,)
-            )
-    
+            def fetch():
+                return self.db.count_editions(status), source(0, block_size)
+
+            def apply(result):
+                count, first_block = result
+                self.list_view.set_source(
+                    count,
+                    source,
+                    self._render_row,
+                    first_block,
+                    keep_position=keep_position,
+                    key=self._row_key
+                )
+
+        self.loader.submit(fetch, apply)
+
+    # --------------------------------------------------
+    # 文書ごとにまとめた表示（2 階層）
+    # --------------------------------------------------
+    def _on_mode_changed(self):
+        # 親は文書ごとの代表の版（状態によらない）のため、表示区分は一覧表示のときのみ
+        self.status_combo.config(state="disabled" if self.tree_mode.get() else "readonly")
+        self._load_list()
+
+    def _load_tree(self, keyword: str, sort, keep_position: bool):
+        """
+        親 = 各文書の最新版（無ければ版数の最も大きい版。1 文書 1 行）をブロック単位で取得
+        （修正中の版しか無い文書・全版が旧版 / 廃止の文書も親として出す）
+        keep_position=True（再読込）では、展開していた文書を同じ位置にあれば開き直す
+        """
+        block_size = self.list_view.block_size
+        previous = self._tree_source if keep_position else None
+        expanded = previous.expanded() if previous is not None else {}
+
+        def fetch():
+            if keyword:
+                rows = self.db.search_documents(keyword, None, sort, per_document=True)
+                source = ExpandableBlockSource(
+                    lambda offset, limit: rows[offset:offset + limit], len(rows), block_size
+                )
+            else:
+                parents = KeysetBlockSource(
+                    lambda limit, cursor: self.db.fetch_editions_by_status_page(
+                        None, limit, cursor, sort, per_document=True
+                    ),
+                    lambda offset, limit: self.db.fetch_editions_window(
+                        None, offset, limit, sort, per_document=True
+                    ),
+                    lambda row: self.db.page_cursor(row, sort)
+                )
+                count = self.db.count_editions(None, per_document=True)
+                source = ExpandableBlockSource(parents, count, block_size)
+
+            for parent_index, children in expanded.items():
+                row = source.parent(parent_index)
+                if children and row is not None and row[6] == children[0][6]:
+                    source.expand(parent_index, self.db.fetch_edition_history(row[6]))
+            source(0, block_size)     # 先頭ブロックもワーカー側で
+            return source
+
+        def apply(source):
+            self._tree_source = source
+            self._show_tree(source, keep_position)
+
+        self.loader.submit(fetch, apply)
+
+    def _show_tree(self, source, keep_position: bool = True):
+        self.list_view.set_source(
+            source.count,
+            source,
+            self._render_tree_item,
+            keep_position=keep_position,
+            key=self._tree_key
+        )
+
+    def _toggle_selected(self, expand=None):
+        """
+        選択中の親行を展開 / 折りたたむ（expand=None で切替、True / False で指定）
+        子の版の履歴はワーカーで取得してから差し込む
+        """
+        source = self._tree_source
+        index = self.list_view.selected_index
+        if source is None:
+            return None
+        if index is None:
+            return "break"
+
+        parent_index, child_pos = source.locate(index)
+        item = self.list_view.row(index)
+        if child_pos is not None or not isinstance(item, TreeItem):
+            return "break"     # 子の行 / まだ届いていない行
+
+        if source.is_expanded(parent_index):
+            if expand is not True:
+                source.collapse(parent_index)
+                self._show_tree(source)
+            return "break"
+        if expand is False:
+            return "break"
+
+        document_id = item.row[6]
+
+        def apply(children):
+            if source is self._tree_source:
+                source.expand(parent_index, children)
+                self._show_tree(source)
+
+        self.expander.submit(lambda: self.db.fetch_edition_history(document_id), apply)
+        return "break"
+
+    @staticmethod
+    def _tree_key(item):
+        return item.depth, item.row[7]     # 親（代表の版）と子の同じ版を区別
+
+    def _render_tree_item(self, item):
+        values, tags = self._render_row(item.row)
+        if item.depth == 0:
+            mark = "▼ " if item.expanded else "▶ "
+        else:
+            mark = "　　"
+        return (mark + str(values[0]),) + values[1:], tags
+
+    def _row_at(self, index: int):
+        """
+        表示の行番号 → 版の行（2 階層表示では TreeItem から取り出す）
+        """
+        item = self.list_view.row(index)
+        return item.row if isinstance(item, TreeItem) else item
+
+    # --------------------------------------------------
+    # プレビュー
+    # --------------------------------------------------
+    PREVIEW_NEIGHBOURS = (1, -1, 2, -2)     # 先読みする前後の行（近い順）
+
+    def _preview_target(self, row):
+        pdf_path = None if self.pdf_status.is_missing(row[5]) else row[5]
+        return row[7], pdf_path
+
+    def _on_row_selected(self, index: int):
+        row = self._row_at(index)
+        if row is None:
+            self.preview.clear()
+            return
+
+        neighbours = []
+        for delta in self.PREVIEW_NEIGHBOURS:
+            neighbour = self._row_at(index + delta)
+            if neighbour is not None:
+                neighbours.append(self._preview_target(neighbour))
+        self.preview.show(*self._preview_target(row), neighbours)
+
+    @staticmethod
+    def _row_key(r):
+        return r[7]  # edition_id
+
+    def _render_row(self, r):
+        document_number = r[0]
+        document_name = r[1]
+        edition_no = r[2]
+        effective_date = r[3]
+        edition_status = r[4]
+        pdf_path = r[5]
+
+        status_text = self.db.status_text(edition_status)
+
+        tag = (
+            "latest" if edition_status == 0
+            else "editing" if edition_status == 1
+            else "old"
+        )
+
+        values = (
+            document_number,
+            document_name,
+            edition_no,
+            effective_date,
+            status_text,
+            pdf_path
+        )
+        return values, self.pdf_status.row_tags(pdf_path, tag)
+
+
+class DocumentAllListGUI(tk.Tk):
+    """
+    全ドキュメント一覧 GUI（単独ウィンドウ）
+    """
+
+    STATUS_MAP = DocumentAllListView.STATUS_MAP
+
+    def __init__(self, db_path: str):
+        super().__init__()
+        self.title(DocumentAllListView.TITLE)
+        self.geometry("1100x650")
+
+        self.db = open_document_info(db_path)     # URL / DOCDB_SERVICE_URL ならサービス経由
+
+        self.view = DocumentAllListView(self, self.db)
+        self.view.pack(fill=tk.BOTH, expand=True)
+        install_hotkey(self)      # F12：問い合わせ計測の開始 / 集計出力
+
 
 if __name__ == "__main__":
     app = DocumentAllListGUI(r"C:\DataBase\document_master.db")
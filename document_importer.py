@@ -0,0 +1,436 @@
+import argparse
+import csv
+import json
+import os
+import re
+import time
+from datetime import date
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from db_pool import get_pool
+from db_migrations import migrate, analyze, require_schema, SchemaOutdatedError
+from document_info import DocumentInfo
+
+
+# PDF ファイル名の既定規約：<文書番号>_<版番号>[_<文書名>].pdf
+#   例）QM-001_3_品質マニュアル.pdf
+DEFAULT_FILENAME_PATTERN = r"^(?P<number>[^_]+)_(?P<edition>\d+)(?:_(?P<name>.+))?\.pdf$"
+
+# 取込みの 1 行（正規化済み）
+#   (document_number, document_name, edition_no, edition_code,
+#    effective_date, pdf_path, edition_status)
+ImportRow = Tuple[str, Optional[str], int, Optional[str], Optional[str], Optional[str], Optional[int]]
+
+
+STAGE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS import_stage (
+    document_number TEXT NOT NULL,
+    document_name   TEXT,
+    edition_no      INTEGER NOT NULL,
+    edition_code    TEXT,
+    effective_date  TEXT,
+    pdf_path        TEXT,
+    edition_status  INTEGER,
+    document_id     INTEGER
+)
+"""
+
+
+# ------------------------------------------------------------------
+# 取込み元（(行番号, dict) を 1 件ずつ返す）
+# ------------------------------------------------------------------
+def iter_csv(path: str, encoding: str = "utf-8-sig") -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    CSV（1 行目は列名）
+    """
+    with open(path, newline="", encoding=encoding) as f:
+        for line_no, record in enumerate(csv.DictReader(f), start=2):
+            yield line_no, record
+
+
+def iter_jsonl(path: str, encoding: str = "utf-8") -> Iterator[Tuple[int, Dict[str, Any]]]:
+    """
+    JSON Lines（1 行 1 オブジェクト、空行は無視）
+
+    ・JSON として読めない行 / オブジェクトでない行は error 付きで返す（エラーとして報告）
+    """
+    with open(path, encoding=encoding) as f:
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, {"error": f"JSON として読めません: {e.msg}（{e.colno} 文字目）"}
+                continue
+            if not isinstance(record, dict):
+                yield line_no, {"error": f"JSON オブジェクトではありません: {type(record).__name__}"}
+                continue
+            yield line_no, record
+
+
+def iter_pdf_dir(
+    root: str,
+    pattern: str = DEFAULT_FILENAME_PATTERN
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    フォルダ配下の PDF をたどり、ファイル名から文書番号・版番号を取り出す
+
+    ・規約に合わないファイル / 更新日を読めないファイルは error 付きで返す（エラーとして報告）
+    ・発行日はファイルの更新日
+    """
+    regex = re.compile(pattern, re.IGNORECASE)
+    for dirpath, _, filenames in os.walk(root):
+        for filename in sorted(filenames):
+            if not filename.lower().endswith(".pdf"):
+                continue
+            path = os.path.join(dirpath, filename)
+            m = regex.match(filename)
+            if m is None:
+                yield path, {"error": "ファイル名が規約に合いません"}
+                continue
+
+            try:
+                mtime = os.stat(path).st_mtime
+            except OSError as e:
+                yield path, {"error": f"ファイルを読めません: {e.strerror or e}"}
+                continue
+
+            groups = m.groupdict()
+            yield path, {
+                "document_number": groups["number"],
+                "document_name": groups.get("name") or groups["number"],
+                "edition_no": groups["edition"],
+                "effective_date": date.fromtimestamp(mtime).isoformat(),
+                "pdf_path": os.path.abspath(path),
+            }
+
+
+def _text(value: Any) -> Optional[str]:
+    if value is None:
+        return None
+    value = str(value).strip()
+    return value or None
+
+
+def normalize(record: Dict[str, Any]) -> ImportRow:
+    """
+    取込み元の 1 件を ImportRow に変換（不正なら ValueError）
+
+    必須：document_number / edition_no
+    省略時：document_name = 既存の文書名（新規なら document_number）
+            edition_status = 自動判定
+    """
+    if "error" in record:
+        raise ValueError(record["error"])
+
+    number = _text(record.get("document_number"))
+    if number is None:
+        raise ValueError("document_number がありません")
+
+    edition_no = _text(record.get("edition_no"))
+    if edition_no is None or not edition_no.lstrip("-").isdigit():
+        raise ValueError(f"edition_no が不正です: {record.get('edition_no')!r}")
+
+    status = _text(record.get("edition_status"))
+    if status is not None:
+        if status not in {str(DocumentInfo.LATEST), str(DocumentInfo.DRAFT), str(DocumentInfo.ARCHIVED)}:
+            raise ValueError(f"edition_status が不正です: {status!r}")
+        status = int(status)
+
+    return (
+        number,
+        _text(record.get("document_name")),
+        int(edition_no),
+        _text(record.get("edition_code")),
+        _text(record.get("effective_date")),
+        _text(record.get("pdf_path")),
+        status,
+    )
+
+
+# ------------------------------------------------------------------
+# 取込み結果
+# ------------------------------------------------------------------
+class ImportReport:
+    """
+    取込み件数とエラーの一覧（dry_run でも同じ内容を返す）
+    """
+
+    MAX_ERRORS = 100
+
+    def __init__(self, dry_run: bool):
+        self.dry_run = dry_run
+        self.rows = 0
+        self.invalid = 0
+        self.documents_inserted = 0
+        self.documents_updated = 0
+        self.editions_inserted = 0
+        self.editions_updated = 0
+        self.batches = 0
+        self.elapsed = 0.0
+        self.errors: List[Tuple[Any, str]] = []
+
+    def add_error(self, where: Any, message: str):
+        self.invalid += 1
+        if len(self.errors) < self.MAX_ERRORS:
+            self.errors.append((where, message))
+
+    def summary(self) -> str:
+        lines = [
+            f"{'[確認のみ] ' if self.dry_run else ''}"
+            f"{self.rows} 行（不正 {self.invalid} 行）/ {self.batches} バッチ / {self.elapsed:.1f} 秒",
+            f"  文書 : 追加 {self.documents_inserted} / 更新 {self.documents_updated}",
+            f"  版   : 追加 {self.editions_inserted} / 更新 {self.editions_updated}",
+        ]
+        for where, message in self.errors:
+            lines.append(f"  [エラー] {where}: {message}")
+        if self.invalid > len(self.errors):
+            lines.append(f"  …ほか {self.invalid - len(self.errors)} 件")
+        return "\n".join(lines)
+
+
+# ------------------------------------------------------------------
+# 取込み
+# ------------------------------------------------------------------
+class DocumentImporter:
+    """
+    文書 / 版の一括取込み（upsert）
+
+    ・文書は document_number、版は (文書, edition_no) で突き合わせ、
+      既存なら更新（空欄の項目は既存値を残す）、無ければ追加
+    ・batch_size 行ごとに一時テーブルへ executemany し、
+      集合演算の UPDATE / INSERT 数文で反映して 1 コミット
+    ・derive_status=True のとき、取り込んだ文書は
+      修正中以外の版のうち版番号最大を最新版、残りを旧版にそろえる
+    ・dry_run=True のときは全件を 1 トランザクションで反映して件数を数え、
+      最後にロールバックする（スキーマの移行もしない。古ければエラーとして報告）
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 5000, derive_status: bool = True):
+        self.pool = get_pool(db_path)
+        self.batch_size = batch_size
+        self.derive_status = derive_status
+
+    def run(
+        self,
+        records: Iterable[Tuple[Any, Dict[str, Any]]],
+        dry_run: bool = False,
+        progress=None
+    ) -> ImportReport:
+        """
+        Args:
+            records: (行番号やパスなどの位置, dict) の並び（iter_csv などの戻り値）
+            progress: progress(処理済み行数) をバッチごとに呼ぶ
+        """
+        report = ImportReport(dry_run)
+        started = time.perf_counter()
+
+        with self.pool.connection() as conn:
+            # 確認のみでは DB を書き換えない（スキーマが古ければ報告して終わる）
+            if dry_run:
+                try:
+                    require_schema(conn)
+                except SchemaOutdatedError as e:
+                    report.add_error("スキーマ", str(e))
+                    report.elapsed = time.perf_counter() - started
+                    return report
+            else:
+                migrate(conn)
+            conn.execute(STAGE_DDL)
+            conn.commit()
+
+            batch: Dict[Tuple[str, int], ImportRow] = {}
+            try:
+                if dry_run:
+                    conn.execute("BEGIN IMMEDIATE")
+
+                for where, record in records:
+                    report.rows += 1
+                    try:
+                        row = normalize(record)
+                    except ValueError as e:
+                        report.add_error(where, str(e))
+                        continue
+
+                    # 同じバッチ内の重複は後勝ち
+                    batch[(row[0], row[2])] = row
+                    if len(batch) >= self.batch_size:
+                        self._apply(conn, list(batch.values()), report, commit=not dry_run)
+                        batch.clear()
+                        if progress is not None:
+                            progress(report.rows)
+
+                if batch:
+                    self._apply(conn, list(batch.values()), report, commit=not dry_run)
+                    if progress is not None:
+                        progress(report.rows)
+
+                if dry_run:
+                    conn.rollback()
+            finally:
+                conn.execute("DROP TABLE IF EXISTS temp.import_stage")
+
+            if not dry_run and report.documents_inserted + report.editions_inserted:
+                analyze(conn)
+
+        report.elapsed = time.perf_counter() - started
+        return report
+
+    def _apply(self, conn, rows: List[ImportRow], report: ImportReport, commit: bool):
+        """
+        1 バッチ分を反映
+        """
+        # 同じ文書番号の文書名はバッチ内の最後に指定された値にそろえる
+        names = {row[0]: row[1] for row in rows if row[1] is not None}
+        rows = [(row[0], names.get(row[0])) + row[2:] for row in rows]
+
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+
+        conn.execute("DELETE FROM temp.import_stage")
+        conn.executemany(
+            """
+            INSERT INTO temp.import_stage
+            (document_number, document_name, edition_no, edition_code,
+             effective_date, pdf_path, edition_status)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+            """,
+            rows
+        )
+
+        # ---------- 文書 ----------
+        report.documents_updated += conn.execute(
+            """
+            UPDATE document_master
+            SET document_name = s.document_name
+            FROM (
+                SELECT DISTINCT document_number, document_name FROM temp.import_stage
+                WHERE document_name IS NOT NULL
+            ) AS s
+            WHERE document_master.document_number = s.document_number
+              AND document_master.document_name IS NOT s.document_name
+            """
+        ).rowcount
+
+        report.documents_inserted += conn.execute(
+            """
+            INSERT INTO document_master (document_number, document_name)
+            SELECT DISTINCT s.document_number, COALESCE(s.document_name, s.document_number)
+            FROM temp.import_stage AS s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM document_master d
+                WHERE d.document_number = s.document_number
+            )
+            """
+        ).rowcount
+
+        conn.execute(
+            """
+            UPDATE temp.import_stage
+            SET document_id = (
+                SELECT MIN(d.document_id) FROM document_master d
+                WHERE d.document_number = temp.import_stage.document_number
+            )
+            """
+        )
+
+        # ---------- 版 ----------
+        report.editions_updated += conn.execute(
+            """
+            UPDATE Document_Edition_Master AS e
+            SET edition_code   = COALESCE(s.edition_code, e.edition_code),
+                effective_date = COALESCE(s.effective_date, e.effective_date),
+                pdf_path       = COALESCE(s.pdf_path, e.pdf_path),
+                edition_status = COALESCE(s.edition_status, e.edition_status)
+            FROM temp.import_stage AS s
+            WHERE e.document_id = s.document_id
+              AND e.edition_no = s.edition_no
+              AND (   (s.edition_code IS NOT NULL AND s.edition_code IS NOT e.edition_code)
+                   OR (s.effective_date IS NOT NULL AND s.effective_date IS NOT e.effective_date)
+                   OR (s.pdf_path IS NOT NULL AND s.pdf_path IS NOT e.pdf_path)
+                   OR (s.edition_status IS NOT NULL AND s.edition_status IS NOT e.edition_status))
+            """
+        ).rowcount
+
+        report.editions_inserted += conn.execute(
+            """
+            INSERT INTO Document_Edition_Master
+            (document_id, edition_no, edition_code, effective_date, edition_status, pdf_path)
+            SELECT s.document_id, s.edition_no, s.edition_code, s.effective_date,
+                   COALESCE(s.edition_status, ?), s.pdf_path
+            FROM temp.import_stage AS s
+            WHERE NOT EXISTS (
+                SELECT 1 FROM Document_Edition_Master e
+                WHERE e.document_id = s.document_id
+                  AND e.edition_no = s.edition_no
+            )
+            """,
+            (DocumentInfo.ARCHIVED,)
+        ).rowcount
+
+        # ---------- 最新版の判定 ----------
+        if self.derive_status:
+            conn.execute(
+                """
+                UPDATE Document_Edition_Master AS e
+                SET edition_status = CASE WHEN e.edition_no = m.latest_no THEN ? ELSE ? END
+                FROM (
+                    SELECT x.document_id, MAX(x.edition_no) AS latest_no
+                    FROM Document_Edition_Master x
+                    WHERE x.document_id IN (SELECT document_id FROM temp.import_stage)
+                      AND x.edition_status != ?
+                    GROUP BY x.document_id
+                ) AS m
+                WHERE e.document_id = m.document_id
+                  AND e.edition_status != ?
+                  AND e.edition_status != CASE WHEN e.edition_no = m.latest_no THEN ? ELSE ? END
+                """,
+                (
+                    DocumentInfo.LATEST, DocumentInfo.ARCHIVED,
+                    DocumentInfo.DRAFT,
+                    DocumentInfo.DRAFT,
+                    DocumentInfo.LATEST, DocumentInfo.ARCHIVED,
+                )
+            )
+
+        report.batches += 1
+        if commit:
+            conn.commit()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文書 / 版の一括取込み")
+    parser.add_argument("db_path", nargs="?", default=r"C:\DataBase\document_master.db")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--csv", help="CSV マニフェスト")
+    source.add_argument("--jsonl", help="JSON Lines マニフェスト")
+    source.add_argument("--pdf-dir", help="PDF フォルダ（ファイル名から文書番号・版番号を取得）")
+    parser.add_argument("--pattern", default=DEFAULT_FILENAME_PATTERN,
+                        help="PDF ファイル名の正規表現（number / edition / name グループ）")
+    parser.add_argument("--encoding", default=None, help="マニフェストの文字コード")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--keep-status", action="store_true",
+                        help="最新版 / 旧版を自動判定しない")
+    parser.add_argument("--dry-run", action="store_true", help="反映せず件数だけ確認する")
+    args = parser.parse_args()
+
+    if args.csv:
+        records = iter_csv(args.csv, args.encoding or "utf-8-sig")
+    elif args.jsonl:
+        records = iter_jsonl(args.jsonl, args.encoding or "utf-8")
+    else:
+        records = iter_pdf_dir(args.pdf_dir, args.pattern)
+
+    importer = DocumentImporter(
+        args.db_path, batch_size=args.batch_size, derive_status=not args.keep_status
+    )
+    report = importer.run(
+        records, dry_run=args.dry_run, progress=lambda n: print(f"{n} 行")
+    )
+    print(report.summary())
+
+
+if __name__ == "__main__":
+    main()
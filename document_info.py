@@ -1,6 +1,40 @@
-import sqlite3
+import json
 from contextlib import contextmanager
-from typing import List, Tuple, Dict, Any
+from typing import List, Tuple, Dict, Any, Iterable, Iterator, Optional, Sequence, Union
+
+from db_pool import get_pool
+from query_cache import VersionedLRUCache, MISSING
+from pagination import encode_cursor
+from document_query import DocumentQuery, EditionFilter, DEFAULT_SORT, EDITION_COLUMNS
+from document_search import (
+    match_phrase,
+    like_pattern,
+    TRIGRAM_MIN_LENGTH,
+)
+
+# 状態の指定：1 つ（int）/ 複数（tuple）/ None = すべて
+StatusSpec = Union[None, int, Tuple[int, ...]]
+
+# 並び順：EditionFilter の sort（document_query.column_sort の戻り値）/ None = 既定順
+SortSpec = Optional[Sequence[str]]
+
+
+def _status_key(edition_status: StatusSpec) -> Optional[Tuple[int, ...]]:
+    """
+    キャッシュのキー用（list などで渡されても hash できる形に。EditionFilter と同じ正規化）
+    """
+    if edition_status is None:
+        return None
+    if isinstance(edition_status, int):
+        return (edition_status,)
+    return tuple(sorted(set(edition_status)))
+
+
+def _sort_key(sort: SortSpec) -> Tuple[str, ...]:
+    """
+    キャッシュのキー用（既定順は明示した DEFAULT_SORT と同じキーにする）
+    """
+    return tuple(sort or DEFAULT_SORT)
 
 
 class DocumentInfo:
@@ -20,23 +54,74 @@ class DocumentInfo:
     DRAFT = 1
     ARCHIVED = 9
 
-    def __init__(self, db_path: str):
+    # 一覧の絞り込み（画面のコンボ / エクスポートの --status で共通）
+    STATUS_FILTERS = {
+        "最新版": LATEST,
+        "修正中": DRAFT,
+        "最新版＋修正中": (LATEST, DRAFT),
+        "廃棄文書": ARCHIVED,
+        "すべて": None
+    }
+
+    # 一覧取得系の列名（行は document_query.EditionRow）
+    EDITION_COLUMNS = EDITION_COLUMNS
+
+    # キャッシュする一覧の上限行数（これを超える結果は毎回 DB から）
+    LIST_CACHE_LIMIT = 50000
+
+    def __init__(self, db_path: str, cache: Optional[VersionedLRUCache] = None):
+        """
+        cache を渡すと一覧取得の結果をキャッシュする（DB 更新時のみ無効化。
+        他端末の更新は最大 cache.check_interval 秒遅れて反映）
+        複数画面で 1 つの DocumentInfo を共有すれば同じ問い合わせは 1 回で済む
+        """
         self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.query = DocumentQuery(self.pool)
+        self.cache = cache
 
     # ------------------------------------------------------------------
-    # DB 接続（共通）
+    # DB 接続（共通：プール接続 / commit・rollback はプール側）
     # ------------------------------------------------------------------
     @contextmanager
     def _connect(self):
-        conn = sqlite3.connect(self.db_path)
-        try:
+        with self.pool.connection() as conn:
             yield conn
-            conn.commit()
-        except Exception:
-            conn.rollback()
-            raise
-        finally:
-            conn.close()    
+
+    # ------------------------------------------------------------------
+    # 結果キャッシュ（cache 指定時のみ）
+    # ------------------------------------------------------------------
+    def _validate_cache(self):
+        """
+        DB が更新されていればキャッシュを捨てる（data_version / 自プロセスの書込み）
+
+        ・自プロセスの書込みは即時に反映
+        ・他端末のコミットは接続ごとに check_interval 秒（既定 0.5 秒）に 1 回の確認のため、
+          その間はキャッシュの値を返しうる
+        """
+        conn = self.pool.probe()
+        generation = self.pool.write_generation
+        if self.cache.needs_check(id(conn), generation):
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            self.cache.validate(id(conn), data_version, generation)
+
+    def _cached_rows(self, key: Tuple, load) -> List[Tuple]:
+        """
+        一覧（list）をキャッシュ経由で取得。LIST_CACHE_LIMIT 行以下のみ保持
+        """
+        if self.cache is None:
+            return load()
+        self._validate_cache()
+        rows = self.cache.get(key)
+        if rows is not MISSING:
+            return list(rows)
+        rows = load()
+        if len(rows) <= self.LIST_CACHE_LIMIT:
+            self.cache.put(key, tuple(rows))
+        return rows
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats() if self.cache is not None else {}
 
     # -------------------------------
     # ステータス → 表示文字列
@@ -55,72 +140,317 @@ class DocumentInfo:
     # 全 Edition 一覧
     # ------------------------------------------------------------------
     def fetch_all_editions(self) -> List[Tuple]:
-        sql = """
-        SELECT
-            d.document_number,
-            d.document_name,
-            e.edition_no,
-            e.effective_date,
-            e.edition_status,
-            e.pdf_path
-        FROM Document_Edition_Master AS e
-        JOIN document_master AS d
-            ON e.document_id = d.document_id
-        ORDER BY d.document_number, e.edition_no
         """
-        with self._connect() as conn:
-            return conn.execute(sql).fetchall()
+        全 Edition を取得
+
+        列順：document_number, document_name, edition_no, effective_date,
+              edition_status, pdf_path, document_id, edition_id
+        （以下の一覧取得系も同じ列順の EditionRow。問い合わせは DocumentQuery に一本化）
+        """
+        return self.fetch_editions_by_status(None)
+
+    def iter_all_editions(self, arraysize: int = 1000) -> Iterator[Tuple]:
+        """
+        fetch_all_editions の逐次版（以下 iter_* はいずれも fetchmany(arraysize) 単位）
+        """
+        return self.iter_editions(None, arraysize)
 
     # ------------------------------------------------------------------
     # 最新版ドキュメント一覧（JOIN / 保証版）
     # ------------------------------------------------------------------
-    def fetch_latest_documents(self) -> List[Tuple]:
+    def fetch_latest_documents(self, sort: SortSpec = None) -> List[Tuple]:
         """
         最新版（edition_status = 0）のみ取得
+
+        sort: 並び順（None で文書番号・版数順）
         """
-        sql = """
-            SELECT
-                d.document_number,
-                d.document_name,
-                e.edition_no,
-                e.effective_date,
-                e.edition_status,
-                e.pdf_path
-            FROM Document_Edition_Master AS e
-            JOIN document_master AS d
-                ON e.document_id = d.document_id
-            WHERE e.edition_status = ?
-            ORDER BY d.document_number, e.edition_no
-        """
-        with self._connect() as conn:
-            return conn.execute(sql, (self.LATEST,)).fetchall()
+        return self.fetch_editions_by_status(self.LATEST, sort)
+
+    def iter_latest_documents(self, arraysize: int = 1000) -> Iterator[Tuple]:
+        return self.iter_editions(self.LATEST, arraysize)
 
     # ------------------------------------------------------------------
     # Edition 状態別一覧（修正中・旧版など）
     # ------------------------------------------------------------------
-    def fetch_editions_by_status(self, edition_status: int) -> List[Tuple]:
-        sql = """
+    def fetch_editions_by_status(self, edition_status: StatusSpec, sort: SortSpec = None) -> List[Tuple]:
+        return self._cached_rows(
+            ("editions", _status_key(edition_status), _sort_key(sort)),
+            lambda: list(self.iter_editions(edition_status, sort=sort))
+        )
+
+    def iter_editions_by_status(self, edition_status: StatusSpec, arraysize: int = 1000) -> Iterator[Tuple]:
+        return self.iter_editions(edition_status, arraysize)
+
+    # ------------------------------------------------------------------
+    # 逐次取得（エクスポートなど件数の多い読み出し用）
+    # ------------------------------------------------------------------
+    def iter_editions(
+        self,
+        edition_status: StatusSpec = None,
+        arraysize: int = 1000,
+        sort: SortSpec = None
+    ) -> Iterator[Tuple]:
+        """
+        Edition を fetchmany(arraysize) 単位で 1 行ずつ返す（全件をメモリに載せない）
+
+        edition_status=None で全件。列順は fetch_all_editions と同じ
+        途中で止めた場合もカーソルは閉じ、接続はプールへ戻る
+        """
+        return self.query.iter(EditionFilter(statuses=edition_status, sort=sort), arraysize)
+
+    # ------------------------------------------------------------------
+    # 仮想リスト用：件数 / 範囲取得
+    # ------------------------------------------------------------------
+    def count_editions(self, edition_status: StatusSpec = None, per_document: bool = False) -> int:
+        """
+        Edition 件数（edition_status=None で全件）
+
+        per_document=True は文書ごとの代表の版（EditionFilter.per_document）の件数
+        """
+        spec = EditionFilter(statuses=edition_status, per_document=per_document)
+        if self.cache is None:
+            return self.query.count(spec)
+        self._validate_cache()
+        key = ("count", _status_key(edition_status), per_document)
+        count = self.cache.get(key)
+        if count is MISSING:
+            count = self.query.count(spec)
+            self.cache.put(key, count)
+        return count
+
+    def fetch_editions_window(
+        self,
+        edition_status: StatusSpec,
+        offset: int,
+        limit: int,
+        sort: SortSpec = None,
+        per_document: bool = False
+    ) -> List[Tuple]:
+        """
+        表示範囲分の Edition のみ取得（仮想リスト用）
+
+        fetch_all_editions と同じ列順
+        """
+        return self._cached_rows(
+            ("window", _status_key(edition_status), _sort_key(sort), offset, limit, per_document),
+            lambda: self.query.fetch(
+                EditionFilter(
+                    statuses=edition_status,
+                    per_document=per_document,
+                    sort=sort,
+                    limit=limit,
+                    offset=offset
+                )
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # キーセット・ページング
+    # ・カーソル = 直前ページ最終行の並びキー
+    #   （既定順なら (document_number, edition_no, edition_id)）
+    # ・OFFSET を使わないため、深いページも先頭ページと同コスト
+    # ・列見出しの並び替え（sort）も索引順に読むため、並べ替え直しは 1 ページ分の取得で済む
+    # ------------------------------------------------------------------
+    def fetch_all_editions_page(
+        self,
+        page_size: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        return self._fetch_editions_page(None, page_size, cursor)
+
+    def fetch_latest_documents_page(
+        self,
+        page_size: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        return self._fetch_editions_page(self.LATEST, page_size, cursor)
+
+    def fetch_editions_by_status_page(
+        self,
+        edition_status: StatusSpec,
+        page_size: int,
+        cursor: Optional[str] = None,
+        sort: SortSpec = None,
+        per_document: bool = False
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        return self._fetch_editions_page(edition_status, page_size, cursor, sort, per_document)
+
+    @staticmethod
+    def page_cursor(row: Tuple, sort: SortSpec = None) -> str:
+        """
+        ページ行（fetch_editions_window と同じ列順）→ その行の直後を指すカーソル
+
+        sort はページ取得時と同じ指定にすること
+        """
+        return encode_cursor(EditionFilter(sort=sort).sort_values(row))
+
+    def _fetch_editions_page(
+        self,
+        edition_status: StatusSpec,
+        page_size: int,
+        cursor: Optional[str],
+        sort: SortSpec = None,
+        per_document: bool = False
+    ) -> Tuple[List[Tuple], Optional[str]]:
+        """
+        Returns:
+            (rows, next_cursor)
+            rows は fetch_editions_window と同じ列順
+            next_cursor は最終ページで None
+        """
+        spec = EditionFilter(statuses=edition_status, per_document=per_document, sort=sort)
+        if self.cache is None:
+            return self.query.page(spec, page_size, cursor)
+        self._validate_cache()
+        key = ("page", _status_key(edition_status), _sort_key(sort), page_size, cursor, per_document)
+        page = self.cache.get(key)
+        if page is MISSING:
+            rows, next_cursor = self.query.page(spec, page_size, cursor)
+            page = (tuple(rows), next_cursor)
+            self.cache.put(key, page)
+        return list(page[0]), page[1]
+
+    # ------------------------------------------------------------------
+    # スキーマ（検索インデックス等）
+    # ・移行は ensure_schema（db_mastertable_create / サービス起動時）のみ
+    # ・読み出し側は require_schema で版を確かめるだけ（古ければ SchemaOutdatedError）
+    # ------------------------------------------------------------------
+    def ensure_schema(self):
+        self.query.ensure_schema()
+
+    def require_schema(self, version: int):
+        self.query.require_schema(version)
+
+    # ------------------------------------------------------------------
+    # 文書名 / 文書番号検索（FTS5 trigram）
+    # ------------------------------------------------------------------
+
+    def search_documents(
+        self,
+        keyword: str,
+        edition_status: StatusSpec = None,
+        sort: SortSpec = None,
+        per_document: bool = False
+    ) -> List[Tuple]:
+        """
+        文書名 / 文書番号の部分一致検索（SQL 側で絞り込み・順位付け）
+
+        ・3 文字以上 : FTS5 MATCH（bm25 順）
+        ・3 文字未満 : trigram で MATCH できないため LIKE
+        ・sort 指定時は順位ではなくその並び順
+        ・per_document=True は文書ごとの代表の版のみ（EditionFilter.per_document）
+
+        Returns:
+            fetch_editions_window と同じ列順の list
+        """
+        return self._cached_rows(
+            ("search", keyword.strip(), _status_key(edition_status), _sort_key(sort), per_document),
+            lambda: self.query.fetch(
+                EditionFilter(
+                    statuses=edition_status,
+                    keyword=keyword,
+                    per_document=per_document,
+                    sort=sort or ("rank",) + DEFAULT_SORT
+                )
+            )
+        )
+
+    # ------------------------------------------------------------------
+    # PDF 本文検索（pdf_text_indexer.py で索引済みの Edition が対象）
+    # ------------------------------------------------------------------
+    def search_pdf_text(
+        self,
+        keyword: str,
+        edition_status: Optional[int] = None,
+        limit: int = 200
+    ) -> List[Tuple]:
+        """
+        PDF 本文に keyword を含む Edition を検索
+
+        Returns:
+            fetch_editions_window と同じ列順 ＋ snippet（該当箇所の抜粋）
+        """
+        keyword = keyword.strip()
+        if not keyword:
+            return []
+
+        select = """
         SELECT
             d.document_number,
             d.document_name,
             e.edition_no,
             e.effective_date,
             e.edition_status,
-            e.pdf_path
-        FROM Document_Edition_Master AS e
-        JOIN Document_Master AS d
-            ON e.document_id = d.document_id
-        WHERE e.edition_status = ?
-        ORDER BY d.document_number, e.edition_no
+            e.pdf_path,
+            d.document_id,
+            e.edition_id,
+            {snippet}
+        FROM edition_pdf_text AS t
+        JOIN Document_Edition_Master AS e
+            ON e.edition_id = t.rowid
+        JOIN document_master AS d
+            ON d.document_id = e.document_id
         """
+        params: List[Any] = []
+
+        if len(keyword) >= TRIGRAM_MIN_LENGTH:
+            sql = select.format(
+                snippet="snippet(edition_pdf_text, 0, '【', '】', '…', 24)"
+            )
+            sql += " WHERE edition_pdf_text MATCH ?"
+            params.append(match_phrase(keyword))
+            order = "t.rank, d.document_number, e.edition_no"
+        else:
+            # 3 文字未満は MATCH 不可：LIKE で走査し、抜粋は instr で切り出す
+            sql = select.format(
+                snippet="'…' || substr(t.body, max(1, instr(t.body, ?) - 24), 60) || '…'"
+            )
+            params.append(keyword)
+            sql += " WHERE t.body LIKE ? ESCAPE '\\'"
+            params.append(like_pattern(keyword))
+            order = "d.document_number, e.edition_no"
+
+        if edition_status is not None:
+            sql += " AND e.edition_status = ?"
+            params.append(edition_status)
+
+        sql += f" ORDER BY {order} LIMIT ?"
+        params.append(limit)
+
+        self.require_schema(4)      # PDF 本文検索（FTS5）
         with self._connect() as conn:
-            return conn.execute(sql, (edition_status,)).fetchall()
-        
+            return conn.execute(sql, params).fetchall()
+
     # ------------------------------------------------------------------
     # 文書単位：Edition 履歴取得
     # ------------------------------------------------------------------
-    def fetch_editions_by_document(self, edition_status: int) -> List[Tuple]:
-        return self.fetch_editions_by_status(edition_status)
+    def fetch_edition_history(
+        self,
+        document_id: int,
+        edition_status: StatusSpec = None
+    ) -> List[Tuple]:
+        """
+        1 文書の全版（版数順。idx_edition_document の順にそのまま読む）
+
+        edition_status で状態を絞れる（None で全版）
+        列順は fetch_all_editions と同じ
+        """
+        return self._cached_rows(
+            ("history", document_id, _status_key(edition_status)),
+            lambda: self.query.fetch(
+                EditionFilter(
+                    statuses=edition_status,
+                    document_id=document_id,
+                    sort=("edition_no",)
+                )
+            )
+        )
+
+    def fetch_editions_by_document(self, document_id: int) -> List[Tuple]:
+        """
+        fetch_edition_history と同じ（旧名）
+        """
+        return self.fetch_edition_history(document_id)
 
     # ------------------------------------------------------------------
     # 最新版切替（承認処理）
@@ -131,28 +461,106 @@ class DocumentInfo:
         ・現在の最新版 → ARCHIVED
         ・指定 edition → LATEST
         """
+        self.approve_editions([(document_id, edition_id)])
+
+    def approve_editions(self, pairs: Iterable[Tuple[int, int]]) -> int:
+        """
+        複数の版をまとめて最新版に昇格（1 トランザクション / 1 コミット）
+
+        Args:
+            pairs: [(document_id, edition_id), ...]
+
+        ・BEGIN IMMEDIATE で書込みロックを先に取得
+        ・旧最新版の ARCHIVED 化 / 指定版の LATEST 化は集合演算の UPDATE 各 1 文
+        ・次の場合は ValueError でロールバック（1 件も反映しない）
+            - 同じ文書が 2 回以上指定されている
+            - edition_id が存在しない / 指定 document_id の版ではない
+            - 反映後に最新版が 1 件でない文書がある
+
+        Returns:
+            昇格した版の数
+        """
+        pairs = list(dict.fromkeys((int(d), int(e)) for d, e in pairs))
+        if not pairs:
+            return 0
+
+        seen = set()
+        duplicated = sorted({d for d, _ in pairs if d in seen or seen.add(d)})
+        if duplicated:
+            raise ValueError(f"同じ文書の版が複数指定されています（document_id={duplicated}）")
+
+        targets = json.dumps(pairs)
+
         with self._connect() as conn:
-            # 現在の最新版を旧版へ
+            if not conn.in_transaction:
+                conn.execute("BEGIN IMMEDIATE")
+
+            # ---------- 指定の検証 ----------
+            mismatched = conn.execute(
+                """
+                SELECT json_extract(t.value, '$[0]'), json_extract(t.value, '$[1]')
+                FROM json_each(?) AS t
+                WHERE NOT EXISTS (
+                    SELECT 1
+                    FROM Document_Edition_Master e
+                    WHERE e.edition_id = json_extract(t.value, '$[1]')
+                      AND e.document_id = json_extract(t.value, '$[0]')
+                )
+                """,
+                (targets,)
+            ).fetchall()
+            if mismatched:
+                raise ValueError(f"文書と版の組合せが不正です: {mismatched}")
+
+            # ---------- 現在の最新版を旧版へ ----------
             conn.execute(
                 """
                 UPDATE Document_Edition_Master
                 SET edition_status = ?
-                WHERE document_id = ?
-                  AND edition_status = ?
+                WHERE edition_status = ?
+                  AND document_id IN (
+                      SELECT json_extract(value, '$[0]') FROM json_each(?)
+                  )
+                  AND edition_id NOT IN (
+                      SELECT json_extract(value, '$[1]') FROM json_each(?)
+                  )
                 """,
-                (self.ARCHIVED, document_id, self.LATEST)
+                (self.ARCHIVED, self.LATEST, targets, targets)
             )
 
-            # 指定版を最新版へ
+            # ---------- 指定版を最新版へ ----------
             conn.execute(
                 """
                 UPDATE Document_Edition_Master
                 SET edition_status = ?
-                WHERE edition_id = ?
+                WHERE edition_id IN (
+                    SELECT json_extract(value, '$[1]') FROM json_each(?)
+                )
                 """,
-                (self.LATEST, edition_id)
+                (self.LATEST, targets)
             )
 
+            # ---------- 最新版が文書ごとに 1 件か確認 ----------
+            broken = conn.execute(
+                """
+                SELECT t.document_id, COUNT(e.edition_id)
+                FROM (
+                    SELECT json_extract(value, '$[0]') AS document_id
+                    FROM json_each(?)
+                ) AS t
+                LEFT JOIN Document_Edition_Master e
+                    ON e.document_id = t.document_id
+                   AND e.edition_status = ?
+                GROUP BY t.document_id
+                HAVING COUNT(e.edition_id) != 1
+                """,
+                (targets, self.LATEST)
+            ).fetchall()
+            if broken:
+                raise ValueError(f"最新版が 1 件にならない文書があります: {broken}")
+
+        return len(pairs)
+
     # ------------------------------------------------------------------
     # 修正中版の新規登録
     # ------------------------------------------------------------------
@@ -190,6 +598,9 @@ class DocumentInfo:
     # 文書マスタ取得（参照用）
     # ------------------------------------------------------------------
     def fetch_document_master(self) -> List[Tuple]:
+        return list(self.iter_document_master())
+
+    def iter_document_master(self, arraysize: int = 1000) -> Iterator[Tuple]:
         sql = """
         SELECT
             document_id,
@@ -198,5 +609,4 @@ class DocumentInfo:
         FROM Document_Master
         ORDER BY document_number
         """
-        with self._connect() as conn:
-            return conn.execute(sql).fetchall()
\ No newline at end of file
+        return self.pool.iter_query(sql, (), arraysize)
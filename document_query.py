@@ -0,0 +1,380 @@
+import copy
+import json
+from collections import namedtuple
+from typing import Any, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from db_pool import ConnectionPool
+from db_migrations import migrate, require_schema, schema_version
+from pagination import encode_cursor, decode_cursor
+from document_search import match_phrase, like_pattern, TRIGRAM_MIN_LENGTH
+
+
+# ------------------------------------------------------------------
+# 一覧の行（どの取得口でもこの形で返す）
+# ------------------------------------------------------------------
+EDITION_COLUMNS = (
+    "document_number",
+    "document_name",
+    "edition_no",
+    "effective_date",
+    "edition_status",
+    "pdf_path",
+    "document_id",
+    "edition_id",
+)
+
+EditionRow = namedtuple("EditionRow", EDITION_COLUMNS)
+
+_SELECT = """
+SELECT
+    d.document_number,
+    d.document_name,
+    e.edition_no,
+    e.effective_date,
+    e.edition_status,
+    e.pdf_path,
+    d.document_id,
+    e.edition_id
+"""
+
+# 並び替えに使える列（キー → SQL 式）
+SORT_KEYS = {
+    "document_number": "d.document_number",
+    "document_name": "d.document_name",
+    "edition_no": "e.edition_no",
+    "effective_date": "COALESCE(e.effective_date, '')",   # 未設定は先頭（索引も同じ式）
+    "edition_status": "e.edition_status",
+    "document_id": "d.document_id",
+    "edition_id": "e.edition_id",
+    "rank": "s.rank",          # キーワード（3 文字以上）指定時のみ有効
+}
+
+# 並びキーの値が NULL になりうる列 → 式の COALESCE と同じ置き換え値
+SORT_NULLS = {
+    "effective_date": "",
+}
+
+DEFAULT_SORT = ("document_number", "edition_no")
+
+# 一覧の列見出し → 並び順（見出しクリック用）
+# ・どれも索引の順にそのまま読める組み合わせ（db_migrations の版 6）
+# ・同順位は edition_id（索引の末尾に暗黙に付く rowid）で固定
+COLUMN_SORTS = {
+    "document_number": DEFAULT_SORT,
+    "document_name": ("document_name", "document_id", "edition_no"),
+    "edition_no": ("edition_no",),
+    "effective_date": ("effective_date",),
+    "edition_status": ("edition_status",),
+}
+
+
+# 文書ごとの代表の 1 版（最新版、無ければ版数の最も大きい版）
+# ・どちらも索引（idx_edition_status_document / idx_edition_document）だけで引ける
+_PER_DOCUMENT = """
+e.edition_id = COALESCE(
+    (SELECT h.edition_id FROM Document_Edition_Master AS h
+      WHERE h.edition_status = 0 AND h.document_id = e.document_id
+      LIMIT 1),
+    (SELECT h.edition_id FROM Document_Edition_Master AS h
+      WHERE h.document_id = e.document_id
+      ORDER BY h.edition_no DESC, h.edition_id DESC
+      LIMIT 1)
+)
+"""
+
+
+def column_sort(column: str, descending: bool = False) -> Tuple[str, ...]:
+    """
+    列見出し → EditionFilter の sort（全項目を同じ向きにそろえる）
+    """
+    if column not in COLUMN_SORTS:
+        raise ValueError(f"並び替えできない列です: '{column}'")
+    suffix = " DESC" if descending else ""
+    return tuple(key + suffix for key in COLUMN_SORTS[column])
+
+
+def _edition_row(cursor, row) -> EditionRow:
+    return EditionRow._make(row)
+
+
+# ------------------------------------------------------------------
+# 絞り込み条件
+# ------------------------------------------------------------------
+class EditionFilter:
+    """
+    一覧の絞り込み・並び順の指定
+
+    Args:
+        statuses: 状態（int 1 つ / 複数の並び / None = すべて）
+        keyword: 文書番号・文書名の部分一致
+        date_from, date_to: 発行日の範囲（両端を含む、'YYYY-MM-DD'）
+        document_id: 文書を 1 つに限定
+        per_document: 文書ごとに 1 版だけ（最新版、無ければ版数の最も大きい版）
+                      statuses はその 1 版に対して絞り込む
+        sort: ["列", "列 DESC", ...]（SORT_KEYS のキー）
+              末尾に edition_id が無ければ最後の項目と同じ向きで補う（同順位の並びを固定）
+        limit, offset: 取得範囲
+        after: キーセットの開始位置（この並び順で after より後の行から）
+    """
+
+    def __init__(
+        self,
+        statuses: Union[None, int, Iterable[int]] = None,
+        keyword: Optional[str] = None,
+        date_from: Optional[str] = None,
+        date_to: Optional[str] = None,
+        document_id: Optional[int] = None,
+        per_document: bool = False,
+        sort: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        offset: Optional[int] = None,
+        after: Optional[Sequence[Any]] = None
+    ):
+        if statuses is None or isinstance(statuses, int):
+            self.statuses = statuses if statuses is None else (statuses,)
+        else:
+            self.statuses = tuple(sorted(set(statuses)))
+
+        keyword = (keyword or "").strip()
+        self.keyword = keyword or None
+        self.date_from = date_from
+        self.date_to = date_to
+        self.document_id = document_id
+        self.per_document = per_document
+        self.limit = limit
+        self.offset = offset
+        self.after = tuple(after) if after is not None else None
+
+        self.sort = self._parse_sort(sort or DEFAULT_SORT)
+
+    @property
+    def uses_fts(self) -> bool:
+        return self.keyword is not None and len(self.keyword) >= TRIGRAM_MIN_LENGTH
+
+    def _parse_sort(self, sort: Sequence[str]) -> List[Tuple[str, bool]]:
+        terms = []
+        for term in sort:
+            parts = term.split()
+            direction = parts[1].upper() if len(parts) == 2 else "ASC"
+            if len(parts) not in (1, 2) or direction not in ("ASC", "DESC"):
+                raise ValueError(f"並び順の指定が不正です: '{term}'")
+            if parts[0] not in SORT_KEYS:
+                raise ValueError(f"並び替えできない列です: '{parts[0]}'")
+            if parts[0] == "rank" and not self.uses_fts:
+                continue  # 順位は FTS 検索時のみ
+            terms.append((parts[0], direction == "DESC"))
+
+        if not any(key == "edition_id" for key, _ in terms):
+            terms.append(("edition_id", terms[-1][1] if terms else False))
+        return terms
+
+    def sort_values(self, row: EditionRow) -> Tuple:
+        """
+        行 → この並び順でのキー値（キーセットの after / カーソルに使う）
+        """
+        if any(key == "rank" for key, _ in self.sort):
+            raise ValueError("順位（rank）での並びはキーセットで辿れません")
+        values = []
+        for key, _ in self.sort:
+            value = getattr(row, key)
+            if value is None and key in SORT_NULLS:
+                value = SORT_NULLS[key]
+            values.append(value)
+        return tuple(values)
+
+
+# ------------------------------------------------------------------
+# 問い合わせ
+# ------------------------------------------------------------------
+class DocumentQuery:
+    """
+    Edition 一覧の問い合わせ（一覧取得系の唯一の実装）
+
+    ・EditionFilter から SQL 文を 1 つだけ組み立てる
+      （複数状態も json_each で 1 文。最新版＋修正中 などを 1 回で取得）
+    ・SQL 文の文字列は条件の「形」だけで決まり、値はすべてバインド変数
+      → sqlite3 の文キャッシュ（cached_statements）でそのまま再利用される
+    ・行は EditionRow（tuple なので添字でも参照可）
+    """
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+        self._schema_version = 0     # 確認済みの版（版は下がらないため一度確認すれば足りる）
+
+    def ensure_schema(self):
+        """
+        検索インデックス等を最新版へ移行する（サービス起動時 / 管理用）
+
+        一覧・検索の読み出しからは呼ばない（require_schema で版を確かめるだけ）
+        """
+        with self.pool.connection() as conn:
+            migrate(conn)
+            self._schema_version = schema_version(conn)
+
+    def require_schema(self, version: int):
+        """
+        スキーマが version 以上か確認する（移行はしない。古ければ SchemaOutdatedError）
+        """
+        if self._schema_version >= version:
+            return
+        with self.pool.connection() as conn:
+            self._schema_version = require_schema(conn, version)
+
+    # ------------------------------------------------------------------
+    # SQL 組み立て
+    # ------------------------------------------------------------------
+    def _from_where(self, spec: EditionFilter) -> Tuple[str, List[Any]]:
+        if spec.uses_fts:
+            self.require_schema(3)      # 文書名検索（FTS5）
+
+        sql = (
+            " FROM Document_Edition_Master AS e"
+            " JOIN document_master AS d ON e.document_id = d.document_id"
+        )
+        if spec.uses_fts:
+            sql += " JOIN document_search AS s ON s.rowid = d.document_id"
+
+        where: List[str] = []
+        params: List[Any] = []
+
+        if spec.statuses is not None:
+            if len(spec.statuses) == 1:
+                where.append("e.edition_status = ?")
+                params.append(spec.statuses[0])
+            elif spec.statuses:
+                where.append("e.edition_status IN (SELECT value FROM json_each(?))")
+                params.append(json.dumps(spec.statuses))
+            else:
+                where.append("0")
+
+        if spec.keyword is not None:
+            if spec.uses_fts:
+                where.append("document_search MATCH ?")
+                params.append(match_phrase(spec.keyword))
+            else:
+                # trigram で MATCH できない短い語は LIKE
+                where.append(
+                    "(d.document_name LIKE ? ESCAPE '\\' OR d.document_number LIKE ? ESCAPE '\\')"
+                )
+                pattern = like_pattern(spec.keyword)
+                params.extend([pattern, pattern])
+
+        if spec.document_id is not None:
+            where.append("e.document_id = ?")
+            params.append(spec.document_id)
+
+        if spec.per_document:
+            where.append(_PER_DOCUMENT.strip())
+
+        if spec.date_from is not None:
+            where.append("e.effective_date >= ?")
+            params.append(spec.date_from)
+
+        if spec.date_to is not None:
+            where.append("e.effective_date <= ?")
+            params.append(spec.date_to)
+
+        if spec.after is not None:
+            clause, values = self._after_clause(spec)
+            where.append(clause)
+            params.extend(values)
+
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        return sql, params
+
+    @staticmethod
+    def _after_clause(spec: EditionFilter) -> Tuple[str, List[Any]]:
+        """
+        キーセット条件（並び順で after より後ろ）
+
+        向きがそろっていれば行値比較 1 つ、混在していれば OR の連鎖
+        """
+        if len(spec.after) != len(spec.sort):
+            raise ValueError("カーソルと並び順が一致しません")
+
+        exprs = [SORT_KEYS[key] for key, _ in spec.sort]
+        directions = {desc for _, desc in spec.sort}
+        if len(directions) == 1:
+            op = "<" if directions.pop() else ">"
+            columns = ", ".join(exprs)
+            marks = ", ".join("?" * len(exprs))
+            return f"({columns}) {op} ({marks})", list(spec.after)
+
+        clauses = []
+        params: List[Any] = []
+        for i, (key, desc) in enumerate(spec.sort):
+            terms = [f"{exprs[j]} = ?" for j in range(i)]
+            terms.append(f"{exprs[i]} {'<' if desc else '>'} ?")
+            clauses.append("(" + " AND ".join(terms) + ")")
+            params.extend(spec.after[:i + 1])
+        return "(" + " OR ".join(clauses) + ")", params
+
+    def _select(self, spec: EditionFilter) -> Tuple[str, List[Any]]:
+        from_where, params = self._from_where(spec)
+
+        order = ", ".join(
+            f"{SORT_KEYS[key]}{' DESC' if desc else ''}" for key, desc in spec.sort
+        )
+        sql = _SELECT + from_where + f" ORDER BY {order}"
+
+        if spec.limit is not None or spec.offset is not None:
+            sql += " LIMIT ?"
+            params.append(spec.limit if spec.limit is not None else -1)
+        if spec.offset is not None:
+            sql += " OFFSET ?"
+            params.append(spec.offset)
+        return sql, params
+
+    # ------------------------------------------------------------------
+    # 取得
+    # ------------------------------------------------------------------
+    def fetch(self, spec: EditionFilter) -> List[EditionRow]:
+        sql, params = self._select(spec)
+        with self.pool.connection() as conn:
+            cur = conn.cursor()
+            cur.row_factory = _edition_row
+            try:
+                return cur.execute(sql, params).fetchall()
+            finally:
+                cur.close()
+
+    def iter(self, spec: EditionFilter, arraysize: int = 1000) -> Iterator[EditionRow]:
+        """
+        fetch の逐次版（fetchmany(arraysize) 単位）
+        """
+        sql, params = self._select(spec)
+        for row in self.pool.iter_query(sql, params, arraysize):
+            yield EditionRow._make(row)
+
+    def count(self, spec: EditionFilter) -> int:
+        """
+        条件に合う件数（fetch と同じ FROM / JOIN。文書の無い版は数えない）
+        """
+        from_where, params = self._from_where(spec)
+        with self.pool.connection() as conn:
+            return conn.execute("SELECT COUNT(*)" + from_where, params).fetchone()[0]
+
+    def page(
+        self,
+        spec: EditionFilter,
+        page_size: int,
+        cursor: Optional[str] = None
+    ) -> Tuple[List[EditionRow], Optional[str]]:
+        """
+        キーセット・ページング
+
+        Returns:
+            (rows, next_cursor)
+            next_cursor は最終行の並びキー（spec.sort の順）、最終ページで None
+        """
+        spec = copy.copy(spec)
+        spec.after = decode_cursor(cursor, len(spec.sort)) if cursor is not None else None
+        spec.limit = page_size
+        spec.offset = None
+
+        rows = self.fetch(spec)
+        next_cursor = None
+        if len(rows) == page_size:
+            next_cursor = encode_cursor(spec.sort_values(rows[-1]))
+        return rows, next_cursor
@@ -0,0 +1,85 @@
+# ------------------------------------------------------------------
+# 文書名 / 文書番号 全文検索インデックス（FTS5 trigram）
+# ・日本語は語境界がないため trigram（3 文字単位）で索引
+# ・document_master を外部コンテンツとし、トリガで同期
+# ・作成は db_migrations.py（版 3）
+# ------------------------------------------------------------------
+SEARCH_INDEX_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS document_search USING fts5(
+    document_number,
+    document_name,
+    content = 'document_master',
+    content_rowid = 'document_id',
+    tokenize = 'trigram'
+);
+
+CREATE TRIGGER IF NOT EXISTS document_search_ai
+AFTER INSERT ON document_master
+BEGIN
+    INSERT INTO document_search (rowid, document_number, document_name)
+    VALUES (new.document_id, new.document_number, new.document_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS document_search_ad
+AFTER DELETE ON document_master
+BEGIN
+    INSERT INTO document_search (document_search, rowid, document_number, document_name)
+    VALUES ('delete', old.document_id, old.document_number, old.document_name);
+END;
+
+CREATE TRIGGER IF NOT EXISTS document_search_au
+AFTER UPDATE OF document_number, document_name ON document_master
+BEGIN
+    INSERT INTO document_search (document_search, rowid, document_number, document_name)
+    VALUES ('delete', old.document_id, old.document_number, old.document_name);
+    INSERT INTO document_search (rowid, document_number, document_name)
+    VALUES (new.document_id, new.document_number, new.document_name);
+END;
+"""
+
+# trigram は 3 文字未満の語を MATCH できない
+TRIGRAM_MIN_LENGTH = 3
+
+
+def match_phrase(keyword: str) -> str:
+    """
+    入力文字列 → FTS5 の MATCH 式（演算子を無効化したフレーズ）
+    """
+    return '"' + keyword.replace('"', '""') + '"'
+
+
+def like_pattern(keyword: str) -> str:
+    """
+    入力文字列 → 部分一致 LIKE パターン（ESCAPE '\\' 前提）
+    """
+    escaped = (
+        keyword.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+    return f"%{escaped}%"
+
+
+# ------------------------------------------------------------------
+# PDF 本文全文検索インデックス（pdf_text_indexer.py が投入）
+# ・edition_pdf_text.rowid = edition_id
+# ・edition_pdf_index_state で再索引要否（mtime / size / hash）を判定
+# ・作成は db_migrations.py（版 4）
+# ------------------------------------------------------------------
+PDF_TEXT_DDL = """
+CREATE VIRTUAL TABLE IF NOT EXISTS edition_pdf_text USING fts5(
+    body,
+    tokenize = 'trigram'
+);
+
+CREATE TABLE IF NOT EXISTS edition_pdf_index_state (
+    edition_id   INTEGER PRIMARY KEY,
+    pdf_path     TEXT,
+    file_mtime   REAL,
+    file_size    INTEGER,
+    content_hash TEXT,
+    indexed_at   TEXT,
+    error        TEXT
+);
+"""
+
@@ -1,21 +1,40 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from document_info import DocumentInfo
+from doc_service import open_document_info
+from background_loader import BackgroundLoader
+from query_trace import install_hotkey
+from pdf_availability import get_availability, MISSING_TAG, MISSING_FOREGROUND
+from tree_reconcile import TreeReconciler
+from sortable_headings import SortableHeadings
 
 
-class DraftEditionApprovalGUI(tk.Tk):
+class DraftEditionApprovalView(tk.Frame):
     """
-    修正中版（edition_status=1）一覧表示 ＋ 承認 GUI
+    修正中版（edition_status=1）一覧表示 ＋ 承認（画面本体）
     """
 
-    def __init__(self, db_path: str):
-        super().__init__()
-        self.title("修正中ドキュメント一覧（承認）")
-        self.geometry("1050x600")
+    TITLE = "修正中ドキュメント一覧（承認）"
 
-        self.db = DocumentInfo(db_path)
+    def __init__(self, master: tk.Misc, db: DocumentInfo):
+        super().__init__(master)
+
+        self.db = db
+        self.pdf_status = get_availability(db)
 
         self._create_widgets()
+
+        self.loader = BackgroundLoader(self, self.db.pool, self.loading_label)
+        self._load_draft_list()
+
+        # PDF の存在確認（バックグラウンド。結果が変わったら再描画）
+        self.pdf_status.start()
+        self.pdf_status.watch(self, self.refresh)
+
+    def refresh(self):
+        """
+        再表示時の再読込（launcher のタブ切替）
+        """
         self._load_draft_list()
 
     # ------------------------------------------------------------
@@ -38,6 +57,9 @@ class DraftEditionApprovalGUI(tk.Tk):
         )
         btn_approve.pack(side=tk.LEFT, padx=10)
 
+        self.loading_label = tk.Label(ctrl_frame, text="", fg="#666666")
+        self.loading_label.pack(side=tk.LEFT, padx=10)
+
         # ---------- 一覧 ----------
         list_frame = tk.Frame(self)
         list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
@@ -56,7 +78,8 @@ class DraftEditionApprovalGUI(tk.Tk):
             list_frame,
             columns=columns,
             show="headings",
-            height=18
+            height=18,
+            selectmode="extended"
         )
 
         headings = {
@@ -85,31 +108,58 @@ class DraftEditionApprovalGUI(tk.Tk):
 
         self.tree.pack(fill=tk.BOTH, expand=True)
 
+        # 見出しクリックで並び替え（SQL 側で並べて取り直し、差分更新で行を移動）
+        self.headings = SortableHeadings(
+            self.tree,
+            {
+                "document_number": "document_number",
+                "document_name": "document_name",
+                "edition_no": "edition_no",
+                "effective_date": "effective_date",
+            },
+            lambda sort: self._load_draft_list()
+        )
+
+        self.tree.tag_configure(MISSING_TAG, foreground=MISSING_FOREGROUND)   # PDF なし
+
+        # iid = edition_id で差分更新
+        self.reconciler = TreeReconciler(self.tree)
+
     # ------------------------------------------------------------
     # 修正中版一覧取得
     # ------------------------------------------------------------
     def _load_draft_list(self):
 
-        self.tree.delete(*self.tree.get_children())
+        sort = self.headings.sort
 
-        rows = self.db.fetch_editions_by_status(1)  # 修正中のみ
+        # 修正中のみ（ワーカースレッドで取得）
+        self.loader.submit(
+            lambda: self.db.fetch_editions_by_status(DocumentInfo.DRAFT, sort),
+            self._show_draft_list
+        )
 
+    def _show_draft_list(self, rows):
+
+        items = []
         for r in rows:
-            status_text = self.db.status_text(r[6])
-
-            self.tree.insert(
-                "",
-                tk.END,
-                values=(
-                    r[0],  # document_id
-                    r[1],  # document_number
-                    r[2],  # document_name
-                    r[3],  # edition_id
-                    r[4],  # edition_no
-                    r[5],  # effective_date
+            status_text = self.db.status_text(r[4])
+
+            items.append((
+                r[7],  # iid = edition_id
+                (
+                    r[6],  # document_id
+                    r[0],  # document_number
+                    r[1],  # document_name
+                    r[7],  # edition_id
+                    r[2],  # edition_no
+                    r[3],  # effective_date
                     status_text
-                )
-            )
+                ),
+                self.pdf_status.row_tags(r[5])
+            ))
+
+        # 承認で消えた行だけ削除（スクロール位置・選択を保持）
+        self.reconciler.apply(items)
 
     # ------------------------------------------------------------
     # 承認処理
@@ -121,29 +171,46 @@ class DraftEditionApprovalGUI(tk.Tk):
             messagebox.showwarning("確認", "承認する行を選択してください")
             return
 
-        item = self.tree.item(selected[0])
-        values = item["values"]
-
-        document_id = values[0]
-        edition_id = values[3]
+        # iid = edition_id / values[0] = document_id
+        pairs = [
+            (self.tree.item(iid, "values")[0], int(iid))
+            for iid in selected
+        ]
 
         confirm = messagebox.askyesno(
             "承認確認",
-            "選択した版を最新版として承認します。\nよろしいですか？"
+            f"選択した {len(pairs)} 件の版を最新版として承認します。\nよろしいですか？"
         )
 
         if not confirm:
             return
 
         try:
-            self.db.approve_edition(document_id, edition_id)
-            messagebox.showinfo("完了", "最新版として承認しました")
+            count = self.db.approve_editions(pairs)
+            messagebox.showinfo("完了", f"{count} 件を最新版として承認しました")
             self._load_draft_list()
 
         except Exception as e:
             messagebox.showerror("エラー", f"承認に失敗しました\n{e}")
 
 
+class DraftEditionApprovalGUI(tk.Tk):
+    """
+    修正中版 一覧表示 ＋ 承認 GUI（単独ウィンドウ）
+    """
+
+    def __init__(self, db_path: str):
+        super().__init__()
+        self.title(DraftEditionApprovalView.TITLE)
+        self.geometry("1050x600")
+
+        self.db = open_document_info(db_path)     # URL / DOCDB_SERVICE_URL ならサービス経由
+
+        self.view = DraftEditionApprovalView(self, self.db)
+        self.view.pack(fill=tk.BOTH, expand=True)
+        install_hotkey(self)      # F12：問い合わせ計測の開始 / 集計出力
+
+
 if __name__ == "__main__":
     app = DraftEditionApprovalGUI(r"C:\DataBase\document_master.db")
     app.mainloop()
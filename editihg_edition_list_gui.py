@@ -1,24 +1,45 @@
 import tkinter as tk
 from tkinter import ttk, messagebox
 from document_info import DocumentInfo
+from doc_service import open_document_info
+from background_loader import BackgroundLoader
+from query_trace import install_hotkey
+from pdf_availability import get_availability, MISSING_TAG, MISSING_FOREGROUND
+from tree_reconcile import TreeReconciler
+from sortable_headings import SortableHeadings
 
 
 
-class EditingEditionListGUI(tk.Tk):
+class EditingEditionListView(tk.Frame):
     """
-    修正中版一覧 ＋ 承認（最新版切替）GUI
+    修正中版一覧 ＋ 承認（最新版切替）（画面本体）
     ・修正中：edition_status = 1
     ・承認処理は DB 側に委譲
     """
 
-    def __init__(self, db_name: str):
-        super().__init__()
-        self.title("修正中ドキュメント一覧（承認）")
-        self.geometry("1150x650")
+    TITLE = "修正中ドキュメント一覧（承認）"
 
-        self.db = DocumentInfo(db_name)
+    def __init__(self, master: tk.Misc, db: DocumentInfo):
+        super().__init__(master)
+
+        self.db = db
+        self.pdf_status = get_availability(db)
+
+        self._document_ids = {}
 
         self._create_widgets()
+
+        self.loader = BackgroundLoader(self, self.db.pool, self.loading_label)
+        self._load_editing_list()
+
+        # PDF の存在確認（バックグラウンド。結果が変わったら再描画）
+        self.pdf_status.start()
+        self.pdf_status.watch(self, self.refresh)
+
+    def refresh(self):
+        """
+        再表示時の再読込（launcher のタブ切替）
+        """
         self._load_editing_list()
 
     # ------------------------------------------------------------------
@@ -35,6 +56,9 @@ class EditingEditionListGUI(tk.Tk):
         )
         btn_refresh.pack(side=tk.LEFT)
 
+        self.loading_label = tk.Label(top_frame, text="", fg="#666666")
+        self.loading_label.pack(side=tk.LEFT, padx=10)
+
         btn_approve = tk.Button(
             top_frame,
             text="承認して最新版にする",
@@ -61,7 +85,7 @@ class EditingEditionListGUI(tk.Tk):
             columns=columns,
             show="headings",
             height=20,
-            selectmode="browse"
+            selectmode="extended"
         )
 
         self.tree.heading("文書番号", text="文書番号")
@@ -81,43 +105,67 @@ class EditingEditionListGUI(tk.Tk):
 
         self.tree.pack(fill=tk.BOTH, expand=True)
 
+        # 見出しクリックで並び替え（SQL 側で並べて取り直し、差分更新で行を移動）
+        self.headings = SortableHeadings(
+            self.tree,
+            {
+                "文書番号": "document_number",
+                "文書名": "document_name",
+                "版": "edition_no",
+                "修正日": "effective_date",
+            },
+            lambda sort: self._load_editing_list()
+        )
+
         # 修正中は薄黄
         self.tree.tag_configure("editing", background="#FFFDE7")
+        self.tree.tag_configure(MISSING_TAG, foreground=MISSING_FOREGROUND)   # PDF なし
+
+        # iid = edition_id で差分更新
+        self.reconciler = TreeReconciler(self.tree)
 
     # ------------------------------------------------------------------
     # 修正中一覧ロード
     # ------------------------------------------------------------------
     def _load_editing_list(self):
 
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        sort = self.headings.sort
 
-        rows = self.db.fetch_editing_documents()  # edition_status = 1
+        # edition_status = 1（ワーカースレッドで取得）
+        self.loader.submit(
+            lambda: self.db.fetch_editions_by_status(DocumentInfo.DRAFT, sort),
+            self._show_editing_list
+        )
 
+    def _show_editing_list(self, rows):
+
+        self._document_ids.clear()
+
+        items = []
         for r in rows:
-            (
-                document_id,
-                document_number,
-                document_name,
-                edition_id,
-                edition_no,
-                update_date,
-                edition_status,
-            ) = r
-
-            self.tree.insert(
-                "",
-                tk.END,
-                iid=str(edition_id),  # ← 承認処理で使う
-                values=(
+            document_number = r[0]
+            document_name = r[1]
+            edition_no = r[2]
+            update_date = r[3]
+            document_id = r[6]
+            edition_id = r[7]
+
+            self._document_ids[edition_id] = document_id
+
+            items.append((
+                edition_id,  # ← iid：承認処理で使う
+                (
                     document_number,
                     document_name,
                     edition_no,
                     update_date,
                     "修正中",
                 ),
-                tags=("editing",)
-            )
+                self.pdf_status.row_tags(r[5], "editing")
+            ))
+
+        # 承認で消えた行だけ削除（スクロール位置・選択を保持）
+        self.reconciler.apply(items)
 
     # ------------------------------------------------------------------
     # 承認処理
@@ -129,22 +177,42 @@ class EditingEditionListGUI(tk.Tk):
             messagebox.showwarning("確認", "承認する修正中版を選択してください。")
             return
 
-        edition_id = int(selected[0])
+        pairs = [
+            (self._document_ids[int(iid)], int(iid))
+            for iid in selected
+        ]
 
         if not messagebox.askyesno(
             "承認確認",
-            "選択した修正中版を最新版として承認します。\nよろしいですか？"
+            f"選択した {len(pairs)} 件の修正中版を最新版として承認します。\nよろしいですか？"
         ):
             return
 
         try:
-            self.db.approve_edition(edition_id)
-            messagebox.showinfo("完了", "最新版として承認しました。")
+            count = self.db.approve_editions(pairs)
+            messagebox.showinfo("完了", f"{count} 件を最新版として承認しました。")
             self._load_editing_list()
         except Exception as e:
             messagebox.showerror("エラー", str(e))
 
 
+class EditingEditionListGUI(tk.Tk):
+    """
+    修正中版一覧 ＋ 承認 GUI（単独ウィンドウ）
+    """
+
+    def __init__(self, db_name: str):
+        super().__init__()
+        self.title(EditingEditionListView.TITLE)
+        self.geometry("1150x650")
+
+        self.db = open_document_info(db_name)     # URL / DOCDB_SERVICE_URL ならサービス経由
+
+        self.view = EditingEditionListView(self, self.db)
+        self.view.pack(fill=tk.BOTH, expand=True)
+        install_hotkey(self)      # F12：問い合わせ計測の開始 / 集計出力
+
+
 if __name__ == "__main__":
     app = EditingEditionListGUI(r"C:\DataBase\document_master.db")
     app.mainloop()
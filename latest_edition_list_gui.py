@@ -1,23 +1,45 @@
 import tkinter as tk
 from tkinter import ttk
-from master_data_fetcher_document import MasterDataFetcherDocument
+from document_info import DocumentInfo
+from doc_service import open_document_info
+from background_loader import BackgroundLoader
+from query_trace import install_hotkey
+from pdf_availability import get_availability, MISSING_TAG, MISSING_FOREGROUND
+from tree_reconcile import TreeReconciler
+from pdf_preview import PreviewPane
+from sortable_headings import SortableHeadings
 
 
-class LatestEditionListGUI(tk.Tk):
+class LatestEditionListView(tk.Frame):
     """
-    最新版ドキュメント一覧 GUI
+    最新版ドキュメント一覧（画面本体。単独ウィンドウ / launcher のタブで共通）
     ・最新版保証：edition_status = 0
     ・Document × Edition JOIN 結果のみ表示
     """
 
-    def __init__(self, db_name: str):
-        super().__init__()
-        self.title("最新版ドキュメント一覧")
-        self.geometry("1100x650")
+    TITLE = "最新版ドキュメント一覧"
+
+    def __init__(self, master: tk.Misc, db: DocumentInfo):
+        super().__init__(master)
 
-        self.db = MasterDataFetcherDocument(db_name)
+        self.db = db
+        self.pdf_status = get_availability(db)
+
+        self._pdf_paths = {}     # edition_id → pdf_path（プレビュー用）
 
         self._create_widgets()
+
+        self.loader = BackgroundLoader(self, self.db.pool, self.loading_label)
+        self._load_latest_list()
+
+        # PDF の存在確認（バックグラウンド。結果が変わったら再描画）
+        self.pdf_status.start()
+        self.pdf_status.watch(self, self.refresh)
+
+    def refresh(self):
+        """
+        再表示時の再読込（launcher のタブ切替）
+        """
         self._load_latest_list()
 
     # ------------------------------------------------------------------
@@ -37,10 +59,21 @@ class LatestEditionListGUI(tk.Tk):
             cond_frame, text="検索", command=self._load_latest_list
         )
         btn_search.grid(row=0, column=2, padx=10)
+        self.entry_docname.bind("<Return>", lambda e: self._load_latest_list())
+
+        self.loading_label = tk.Label(cond_frame, text="", fg="#666666")
+        self.loading_label.grid(row=0, column=3, padx=10)
 
         # ========= 一覧 =========
-        list_frame = tk.Frame(self)
-        list_frame.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+        # 左：一覧 / 右：選択中の版のプレビュー（境界はドラッグで調整）
+        body = tk.PanedWindow(self, orient=tk.HORIZONTAL, sashrelief=tk.RAISED)
+        body.pack(fill=tk.BOTH, expand=True, padx=10, pady=10)
+
+        list_frame = tk.Frame(body)
+        body.add(list_frame, stretch="always")
+
+        self.preview = PreviewPane(body)
+        body.add(self.preview, stretch="never")
 
         columns = (
             "文書番号",
@@ -75,8 +108,26 @@ class LatestEditionListGUI(tk.Tk):
 
         self.tree.pack(fill=tk.BOTH, expand=True)
 
+        # 見出しクリックで並び替え（SQL 側で並べて取り直す。状態は全行「最新」のため対象外）
+        self.headings = SortableHeadings(
+            self.tree,
+            {
+                "文書番号": "document_number",
+                "文書名": "document_name",
+                "版": "edition_no",
+                "発行日": "effective_date",
+            },
+            lambda sort: self._load_latest_list()
+        )
+
         # 行色（最新版は薄緑）
         self.tree.tag_configure("latest", background="#E8F5E9")
+        self.tree.tag_configure(MISSING_TAG, foreground=MISSING_FOREGROUND)   # PDF なし
+
+        # iid = edition_id で差分更新
+        self.reconciler = TreeReconciler(self.tree)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_row_selected)
 
     # ------------------------------------------------------------------
     # 最新版一覧ロード
@@ -84,41 +135,88 @@ class LatestEditionListGUI(tk.Tk):
     def _load_latest_list(self):
 
         keyword = self.entry_docname.get().strip()
+        sort = self.headings.sort
+
+        # 最新版取得（SQL保証）はワーカースレッドで
+        # 文書名フィルタは FTS 検索で SQL 側に任せる
+        def fetch():
+            if keyword:
+                return self.db.search_documents(keyword, DocumentInfo.LATEST, sort)
+            return self.db.fetch_latest_documents(sort)
 
-        # 一覧クリア
-        for row in self.tree.get_children():
-            self.tree.delete(row)
+        self.loader.submit(fetch, self._show_latest_list)
 
-        # 最新版取得（SQL保証）
-        rows = self.db.fetch_latest_documents()
+    def _show_latest_list(self, rows):
 
+        self._pdf_paths.clear()
+
+        items = []
         for r in rows:
-            (
-                document_id,
-                document_number,
-                document_name,
+            document_number = r[0]
+            document_name = r[1]
+            edition_no = r[2]
+            effective_date = r[3]
+            edition_id = r[7]
+
+            self._pdf_paths[edition_id] = r[5]
+
+            items.append((
                 edition_id,
-                edition_no,
-                effective_date,
-                edition_status,
-            ) = r
-
-            # 文書名フィルタ（部分一致）
-            if keyword and keyword not in document_name:
-                continue
-
-            self.tree.insert(
-                "",
-                tk.END,
-                values=(
+                (
                     document_number,
                     document_name,
                     edition_no,
                     effective_date,
                     "最新",
                 ),
-                tags=("latest",)
-            )
+                self.pdf_status.row_tags(r[5], "latest")
+            ))
+
+        # 変わった行だけ更新（スクロール位置・選択を保持）
+        self.reconciler.apply(items)
+
+    # ------------------------------------------------------------------
+    # プレビュー（選択行 ＋ 前後 2 行を先読み）
+    # ------------------------------------------------------------------
+    def _preview_target(self, iid: str):
+        edition_id = int(iid)
+        pdf_path = self._pdf_paths.get(edition_id)
+        if self.pdf_status.is_missing(pdf_path):
+            pdf_path = None
+        return edition_id, pdf_path
+
+    def _on_row_selected(self, event=None):
+        selected = self.tree.selection()
+        if not selected:
+            return
+
+        iid = selected[0]
+        neighbours = []
+        after = before = iid
+        for _ in range(2):
+            after = after and self.tree.next(after)
+            before = before and self.tree.prev(before)
+            for neighbour in (after, before):
+                if neighbour:
+                    neighbours.append(self._preview_target(neighbour))
+        self.preview.show(*self._preview_target(iid), neighbours)
+
+
+class LatestEditionListGUI(tk.Tk):
+    """
+    最新版ドキュメント一覧 GUI（単独ウィンドウ）
+    """
+
+    def __init__(self, db_name: str):
+        super().__init__()
+        self.title(LatestEditionListView.TITLE)
+        self.geometry("1100x650")
+
+        self.db = open_document_info(db_name)     # URL / DOCDB_SERVICE_URL ならサービス経由
+
+        self.view = LatestEditionListView(self, self.db)
+        self.view.pack(fill=tk.BOTH, expand=True)
+        install_hotkey(self)      # F12：問い合わせ計測の開始 / 集計出力
 
 
 if __name__ == "__main__":
@@ -0,0 +1,117 @@
+import argparse
+import importlib
+import tkinter as tk
+from tkinter import ttk
+
+
+# ------------------------------------------------------------------
+# 一覧画面をタブでまとめて開くランチャー
+# ・全タブで DocumentInfo（プール接続・結果キャッシュ）を 1 つ共有
+#   → 同じ一覧を複数画面で開いても問い合わせは 1 回、更新時のみ再取得
+# ・画面モジュールはタブを初めて開いたときに import / 生成
+#   （起動時は空のタブだけ描画し、最初の画面は描画後に生成）
+# ・開き直したタブは refresh()（キャッシュが有効なら DB へは行かない）
+# ------------------------------------------------------------------
+APP_TITLE = "文書管理"
+
+# (タブ名, モジュール, 画面クラス)
+VIEWS = (
+    ("ドキュメント一覧", "document_all_list_gui", "DocumentAllListView"),
+    ("最新版", "latest_edition_list_gui", "LatestEditionListView"),
+    ("修正中（承認）", "edit_edition_list_gui", "DraftEditionApprovalView"),
+    ("修正中一覧", "editihg_edition_list_gui", "EditingEditionListView"),
+)
+
+
+class LauncherApp(tk.Tk):
+    """
+    一覧画面のタブ切替アプリ
+
+    Args:
+        db_path: document_master.db
+        initial: 最初に開くタブ（VIEWS の添字）
+        cache_size: 共有結果キャッシュの件数上限
+    """
+
+    def __init__(self, db_path: str, initial: int = 0, cache_size: int = 256):
+        super().__init__()
+        self.title(APP_TITLE)
+        self.geometry("1150x700")
+
+        self.db_path = db_path
+        self.cache_size = cache_size
+        self._db = None
+        self._views = {}
+        self._active = None
+
+        self.notebook = ttk.Notebook(self)
+        self.notebook.pack(fill=tk.BOTH, expand=True)
+
+        self._hosts = []
+        for label, _, _ in VIEWS:
+            host = tk.Frame(self.notebook)
+            self.notebook.add(host, text=label)
+            self._hosts.append(host)
+
+        self.notebook.select(initial)
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+
+        # 空のタブを描画してから最初の画面を作る
+        self.after_idle(self._on_tab_changed)
+        self.after_idle(self._install_hotkey)
+
+    @property
+    def db(self):
+        """
+        全タブ共有の DocumentInfo（初回参照時に生成）
+        """
+        if self._db is None:
+            from doc_service import open_document_info
+            from query_cache import VersionedLRUCache
+
+            # URL（または DOCDB_SERVICE_URL）ならサービス経由。応答の控えはクライアント側
+            self._db = open_document_info(self.db_path, cache=VersionedLRUCache(maxsize=self.cache_size))
+        return self._db
+
+    def _install_hotkey(self):
+        from query_trace import install_hotkey
+
+        install_hotkey(self)      # F12：問い合わせ計測の開始 / 集計出力
+
+    # ------------------------------------------------------------------
+    # タブ切替
+    # ------------------------------------------------------------------
+    def _on_tab_changed(self, event=None):
+        index = self.notebook.index("current")
+        if index == self._active:
+            return
+        self._active = index
+
+        label, module_name, class_name = VIEWS[index]
+        self.title(f"{APP_TITLE} - {label}")
+
+        view = self._views.get(index)
+        if view is not None:
+            view.refresh()
+            return
+
+        view_class = getattr(importlib.import_module(module_name), class_name)
+        view = view_class(self._hosts[index], self.db)
+        view.pack(fill=tk.BOTH, expand=True)
+        self._views[index] = view
+
+
+def main():
+    parser = argparse.ArgumentParser(description="文書管理（一覧画面ランチャー）")
+    parser.add_argument("db", nargs="?", default=r"C:\DataBase\document_master.db",
+                        help="DB のパス、または doc_service の URL（http://サーバ:8765）")
+    parser.add_argument("--tab", type=int, default=0, choices=range(len(VIEWS)),
+                        help="最初に開くタブ（0: 一覧 / 1: 最新版 / 2: 修正中（承認）/ 3: 修正中一覧）")
+    args = parser.parse_args()
+
+    app = LauncherApp(args.db, initial=args.tab)
+    app.mainloop()
+
+
+if __name__ == "__main__":
+    main()
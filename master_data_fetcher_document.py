@@ -1,57 +1,271 @@
+import json
 import sqlite3
 from contextlib import contextmanager
-from typing import List, Tuple, Optional, Dict, Any
+from typing import List, Tuple, Optional, Dict, Any, Iterable, Iterator, Sequence
+
+from db_pool import get_pool
+from document_query import DocumentQuery, EditionFilter
+from query_cache import VersionedLRUCache, MISSING
+
+
+# ------------------------------------------------------------
+# fetch_by_conditions 用の条件
+# ------------------------------------------------------------
+# 値がこれらの型なら IN 条件
+_IN_TYPES = (list, tuple, set, frozenset)
+
+class Range:
+    """
+    範囲条件：low <= 列 <= high（inclusive=False で < / >、片側は None で省略）
+    """
+    def __init__(self, low: Any = None, high: Any = None, inclusive: bool = True):
+        self.low = low
+        self.high = high
+        self.inclusive = inclusive
+
+
+class Like:
+    """
+    LIKE 条件（ワイルドカードはそのまま、エスケープ文字は '\\'）
+    """
+    def __init__(self, pattern: str):
+        self.pattern = pattern
+
+
+class Prefix:
+    """
+    前方一致：列 >= prefix AND 列 < （prefix の末尾文字 + 1）
+    """
+    def __init__(self, prefix: str):
+        self.prefix = prefix
 
 
 class MasterDataFetcherDocument:
     """
     document_master.db 内のマスタデータを取得するクラス。
+
+    ID → 名前変換（fetch_value_by_id / fetch_one）と小さいマスタの fetch_all は
+    LRU キャッシュ経由（DB 更新時のみ無効化）。統計は cache_stats() で確認。
+    他端末での更新は最大 cache.check_interval 秒（既定 0.5 秒）遅れて反映される。
     """
-    def __init__(self, db_name: str):
+
+    # fetch_all をキャッシュするテーブルの行数上限
+    SMALL_TABLE_LIMIT = 500
+
+    # fetch_values_by_ids で json_each による JOIN に切り替えるキー数
+    BULK_JSON_THRESHOLD = 5000
+
+    # fetch_values_by_ids の IN (...) 1 文あたりのキー数上限
+    MAX_IN_CHUNK = 512
+
+    def __init__(self, db_name: str, cache: Optional[VersionedLRUCache] = None):
         self.db_name = db_name
+        self.pool = get_pool(db_name)
+        self.query = DocumentQuery(self.pool)
+        self.cache = cache if cache is not None else VersionedLRUCache()
+
+        # fetch_by_conditions 用：列一覧 / 組立済み SQL（スキーマ版で無効化）
+        self._schema_version: Optional[int] = None
+        self._columns: Dict[str, List[str]] = {}
+        self._compiled: Dict[Tuple, str] = {}
 
     @contextmanager
     def _connect(self):
-        """データベース接続を共通化"""
-        conn = sqlite3.connect(self.db_name)
-        try:
+        """データベース接続を共通化（プール接続のカーソルを返す）"""
+        with self.pool.connection() as conn:
             cursor = conn.cursor()
-            yield cursor
-        finally:
-            conn.close()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+
+    def _iter(self, name: str, sql: str, params=(), arraysize: int = 1000) -> Iterator[Tuple[Any, ...]]:
+        """
+        iter_* 共通：fetchmany(arraysize) 単位で 1 行ずつ返す
+        （エラー時は fetch_* と同様に表示して終了）
+        """
+        try:
+            yield from self.pool.iter_query(sql, params, arraysize)
+        except Exception as e:
+            print(f"[{name}] エラー: {e}")
+
+    # ------------------------------------------------------------
+    # キャッシュ
+    # ------------------------------------------------------------
+    def _validate_cache(self):
+        """
+        DB が更新されていればキャッシュを捨てる（data_version / 自プロセスの書込み）
+
+        ・自プロセスの書込みは即時に反映
+        ・他端末のコミットは接続ごとに check_interval 秒（既定 0.5 秒）に 1 回の確認のため、
+          その間はキャッシュの値を返しうる
+        """
+        conn = self.pool.probe()
+        generation = self.pool.write_generation
+        if self.cache.needs_check(id(conn), generation):
+            data_version = conn.execute("PRAGMA data_version").fetchone()[0]
+            self.cache.validate(id(conn), data_version, generation)
+
+    def cache_stats(self) -> Dict[str, Any]:
+        return self.cache.stats()
 
     # ------------------------------------------------------------
     # 汎用：指定テーブルを全取得
     # ------------------------------------------------------------
     def fetch_all(self, table_name: str) -> List[Tuple[Any, ...]]:
         """
-        指定テーブルの全データを取得
+        指定テーブルの全データを取得（SMALL_TABLE_LIMIT 行以下ならキャッシュ）
         """
         try:
+            self._validate_cache()
+            key = ("fetch_all", table_name)
+            rows = self.cache.get(key)
+            if rows is not MISSING:
+                return list(rows)
+
             with self._connect() as cur:
                 cur.execute(f"SELECT * FROM {table_name}")
-                return cur.fetchall()
+                rows = cur.fetchall()
+
+            if len(rows) <= self.SMALL_TABLE_LIMIT:
+                self.cache.put(key, tuple(rows))
+            return rows
         except Exception as e:
             print(f"[fetch_all] エラー: {e}")
             return []
 
+    def iter_all(self, table_name: str, arraysize: int = 1000) -> Iterator[Tuple[Any, ...]]:
+        """
+        fetch_all の逐次版（キャッシュは使わない）
+        """
+        return self._iter("iter_all", f"SELECT * FROM {table_name}", (), arraysize)
+
     # ------------------------------------------------------------
     # ID → 名前（または任意カラム）変換
     # ------------------------------------------------------------
     def fetch_value_by_id(self, table_name: str, key_column: str, value_column: str, key_value: Any) -> Optional[Any]:
         """
-        指定IDの値を取得
+        指定IDの値を取得（キャッシュ経由。他端末の更新は最大 check_interval 秒遅れ）
         """
         try:
+            self._validate_cache()
+            key = ("fetch_value_by_id", table_name, key_column, value_column, key_value)
+            value = self.cache.get(key)
+            if value is not MISSING:
+                return value
+
             with self._connect() as cur:
                 sql = f"SELECT {value_column} FROM {table_name} WHERE {key_column} = ?"
                 cur.execute(sql, (key_value,))
                 result = cur.fetchone()
-                return result[0] if result else None
+                value = result[0] if result else None
+
+            self.cache.put(key, value)
+            return value
         except Exception as e:
             print(f"[fetch_value_by_id] エラー: {e}")
             return None
 
+    # ------------------------------------------------------------
+    # ID → 名前 一括変換
+    # ------------------------------------------------------------
+    def fetch_values_by_ids(
+        self,
+        table_name: str,
+        key_column: str,
+        value_column: str,
+        keys: Iterable[Any]
+    ) -> Dict[Any, Any]:
+        """
+        複数 ID の値をまとめて取得（fetch_value_by_id の一括版）
+
+        ・キャッシュ済みのキーは問い合わせない
+        ・残りは VALUES の表（位置, キー）との JOIN をホスト変数上限内のチャンクに分けて問い合わせ
+          （チャンク長は 2 のべき乗、端数は末尾キーで埋めて同じ SQL 文を再利用）
+        ・結果は要求したキーの位置で対応付け、呼び出し側のキーのまま返す
+        ・BULK_JSON_THRESHOLD 件を超える場合は json_each(?) との JOIN 1 回
+          （一時テーブル相当。書込みが発生しないためキャッシュを無効化しない）
+
+        Returns:
+            {key: value}（存在しないキーは None）
+        """
+        try:
+            self._validate_cache()
+
+            result: Dict[Any, Any] = {}
+            missing = []
+            for key_value in dict.fromkeys(keys):
+                value = self.cache.get(
+                    ("fetch_value_by_id", table_name, key_column, value_column, key_value)
+                )
+                if value is MISSING:
+                    missing.append(key_value)
+                else:
+                    result[key_value] = value
+
+            if not missing:
+                return result
+
+            # 結果は missing の位置で受け取る（DB が返す値は列の型に変換されているため、
+            # "7" のように型の違うキーでも呼び出し側のキーで返す）
+            found: Dict[int, Any] = {}
+            with self._connect() as cur:
+                if len(missing) > self.BULK_JSON_THRESHOLD:
+                    cur.execute(
+                        f"""
+                        SELECT k.key, t.{value_column}
+                        FROM json_each(?) AS k
+                        JOIN {table_name} AS t
+                            ON t.{key_column} = k.value
+                        """,
+                        (json.dumps(missing),)
+                    )
+                    found.update(cur.fetchall())
+                else:
+                    # チャンク長を 2 のべき乗に揃え、SQL 文の種類を数種に抑える
+                    chunk_size = min(
+                        self._max_host_parameters(cur.connection),
+                        self.MAX_IN_CHUNK,
+                        1 << (len(missing) - 1).bit_length()
+                    )
+                    rows = ", ".join(f"({i}, ?)" for i in range(chunk_size))
+                    sql = (
+                        f"WITH k(i, v) AS (VALUES {rows}) "
+                        f"SELECT k.i, t.{value_column} FROM k "
+                        f"JOIN {table_name} AS t ON t.{key_column} = k.v"
+                    )
+                    for start in range(0, len(missing), chunk_size):
+                        chunk = missing[start:start + chunk_size]
+                        chunk += [chunk[-1]] * (chunk_size - len(chunk))
+                        cur.execute(sql, chunk)
+                        found.update(
+                            (start + i, value) for i, value in cur.fetchall()
+                            if start + i < len(missing)
+                        )
+
+            for i, key_value in enumerate(missing):
+                value = found.get(i)
+                result[key_value] = value
+                self.cache.put(
+                    ("fetch_value_by_id", table_name, key_column, value_column, key_value),
+                    value
+                )
+            return result
+
+        except Exception as e:
+            print(f"[fetch_values_by_ids] エラー: {e}")
+            return {}
+
+    @staticmethod
+    def _max_host_parameters(conn) -> int:
+        """
+        1 文あたりのホスト変数上限（古い SQLite は 999）
+        """
+        try:
+            return conn.getlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER)
+        except AttributeError:  # Python 3.10 以前
+            return 999
+
     # ------------------------------------------------------------
     # 任意カラム取得
     # ------------------------------------------------------------
@@ -68,97 +282,313 @@ class MasterDataFetcherDocument:
             print(f"[fetch_columns] エラー: {e}")
             return []
 
+    def iter_columns(self, table_name: str, columns: List[str], arraysize: int = 1000) -> Iterator[Tuple[Any, ...]]:
+        """
+        fetch_columns の逐次版
+        """
+        col_str = ", ".join(columns)
+        return self._iter("iter_columns", f"SELECT {col_str} FROM {table_name}", (), arraysize)
+
     # ------------------------------------------------------------
     # 条件検索
     # ------------------------------------------------------------
-    def fetch_by_conditions(self, table_name, conditions):
-        try:
-            with self._connect() as cur:
-                cur.execute(f"PRAGMA table_info({table_name})")
-                columns = {row[1] for row in cur.fetchall()}
-
-            for key in conditions.keys():
-                if key not in columns:
-                    raise ValueError(f"カラム '{key}' は {table_name} に存在しません")
+    def fetch_by_conditions(
+        self,
+        table_name: str,
+        conditions: Dict[str, Any],
+        order_by: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None
+    ) -> List[Tuple[Any, ...]]:
+        """
+        条件（AND）で検索
 
-            where_clauses = [f"{col} = ?" for col in conditions.keys()]
-            sql = f"SELECT * FROM {table_name} WHERE " + " AND ".join(where_clauses)
+        conditions の値：
+            スカラー               : 列 = ?
+            None                   : 列 IS NULL
+            list / tuple / set     : 列 IN (...)（ホスト変数上限を超える件数は json_each(?)）
+            Range(low, high)       : 範囲（片側省略可）
+            Like(pattern)          : 列 LIKE ?（ESCAPE '\\'）
+            Prefix(text)           : 前方一致（索引が効く範囲条件に変換）
+        order_by: ["列", "列 DESC", ...]
+        limit: 最大件数
 
+        ・テーブルの列一覧はスキーマ版（PRAGMA schema_version）が変わるまでキャッシュ
+        ・条件の「形」ごとに SQL 文を組み立てて再利用（値はすべてバインド変数）
+        """
+        try:
             with self._connect() as cur:
-                cur.execute(sql, tuple(conditions.values()))
+                sql, params = self._conditions_query(cur, table_name, conditions, order_by, limit)
+                cur.execute(sql, params)
                 return cur.fetchall()
 
         except Exception as e:
             print(f"[fetch_by_conditions] エラー: {e}")
             return []
 
+    def iter_by_conditions(
+        self,
+        table_name: str,
+        conditions: Dict[str, Any],
+        order_by: Optional[Sequence[str]] = None,
+        limit: Optional[int] = None,
+        arraysize: int = 1000
+    ) -> Iterator[Tuple[Any, ...]]:
+        """
+        fetch_by_conditions の逐次版（条件の指定方法は同じ）
+        """
+        try:
+            with self._connect() as cur:
+                sql, params = self._conditions_query(cur, table_name, conditions, order_by, limit)
+        except Exception as e:
+            print(f"[iter_by_conditions] エラー: {e}")
+            return
+        yield from self._iter("iter_by_conditions", sql, params, arraysize)
+
+    def _conditions_query(
+        self,
+        cur,
+        table_name: str,
+        conditions: Dict[str, Any],
+        order_by: Optional[Sequence[str]],
+        limit: Optional[int]
+    ) -> Tuple[str, List[Any]]:
+        """
+        条件 → (SQL, バインド値)（SQL は形ごとに組み立て済みのものを再利用）
+        """
+        columns = self._table_columns(cur, table_name)
+
+        # IN 以外の条件と LIMIT の分を先に確保し、残りのホスト変数を IN に割り当てる
+        budget = self._max_host_parameters(cur.connection) - (1 if limit is not None else 0)
+        kinds = {
+            column: self._condition_kind(value)
+            for column, value in conditions.items()
+            if not isinstance(value, _IN_TYPES)
+        }
+        budget -= sum(self._parameter_count(kind) for kind in kinds.values())
+        for column, value in conditions.items():
+            if column not in kinds:
+                kinds[column] = self._condition_kind(value, max(budget, 0))
+                budget -= self._parameter_count(kinds[column])
+
+        shape = (
+            table_name,
+            tuple((column, kinds[column]) for column in conditions),
+            tuple(order_by or ()),
+            limit is not None,
+        )
+        sql = self._compiled.get(shape)
+        if sql is None:
+            sql = self._compile(shape, columns)
+            self._compiled[shape] = sql
+
+        params: List[Any] = []
+        for (column, kind), value in zip(shape[1], conditions.values()):
+            params.extend(self._condition_params(kind, value))
+        if limit is not None:
+            params.append(limit)
+        return sql, params
+
+    def _table_columns(self, cur, table_name: str) -> List[str]:
+        """
+        列一覧（スキーマ版が変わったら列キャッシュ・組立済み SQL とも破棄）
+        """
+        schema_version = cur.execute("PRAGMA schema_version").fetchone()[0]
+        if schema_version != self._schema_version:
+            self._schema_version = schema_version
+            self._columns.clear()
+            self._compiled.clear()
+
+        columns = self._columns.get(table_name)
+        if columns is None:
+            cur.execute(f"PRAGMA table_info({table_name})")
+            columns = [row[1] for row in cur.fetchall()]
+            if not columns:
+                raise ValueError(f"テーブル '{table_name}' は存在しません")
+            self._columns[table_name] = columns
+        return columns
+
+    @staticmethod
+    def _condition_kind(value: Any, max_in: Optional[int] = None) -> Tuple:
+        """
+        条件値 → 形（SQL 文の再利用キー）
+        IN は要素数を 2 のべき乗に切り上げ、文の種類を抑える
+        （切り上げは max_in まで。要素数が max_in を超える IN は json_each(?) の 1 変数で渡す）
+        """
+        if value is None:
+            return ("null",)
+        if isinstance(value, Range):
+            return ("range", value.low is not None, value.high is not None, value.inclusive)
+        if isinstance(value, Like):
+            return ("like",)
+        if isinstance(value, Prefix):
+            return ("prefix", bool(value.prefix))
+        if isinstance(value, _IN_TYPES):
+            size = len(value)
+            if max_in is not None and size > max_in:
+                return ("in_json",)
+            padded = 1 << (size - 1).bit_length() if size else 0
+            return ("in", padded if max_in is None else min(padded, max_in))
+        return ("eq",)
+
+    @staticmethod
+    def _parameter_count(kind: Tuple) -> int:
+        """
+        形 → バインド変数の数
+        """
+        name = kind[0]
+        if name in ("eq", "like", "in_json"):
+            return 1
+        if name == "in":
+            return kind[1]
+        if name == "range":
+            return int(kind[1]) + int(kind[2])
+        if name == "prefix":
+            return 2 if kind[1] else 0
+        return 0
+
+    @staticmethod
+    def _condition_params(kind: Tuple, value: Any) -> List[Any]:
+        name = kind[0]
+        if name == "eq":
+            return [value]
+        if name == "null":
+            return []
+        if name == "in":
+            values = list(value)
+            return values + values[-1:] * (kind[1] - len(values))
+        if name == "in_json":
+            return [json.dumps(list(value))]
+        if name == "range":
+            return [v for v in (value.low, value.high) if v is not None]
+        if name == "like":
+            return [value.pattern]
+        if name == "prefix":
+            if not value.prefix:
+                return []
+            upper = value.prefix[:-1] + chr(ord(value.prefix[-1]) + 1)
+            return [value.prefix, upper]
+        raise ValueError(f"未対応の条件です: {kind}")
+
+    @staticmethod
+    def _compile(shape: Tuple, columns: List[str]) -> str:
+        table_name, condition_shapes, order_by, has_limit = shape
+        known = set(columns)
+
+        where = []
+        for column, kind in condition_shapes:
+            if column not in known:
+                raise ValueError(f"カラム '{column}' は {table_name} に存在しません")
+
+            name = kind[0]
+            if name == "eq":
+                where.append(f"{column} = ?")
+            elif name == "null":
+                where.append(f"{column} IS NULL")
+            elif name == "in":
+                if kind[1] == 0:
+                    where.append("0")
+                else:
+                    where.append(f"{column} IN ({', '.join('?' * kind[1])})")
+            elif name == "in_json":
+                where.append(f"{column} IN (SELECT value FROM json_each(?))")
+            elif name == "range":
+                _, has_low, has_high, inclusive = kind
+                if has_low:
+                    where.append(f"{column} {'>=' if inclusive else '>'} ?")
+                if has_high:
+                    where.append(f"{column} {'<=' if inclusive else '<'} ?")
+            elif name == "like":
+                where.append(f"{column} LIKE ? ESCAPE '\\'")
+            elif name == "prefix":
+                if kind[1]:
+                    where.append(f"{column} >= ? AND {column} < ?")
+
+        sql = f"SELECT * FROM {table_name}"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+
+        if order_by:
+            terms = []
+            for term in order_by:
+                parts = term.split()
+                direction = parts[1].upper() if len(parts) == 2 else "ASC"
+                if len(parts) not in (1, 2) or direction not in ("ASC", "DESC"):
+                    raise ValueError(f"並び順の指定が不正です: '{term}'")
+                if parts[0] not in known:
+                    raise ValueError(f"カラム '{parts[0]}' は {table_name} に存在しません")
+                terms.append(f"{parts[0]} {direction}")
+            sql += " ORDER BY " + ", ".join(terms)
+
+        if has_limit:
+            sql += " LIMIT ?"
+        return sql
+
 
     # ------------------------------------------------------------
     # 1件取得（ID検索）
     # ------------------------------------------------------------
     def fetch_one(self, table_name: str, key_column: str, key_value: Any) -> Optional[Tuple[Any, ...]]:
         """
-        指定キーの1レコードだけ取得
+        指定キーの1レコードだけ取得（キャッシュ経由。他端末の更新は最大 check_interval 秒遅れ）
         """
         try:
+            self._validate_cache()
+            key = ("fetch_one", table_name, key_column, key_value)
+            row = self.cache.get(key)
+            if row is not MISSING:
+                return row
+
             with self._connect() as cur:
                 sql = f"SELECT * FROM {table_name} WHERE {key_column} = ?"
                 cur.execute(sql, (key_value,))
-                return cur.fetchone()
+                row = cur.fetchone()
+
+            self.cache.put(key, row)
+            return row
         except Exception as e:
             print(f"[fetch_one] エラー: {e}")
             return None
 
+    # ------------------------------------------------------------
+    # 最新版 / 状態別 Edition 一覧（問い合わせは DocumentQuery）
+    #   列順：document_id, document_number, document_name,
+    #         edition_id, edition_no, effective_date, edition_status
+    # ------------------------------------------------------------
+    @staticmethod
+    def _edition_tuple(row) -> Tuple[Any, ...]:
+        return (
+            row.document_id,
+            row.document_number,
+            row.document_name,
+            row.edition_id,
+            row.edition_no,
+            row.effective_date,
+            row.edition_status
+        )
+
     def fetch_latest_documents(self):
         """
         最新版（edition_status = 0）を保証して取得
         """
-        sql = """
-        SELECT
-            d.document_id,
-            d.document_number,
-            d.document_name,
-            e.edition_id,
-            e.edition_no,
-            e.effective_date,
-            e.edition_status
-        FROM Document_Master d
-        JOIN Document_Edition_Master e
-        ON d.document_id = e.document_id
-        WHERE e.edition_status = 0
-        ORDER BY d.document_number
+        return self.fetch_editions_by_status(0)
+
+    def iter_latest_documents(self, arraysize: int = 1000) -> Iterator[Tuple[Any, ...]]:
+        return self.iter_editions_by_status(0, arraysize)
+
+    def fetch_editions_by_status(self, edition_status):
+        """
+        edition_status 指定で Edition 一覧取得（複数状態は tuple で指定）
         """
         try:
-            with self._connect() as cur:
-                cur.execute(sql)
-                return cur.fetchall()
+            rows = self.query.fetch(EditionFilter(statuses=edition_status))
+            return [self._edition_tuple(row) for row in rows]
         except Exception as e:
-            print(f"[fetch_latest_documents] エラー: {e}")
+            print(f"[fetch_editions_by_status] エラー: {e}")
             return []
 
-    def fetch_editions_by_status(self, edition_status: int):
-        """
-        edition_status 指定で Edition 一覧取得
-        """
-        sql = """
-        SELECT
-            d.document_id,
-            d.document_number,
-            d.document_name,
-            e.edition_id,
-            e.edition_no,
-            e.effective_date,
-            e.edition_status
-        FROM Document_Master d
-        JOIN Document_Edition_Master e
-        ON d.document_id = e.document_id
-        WHERE e.edition_status = ?
-        ORDER BY d.document_number, e.edition_no
-        """
+    def iter_editions_by_status(self, edition_status, arraysize: int = 1000) -> Iterator[Tuple[Any, ...]]:
         try:
-            with self._connect() as cur:
-                cur.execute(sql, (edition_status,))
-                return cur.fetchall()
+            for row in self.query.iter(EditionFilter(statuses=edition_status), arraysize):
+                yield self._edition_tuple(row)
         except Exception as e:
-            print(f"[fetch_editions_by_status] エラー: {e}")
-            return []
+            print(f"[iter_editions_by_status] エラー: {e}")
@@ -0,0 +1,179 @@
+import base64
+import json
+from collections import OrderedDict, namedtuple
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+
+# ------------------------------------------------------------------
+# キーセット・ページング用カーソル
+# ・最後に見た行のソートキーを JSON → base64url で包んだ不透明文字列
+# ・呼び出し側は中身を解釈せず、次ページ要求にそのまま渡す
+# ------------------------------------------------------------------
+def encode_cursor(key: Sequence[Any]) -> str:
+    raw = json.dumps(list(key), ensure_ascii=False, separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    """
+    カーソルを復元（要素数 size を検証）
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        key = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (ValueError, TypeError) as e:
+        raise ValueError(f"不正なカーソルです: {cursor!r}") from e
+
+    if not isinstance(key, list) or len(key) != size:
+        raise ValueError(f"不正なカーソルです: {cursor!r}")
+    return key
+
+
+class KeysetBlockSource:
+    """
+    VirtualTreeview の fetch_block(offset, limit) をキーセットで賄うアダプタ
+
+    ・直前ブロックの末尾カーソルが分かっている offset はキーセットで取得
+      （深い位置でも先頭ページと同コスト）
+    ・スクロールバーで飛んだ先など、カーソル不明の offset は
+      fetch_window(offset, limit) にフォールバック
+    """
+
+    def __init__(
+        self,
+        fetch_page: Callable[[int, Optional[str]], Tuple[List[Tuple], Optional[str]]],
+        fetch_window: Callable[[int, int], List[Tuple]],
+        cursor_of: Callable[[Tuple], str],
+    ):
+        self.fetch_page = fetch_page
+        self.fetch_window = fetch_window
+        self.cursor_of = cursor_of
+        self._cursors: Dict[int, Optional[str]] = {0: None}
+
+    def __call__(self, offset: int, limit: int) -> List[Tuple]:
+        if offset in self._cursors:
+            rows, next_cursor = self.fetch_page(limit, self._cursors[offset])
+        else:
+            rows = self.fetch_window(offset, limit)
+            next_cursor = self.cursor_of(rows[-1]) if len(rows) == limit else None
+
+        if rows and next_cursor is not None:
+            self._cursors[offset + len(rows)] = next_cursor
+        return rows
+
+
+# 2 階層表示の 1 行（depth 0 = 親 / 1 = 子、expanded は親が展開中か）
+TreeItem = namedtuple("TreeItem", ("depth", "row", "expanded"))
+
+
+class ExpandableBlockSource:
+    """
+    VirtualTreeview の fetch_block(offset, limit) で 2 階層（親 ＋ 展開した親の子）を表示するアダプタ
+
+    ・親行は fetch_parents(offset, limit)（親だけの通し番号。KeysetBlockSource など）から
+      block_size 単位で取得し、直近 max_blocks ブロックを保持
+      （展開 / 折りたたみで表示位置がずれても親は取り直さない）
+    ・子行は expand(親の番号, 子行) で渡す（取得は呼び出し側。展開したものだけ）
+    ・返す行は TreeItem。count は 親の件数 ＋ 展開中の子の件数
+    """
+
+    def __init__(
+        self,
+        fetch_parents: Callable[[int, int], List[Tuple]],
+        parent_count: int,
+        block_size: int = 200,
+        max_blocks: int = 16
+    ):
+        self.fetch_parents = fetch_parents
+        self.parent_count = parent_count
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+
+        self._blocks: "OrderedDict[int, List[Tuple]]" = OrderedDict()
+        self._children: Dict[int, List[Tuple]] = {}
+        self._order: List[int] = []        # 展開中の親の番号（昇順）
+
+    @property
+    def count(self) -> int:
+        return self.parent_count + sum(len(c) for c in self._children.values())
+
+    def parent(self, parent_index: int) -> Optional[Tuple]:
+        """
+        親の番号 → 親行
+        """
+        if not 0 <= parent_index < self.parent_count:
+            return None
+        block_no, pos = divmod(parent_index, self.block_size)
+        block = self._blocks.get(block_no)
+        if block is None:
+            block = self.fetch_parents(block_no * self.block_size, self.block_size)
+            self._blocks[block_no] = block
+            while len(self._blocks) > self.max_blocks:
+                self._blocks.popitem(last=False)
+        else:
+            self._blocks.move_to_end(block_no)
+        return block[pos] if pos < len(block) else None
+
+    # ------------------------------------------------------------------
+    # 展開 / 折りたたみ
+    # ------------------------------------------------------------------
+    def is_expanded(self, parent_index: int) -> bool:
+        return parent_index in self._children
+
+    def expanded(self) -> Dict[int, List[Tuple]]:
+        """
+        展開中の {親の番号: 子行}（再読込後に開き直す用。親行は取り直さない）
+        """
+        return {p: list(self._children[p]) for p in self._order}
+
+    def expand(self, parent_index: int, children: List[Tuple]):
+        if parent_index not in self._children:
+            self._order.append(parent_index)
+            self._order.sort()
+        self._children[parent_index] = list(children)
+
+    def collapse(self, parent_index: int):
+        if self._children.pop(parent_index, None) is not None:
+            self._order.remove(parent_index)
+
+    # ------------------------------------------------------------------
+    # 表示の行番号 ⇔ 親 / 子
+    # ------------------------------------------------------------------
+    def locate(self, index: int) -> Tuple[int, Optional[int]]:
+        """
+        表示の行番号 → (親の番号, 子の位置)。親行なら子の位置は None
+        """
+        extra = 0
+        for p in self._order:
+            start = p + extra           # 親 p の表示位置
+            if index <= start:
+                break
+            size = len(self._children[p])
+            if index <= start + size:
+                return p, index - start - 1
+            extra += size
+        return index - extra, None
+
+    def display_index(self, parent_index: int) -> int:
+        """
+        親の番号 → 表示の行番号
+        """
+        return parent_index + sum(len(self._children[p]) for p in self._order if p < parent_index)
+
+    def __call__(self, offset: int, limit: int) -> List[TreeItem]:
+        items: List[TreeItem] = []
+        index = offset
+        total = self.count
+        while len(items) < limit and index < total:
+            parent_index, child_pos = self.locate(index)
+            if child_pos is None:
+                row = self.parent(parent_index)
+                if row is None:
+                    break
+                items.append(TreeItem(0, row, parent_index in self._children))
+                index += 1
+            else:
+                children = self._children[parent_index][child_pos:child_pos + limit - len(items)]
+                items.extend(TreeItem(1, row, False) for row in children)
+                index += len(children)
+        return items
@@ -0,0 +1,296 @@
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Tuple
+
+from db_pool import ConnectionPool
+
+
+# ------------------------------------------------------------------
+# PDF の存在確認キャッシュ（db_migrations の版 5 で作成）
+# ・pdf_path ごとに 存在 / サイズ / 更新日時 / 確認日時
+# ・確認から ttl 秒以内の行は再確認しない
+# ・present = 0 の行だけ部分索引（一覧の「ファイルなし」表示用）
+# ------------------------------------------------------------------
+PDF_AVAILABILITY_DDL = """
+CREATE TABLE IF NOT EXISTS pdf_availability (
+    pdf_path    TEXT PRIMARY KEY,
+    present     INTEGER NOT NULL,
+    size        INTEGER,
+    mtime       REAL,
+    checked_at  REAL NOT NULL
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_pdf_availability_missing
+    ON pdf_availability (pdf_path) WHERE present = 0;
+"""
+
+_QUEUE_DDL = """
+CREATE TEMP TABLE IF NOT EXISTS pdf_scan_queue (
+    pdf_path TEXT PRIMARY KEY
+) WITHOUT ROWID
+"""
+
+_UPSERT = """
+INSERT INTO pdf_availability (pdf_path, present, size, mtime, checked_at)
+VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (pdf_path) DO UPDATE SET
+    present = excluded.present,
+    size = excluded.size,
+    mtime = excluded.mtime,
+    checked_at = excluded.checked_at
+"""
+
+# 一覧で「ファイルなし」の行に付けるタグと文字色
+MISSING_TAG = "missing"
+MISSING_FOREGROUND = "#C62828"
+
+StatResult = Tuple[str, int, Optional[int], Optional[float], float]
+
+
+def stat_pdf(path: str) -> Optional[StatResult]:
+    """
+    1 ファイルの存在確認
+
+    Returns:
+        (pdf_path, present, size, mtime, checked_at)
+        共有に届かない等で判定できない場合は None（キャッシュに残さない）
+    """
+    checked_at = time.time()
+    try:
+        st = os.stat(path)
+    except (FileNotFoundError, NotADirectoryError):
+        return (path, 0, None, None, checked_at)
+    except OSError:
+        return None
+    return (path, 1, st.st_size, st.st_mtime, checked_at)
+
+
+class PdfAvailability:
+    """
+    全 Edition の pdf_path をバックグラウンドで確認し、結果を DB に保持する
+
+    ・stat はスレッドプール（workers 本）で並行に実行
+      （ネットワーク共有は 1 件ごとの待ちが長いため、並列度で稼ぐ）
+    ・確認対象は未確認 / ttl 切れの pdf_path のみ（一時表に積んで batch_size 件ずつ）
+    ・DB への書込みは走査スレッドのみ、batch_size 件ごとに commit
+    ・画面側は missing（present = 0 の pdf_path 集合）で行に印を付け、
+      watch() で走査の区切りごとに再描画する
+    """
+
+    def __init__(
+        self,
+        db,
+        workers: int = 32,
+        ttl: float = 3600.0,
+        batch_size: int = 5000
+    ):
+        self.db = db
+        self.pool: ConnectionPool = db.pool
+        self.workers = workers
+        self.ttl = ttl
+        self.batch_size = batch_size
+
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._missing: FrozenSet[str] = frozenset()
+
+        # missing が変わるたびに増える（watch() が再描画の要否を判定）
+        self.generation = 0
+        self.last_result: Dict[str, float] = {}
+
+    # ------------------------------------------------------------------
+    # 参照（メインスレッドから：DB へは行かない）
+    # ------------------------------------------------------------------
+    @property
+    def missing(self) -> FrozenSet[str]:
+        return self._missing
+
+    def is_missing(self, pdf_path: Optional[str]) -> bool:
+        return bool(pdf_path) and pdf_path in self._missing
+
+    def row_tags(self, pdf_path: Optional[str], *tags: str) -> Tuple[str, ...]:
+        """
+        一覧の行タグ（ファイルなしなら MISSING_TAG を足す）
+        """
+        return tags + (MISSING_TAG,) if self.is_missing(pdf_path) else tags
+
+    @property
+    def running(self) -> bool:
+        thread = self._thread
+        return thread is not None and thread.is_alive()
+
+    # ------------------------------------------------------------------
+    # 走査
+    # ------------------------------------------------------------------
+    def load_missing(self) -> FrozenSet[str]:
+        """
+        キャッシュ表から「ファイルなし」の pdf_path を読み直す
+
+        キャッシュ表（版 5）が無い DB では SchemaOutdatedError（_run では印なしで続行）
+        """
+        self.db.require_schema(5)
+        with self.pool.connection() as conn:
+            rows = conn.execute(
+                "SELECT pdf_path FROM pdf_availability WHERE present = 0"
+            ).fetchall()
+        missing = frozenset(r[0] for r in rows)
+        with self._lock:
+            if missing != self._missing:
+                self._missing = missing
+                self.generation += 1
+        return missing
+
+    def _queue_stale(self, conn) -> int:
+        """
+        未確認 / ttl 切れの pdf_path を一時表へ積み、件数を返す
+        """
+        conn.execute(_QUEUE_DDL)
+        conn.execute("DELETE FROM temp.pdf_scan_queue")
+        conn.execute(
+            """
+            INSERT OR IGNORE INTO temp.pdf_scan_queue (pdf_path)
+            SELECT e.pdf_path
+            FROM Document_Edition_Master AS e
+            LEFT JOIN pdf_availability AS a ON a.pdf_path = e.pdf_path
+            WHERE e.pdf_path IS NOT NULL AND e.pdf_path <> ''
+              AND (a.pdf_path IS NULL OR a.checked_at < ?)
+            """,
+            (time.time() - self.ttl,)
+        )
+        return conn.execute("SELECT COUNT(*) FROM temp.pdf_scan_queue").fetchone()[0]
+
+    def _batches(self, conn) -> Iterable[List[str]]:
+        last = ""
+        while True:
+            batch = [
+                r[0] for r in conn.execute(
+                    "SELECT pdf_path FROM temp.pdf_scan_queue WHERE pdf_path > ?"
+                    " ORDER BY pdf_path LIMIT ?",
+                    (last, self.batch_size)
+                )
+            ]
+            if not batch:
+                return
+            yield batch
+            last = batch[-1]
+
+    def scan(
+        self,
+        paths: Optional[Iterable[str]] = None,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, float]:
+        """
+        存在確認を実行して結果を保存（呼び出したスレッドで完了まで待つ）
+
+        Args:
+            paths: 確認する pdf_path（省略時は未確認 / ttl 切れの全件）
+            progress: progress(確認済み件数, 対象件数)
+
+        Returns:
+            {"total", "checked", "missing", "unreachable", "elapsed"}
+        """
+        self.db.require_schema(5)
+        started = time.perf_counter()
+        counts = {"total": 0, "checked": 0, "missing": 0, "unreachable": 0}
+
+        # 一時表は接続ごとのため、走査の間は同じ接続を持ち続ける
+        # （書込みは batch ごとに commit して、ロックを長く持たない）
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf-stat") as executor, \
+                self.pool.connection() as conn:
+            if paths is None:
+                counts["total"] = self._queue_stale(conn)
+                conn.commit()
+                batches = self._batches(conn)
+            else:
+                paths = sorted({p for p in paths if p})
+                counts["total"] = len(paths)
+                batches = (
+                    paths[i:i + self.batch_size]
+                    for i in range(0, len(paths), self.batch_size)
+                )
+
+            for batch in batches:
+                results = [r for r in executor.map(stat_pdf, batch) if r is not None]
+                conn.executemany(_UPSERT, results)
+                conn.commit()
+
+                counts["checked"] += len(batch)
+                counts["unreachable"] += len(batch) - len(results)
+                counts["missing"] += sum(1 for r in results if not r[1])
+                if progress is not None:
+                    progress(counts["checked"], counts["total"])
+
+        self.load_missing()
+        counts["elapsed"] = time.perf_counter() - started
+        self.last_result = counts
+        return counts
+
+    def start(self) -> bool:
+        """
+        バックグラウンドで キャッシュ読込 → 走査 を開始（実行中なら何もしない）
+
+        Returns:
+            新たに開始したら True
+        """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return False
+            self._thread = threading.Thread(target=self._run, name="pdf-availability", daemon=True)
+            self._thread.start()
+            return True
+
+    def _run(self):
+        try:
+            self.load_missing()     # 前回までの結果をまず表示に反映
+            self.scan()
+        except Exception as e:
+            print(f"[pdf_availability] エラー: {e}")
+
+    # ------------------------------------------------------------------
+    # 画面への通知（Tk メインスレッドでポーリング）
+    # ------------------------------------------------------------------
+    def watch(self, widget, callback: Callable[[], None], poll_ms: int = 300):
+        """
+        走査中は poll_ms ごとに確認し、missing が変わったら callback() を呼ぶ
+        （走査が終われば止まる。Tk の呼び出しはメインスレッドのみ）
+        """
+        seen = self.generation
+
+        def check():
+            nonlocal seen
+            try:
+                if not widget.winfo_exists():
+                    return
+            except Exception:
+                return
+            if self.generation != seen:
+                seen = self.generation
+                callback()
+            if self.running:
+                widget.after(poll_ms, check)
+
+        widget.after(poll_ms, check)
+
+
+# ------------------------------------------------------------------
+# DB ごとに 1 つ（launcher のタブ間で共有し、走査も 1 回で済ませる）
+# ------------------------------------------------------------------
+_scanners: Dict[str, PdfAvailability] = {}
+_scanners_lock = threading.Lock()
+
+
+def get_availability(db) -> PdfAvailability:
+    """
+    db（DocumentInfo）の DB に対する PdfAvailability を返す
+
+    サービス経由（doc_service.DocumentServiceClient。pool なし）の場合は、
+    走査はサービス側に任せて結果だけを受け取るものを返す
+    """
+    with _scanners_lock:
+        scanner = _scanners.get(db.db_path)
+        if scanner is None:
+            scanner = PdfAvailability(db) if db.pool is not None else db.create_availability()
+            _scanners[db.db_path] = scanner
+        return scanner
@@ -0,0 +1,400 @@
+import hashlib
+import os
+import sqlite3
+import stat
+import tempfile
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Optional, Tuple
+
+
+# ------------------------------------------------------------------
+# PDF のローカルキャッシュ（内容アドレス方式）
+# ・実体は objects/<sha256 先頭 2 文字>/<sha256>.pdf（同じ内容は 1 つだけ持つ）
+# ・共有上のパス → 内容のハッシュ の対応は index.db（ローカルの SQLite）
+# ・共有上のファイルの size / mtime が記録と同じなら読み直さない
+#   （変わっていれば読み直してハッシュを取り直す）
+# ・合計サイズが max_bytes を超えたら、最後に使われたのが古い実体から削除（LRU）
+# ------------------------------------------------------------------
+DEFAULT_CACHE_DIR = os.path.join(
+    os.environ.get("LOCALAPPDATA") or os.path.join(os.path.expanduser("~"), ".cache"),
+    "document_master",
+    "pdf_cache",
+)
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3       # 2GB
+
+# 先読みで埋めるのは上限のこの割合まで（開いた文書の分を空けておく）
+PREFETCH_FILL_RATIO = 0.8
+
+COPY_CHUNK = 1024 * 1024
+
+INDEX_DDL = """
+CREATE TABLE IF NOT EXISTS blobs (
+    digest      TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    last_used   REAL NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_blobs_last_used ON blobs (last_used);
+
+CREATE TABLE IF NOT EXISTS sources (
+    source_path TEXT PRIMARY KEY,
+    size        INTEGER NOT NULL,
+    mtime_ns    INTEGER NOT NULL,
+    digest      TEXT NOT NULL
+);
+
+CREATE INDEX IF NOT EXISTS idx_sources_digest ON sources (digest);
+"""
+
+
+class PdfCache:
+    """
+    共有上の PDF をローカルに保持するキャッシュ
+
+    Args:
+        cache_dir: 保存先（既定は %LOCALAPPDATA%\\document_master\\pdf_cache）
+        max_bytes: 実体の合計サイズ上限
+    """
+
+    def __init__(self, cache_dir: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(
+            os.path.join(cache_dir, "index.db"),
+            check_same_thread=False,
+            isolation_level=None,       # 自動コミット（1 文ずつ確定）
+        )
+        self._conn.execute("PRAGMA journal_mode = WAL")    # ローカルディスクのみ
+        self._conn.execute("PRAGMA synchronous = NORMAL")
+        self._conn.executescript(INDEX_DDL)
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_copied = 0
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _blob_path(self, digest: str) -> str:
+        return os.path.join(self.objects_dir, digest[:2], digest + ".pdf")
+
+    # ------------------------------------------------------------------
+    # 取得
+    # ------------------------------------------------------------------
+    def get(self, source_path: str) -> str:
+        """
+        source_path のローカルコピーのパスを返す（無い / 古ければ共有から複製）
+
+        ・共有へは stat 1 回（size / mtime の照合）。一致すれば読まない
+        ・共有を stat できないときは手元の最終コピーを返す（無ければ例外）
+
+        Raises:
+            OSError: 共有上に無い / 届かず、手元にもコピーが無い
+              （FileNotFoundError を含む）
+        """
+        return self._get(source_path)[0]
+
+    def _get(self, source_path: str) -> Tuple[str, bool]:
+        """
+        Returns:
+            (ローカルのパス, 今回共有から複製したか)
+        """
+        try:
+            st = os.stat(source_path)
+        except OSError:
+            # Windows では不達のサーバ / 共有も FileNotFoundError になるため区別しない
+            local = self._lookup(source_path)
+            if local is None:
+                raise
+            return local, False
+
+        local = self._lookup(source_path, st.st_size, st.st_mtime_ns)
+        if local is not None:
+            with self._lock:
+                self.hits += 1
+            return local, False
+
+        with self._lock:
+            self.misses += 1
+        return self._store(source_path, st), True
+
+    def get_blob(self, source_path: str) -> Tuple[str, str]:
+        """
+        get() と同じだが (ローカルのパス, 内容の sha256) を返す
+        """
+        path = self.get(source_path)
+        return path, os.path.splitext(os.path.basename(path))[0]
+
+    def cached(self, source_path: str) -> bool:
+        """
+        記録上キャッシュ済みか（共有へは問い合わせない）
+        """
+        return self._lookup(source_path) is not None
+
+    def _lookup(
+        self,
+        source_path: str,
+        size: Optional[int] = None,
+        mtime_ns: Optional[int] = None
+    ) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, digest FROM sources WHERE source_path = ?",
+                (source_path,)
+            ).fetchone()
+            if row is None:
+                return None
+            if size is not None and (row[0], row[1]) != (size, mtime_ns):
+                return None
+
+            path = self._blob_path(row[2])
+            if not os.path.exists(path):
+                # 実体が手で消された等：記録も捨てる
+                self._conn.execute("DELETE FROM blobs WHERE digest = ?", (row[2],))
+                self._conn.execute("DELETE FROM sources WHERE digest = ?", (row[2],))
+                return None
+
+            self._conn.execute(
+                "UPDATE blobs SET last_used = ? WHERE digest = ?", (time.time(), row[2])
+            )
+            return path
+
+    def _store(self, source_path: str, st: os.stat_result) -> str:
+        """
+        共有から一時ファイルへ複製しつつハッシュを取り、実体の位置へ移す
+        """
+        digest = hashlib.sha256()
+        fd, tmp_path = tempfile.mkstemp(suffix=".part", dir=self.cache_dir)
+        try:
+            with os.fdopen(fd, "wb") as out, open(source_path, "rb") as src:
+                while True:
+                    chunk = src.read(COPY_CHUNK)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    out.write(chunk)
+            size = os.path.getsize(tmp_path)
+
+            digest = digest.hexdigest()
+            path = self._blob_path(digest)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            if os.path.exists(path):
+                os.remove(tmp_path)             # 同じ内容の実体が既にある
+            else:
+                try:
+                    os.replace(tmp_path, path)
+                except OSError:
+                    # 別スレッド / 別プロセスが同じ内容を先に置いた（Windows では
+                    # 読取専用の実体への置換が PermissionError になる）
+                    if not os.path.exists(path):
+                        raise
+                    os.remove(tmp_path)
+                else:
+                    os.chmod(path, stat.S_IREAD)    # 閲覧ソフトからの上書きを防ぐ
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+        with self._lock:
+            self.bytes_copied += size
+            self._conn.execute(
+                """
+                INSERT INTO blobs (digest, size, last_used) VALUES (?, ?, ?)
+                ON CONFLICT (digest) DO UPDATE SET last_used = excluded.last_used
+                """,
+                (digest, size, time.time())
+            )
+            self._conn.execute(
+                """
+                INSERT INTO sources (source_path, size, mtime_ns, digest) VALUES (?, ?, ?, ?)
+                ON CONFLICT (source_path) DO UPDATE SET
+                    size = excluded.size, mtime_ns = excluded.mtime_ns, digest = excluded.digest
+                """,
+                (source_path, st.st_size, st.st_mtime_ns, digest)
+            )
+            self._evict(keep=digest)
+        return path
+
+    # ------------------------------------------------------------------
+    # 容量管理
+    # ------------------------------------------------------------------
+    def total_bytes(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+
+    def _evict(self, keep: Optional[str] = None):
+        """
+        上限を超えている間、最後に使われたのが古い実体から削除（_lock 保持中に呼ぶ）
+
+        開かれていて消せない実体（Windows）は飛ばす
+        """
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM blobs").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        candidates = self._conn.execute(
+            "SELECT digest, size FROM blobs WHERE digest <> ? ORDER BY last_used",
+            (keep or "",)
+        ).fetchall()
+        for digest, size in candidates:
+            if total <= self.max_bytes:
+                break
+            path = self._blob_path(digest)
+            try:
+                if os.path.exists(path):
+                    os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+                    os.remove(path)
+            except OSError:
+                continue
+            self._conn.execute("DELETE FROM blobs WHERE digest = ?", (digest,))
+            self._conn.execute("DELETE FROM sources WHERE digest = ?", (digest,))
+            total -= size
+            self.evictions += 1
+
+    def clear(self):
+        """
+        キャッシュを全て削除
+        """
+        with self._lock:
+            self._conn.execute("DELETE FROM sources")
+            self._conn.execute("DELETE FROM blobs")
+            for root, _, files in os.walk(self.objects_dir):
+                for name in files:
+                    path = os.path.join(root, name)
+                    try:
+                        os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+                        os.remove(path)
+                    except OSError:
+                        pass
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            blobs, total = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM blobs"
+            ).fetchone()
+            sources = self._conn.execute("SELECT COUNT(*) FROM sources").fetchone()[0]
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "bytes_copied": self.bytes_copied,
+                "sources": sources,
+                "blobs": blobs,
+                "total_bytes": total,
+                "max_bytes": self.max_bytes,
+            }
+
+    # ------------------------------------------------------------------
+    # 先読み
+    # ------------------------------------------------------------------
+    def prefetch(
+        self,
+        paths: Iterable[str],
+        workers: int = 4,
+        skip: Optional[Callable[[str], bool]] = None,
+        progress: Optional[Callable[[int], None]] = None
+    ) -> Dict[str, int]:
+        """
+        paths を順にキャッシュへ取り込む（呼び出したスレッドで完了まで待つ）
+
+        ・取り込みは上限の PREFETCH_FILL_RATIO まで（先読みで LRU を回さない）
+        ・共有の負荷を抑えるため並列は workers 本まで
+        ・skip(path) が True のもの（存在しないと分かっているもの等）は飛ばす
+
+        Returns:
+            {"checked", "copied", "failed", "skipped"}
+        """
+        limit = self.max_bytes * PREFETCH_FILL_RATIO
+        counts = {"checked": 0, "copied": 0, "failed": 0, "skipped": 0}
+
+        def warm(path: str) -> str:
+            if skip is not None and skip(path):
+                return "skipped"
+            try:
+                return "copied" if self._get(path)[1] else "checked"
+            except OSError:
+                return "failed"
+
+        if self.total_bytes() >= limit:
+            return counts
+
+        # 投入は workers * 2 件まで（paths が多くても Future を溜めない）
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-prefetch") as executor:
+            pending = deque()
+            for path in paths:
+                if not path:
+                    continue
+                pending.append(executor.submit(warm, path))
+                if len(pending) < workers * 2:
+                    continue
+                counts[pending.popleft().result()] += 1
+                if progress is not None:
+                    progress(sum(counts.values()))
+                if self.total_bytes() >= limit:
+                    break
+            for future in pending:
+                counts[future.result()] += 1
+        return counts
+
+
+# ------------------------------------------------------------------
+# プロセスで共有するキャッシュ / 最新版の先読み
+# ------------------------------------------------------------------
+_cache: Optional[PdfCache] = None
+_prefetch_threads: Dict[str, threading.Thread] = {}
+_lock = threading.Lock()
+
+
+def get_pdf_cache() -> PdfCache:
+    """
+    既定のキャッシュ（環境変数 DOCDB_PDF_CACHE_DIR / DOCDB_PDF_CACHE_MB で変更可）
+    """
+    global _cache
+    with _lock:
+        if _cache is None:
+            cache_dir = os.environ.get("DOCDB_PDF_CACHE_DIR", DEFAULT_CACHE_DIR)
+            max_mb = os.environ.get("DOCDB_PDF_CACHE_MB")
+            max_bytes = int(max_mb) * 1024 ** 2 if max_mb else DEFAULT_MAX_BYTES
+            _cache = PdfCache(cache_dir, max_bytes)
+        return _cache
+
+
+def start_prefetch(db, availability=None) -> bool:
+    """
+    db（DocumentInfo）の最新版（edition_status = 0）の PDF をバックグラウンドで先読み
+
+    ・DB ごとに 1 本（実行中なら何もしない）
+    ・availability（PdfAvailability）を渡すと、ファイルなしと分かっているものは飛ばす
+
+    Returns:
+        新たに開始したら True
+    """
+    def run():
+        try:
+            # 先に pdf_path だけ読み切る（先読みの間、共有 DB の読込ロックを持たない）
+            paths = [row[5] for row in db.iter_latest_documents()]
+            skip = availability.is_missing if availability is not None else None
+            get_pdf_cache().prefetch(paths, skip=skip)
+        except Exception as e:
+            print(f"[pdf_cache] 先読みエラー: {e}")
+
+    with _lock:
+        thread = _prefetch_threads.get(db.db_path)
+        if thread is not None and thread.is_alive():
+            return False
+        thread = threading.Thread(target=run, name="pdf-prefetch", daemon=True)
+        _prefetch_threads[db.db_path] = thread
+        thread.start()
+        return True
@@ -0,0 +1,277 @@
+import os
+import queue
+import threading
+import tkinter as tk
+from concurrent.futures import Future, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+from pdf_cache import DEFAULT_CACHE_DIR, PdfCache, get_pdf_cache
+
+try:
+    import pymupdf as fitz
+except ImportError:  # プレビューを使わない端末では未導入でもよい
+    fitz = None
+
+
+# ------------------------------------------------------------------
+# PDF 1 ページ目のサムネイル
+# ・PDF はローカルキャッシュ（pdf_cache）経由で読み、ラスタライズは別プロセス
+#   （PyMuPDF はスレッド並列に対応しないため）
+# ・画像は (edition_id, PDF の sha256) ごとに PNG でディスクに保持
+#   → 同じ版でも PDF が差し替われば作り直す
+# ・Tk へはキュー経由（after ポーリング）で渡し、メインスレッドは待たない
+# ------------------------------------------------------------------
+THUMB_WIDTH = 360
+DEFAULT_THUMB_DIR = os.path.join(os.path.dirname(DEFAULT_CACHE_DIR), "thumbnails")
+MAX_THUMBNAILS = 5000
+
+
+# ------------------------------------------------------------------
+# ワーカープロセス側（トップレベル関数であること：Windows の spawn 対策）
+# ------------------------------------------------------------------
+def render_first_page(pdf_path: str, out_path: str, width: int) -> str:
+    """
+    pdf_path の 1 ページ目を幅 width の PNG として out_path へ保存
+    """
+    doc = fitz.open(pdf_path)
+    try:
+        page = doc.load_page(0)
+        zoom = width / page.rect.width
+        pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+        data = pixmap.tobytes("png")
+    finally:
+        doc.close()
+
+    tmp_path = f"{out_path}.{os.getpid()}.part"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, out_path)
+    return out_path
+
+
+class ThumbnailRenderer:
+    """
+    サムネイルの作成とディスクキャッシュ（Tk に依存しない）
+
+    ・request() は Future を返す（結果は PNG のパス）
+    ・同じ edition_id の要求が実行待ち / 実行中なら同じ Future を返す
+    ・discard_except() で、不要になった実行待ちの要求を取り消す
+      （矢印キーで素早く移動したとき、通り過ぎた行を描かない）
+    """
+
+    def __init__(
+        self,
+        pdf_cache: Optional[PdfCache] = None,
+        thumb_dir: str = DEFAULT_THUMB_DIR,
+        width: int = THUMB_WIDTH,
+        workers: int = 2,
+        max_thumbnails: int = MAX_THUMBNAILS
+    ):
+        self.pdf_cache = pdf_cache
+        self.thumb_dir = thumb_dir
+        self.width = width
+        self.workers = workers
+        self.max_thumbnails = max_thumbnails
+        os.makedirs(thumb_dir, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._jobs: Dict[int, Future] = {}
+        self._threads = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="pdf-preview")
+        self._processes: Optional[ProcessPoolExecutor] = None
+        self._rendered = 0
+
+    @property
+    def available(self) -> bool:
+        return fitz is not None
+
+    def thumb_path(self, edition_id: int, digest: str) -> str:
+        return os.path.join(self.thumb_dir, f"{edition_id}_{digest[:16]}_{self.width}.png")
+
+    def request(self, edition_id: int, pdf_path: str) -> Future:
+        with self._lock:
+            future = self._jobs.get(edition_id)
+            if future is not None and not future.cancelled():
+                return future
+            future = self._threads.submit(self._render, edition_id, pdf_path)
+            self._jobs[edition_id] = future
+        future.add_done_callback(lambda f: self._forget(edition_id, f))
+        return future
+
+    def discard_except(self, keep: Iterable[int]):
+        keep = set(keep)
+        with self._lock:
+            for edition_id, future in list(self._jobs.items()):
+                if edition_id not in keep and future.cancel():
+                    del self._jobs[edition_id]
+
+    def _forget(self, edition_id: int, future: Future):
+        with self._lock:
+            if self._jobs.get(edition_id) is future:
+                del self._jobs[edition_id]
+
+    def _render(self, edition_id: int, pdf_path: str) -> str:
+        cache = self.pdf_cache or get_pdf_cache()
+        local_path, digest = cache.get_blob(pdf_path)
+        out_path = self.thumb_path(edition_id, digest)
+        try:
+            os.utime(out_path)      # 表示した時刻にする（_prune が最近見ていないものから消す）
+            return out_path
+        except FileNotFoundError:
+            pass
+
+        with self._lock:
+            if self._processes is None:
+                self._processes = ProcessPoolExecutor(max_workers=self.workers)
+            processes = self._processes
+        processes.submit(render_first_page, local_path, out_path, self.width).result()
+
+        with self._lock:
+            self._rendered += 1
+            prune = self._rendered % 100 == 0
+        if prune:
+            self._prune()
+        return out_path
+
+    def _prune(self):
+        """
+        max_thumbnails を超えた分を最後に表示した時刻（mtime）の古いものから削除
+        """
+        entries = []
+        for entry in os.scandir(self.thumb_dir):
+            if entry.is_file() and entry.name.endswith(".png"):
+                entries.append((entry.stat().st_mtime, entry.path))
+        entries.sort()
+        for _, path in entries[:max(0, len(entries) - self.max_thumbnails)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def shutdown(self):
+        self._threads.shutdown(wait=False, cancel_futures=True)
+        if self._processes is not None:
+            self._processes.shutdown(wait=False, cancel_futures=True)
+
+
+_renderer: Optional[ThumbnailRenderer] = None
+_renderer_lock = threading.Lock()
+
+
+def get_renderer() -> ThumbnailRenderer:
+    """
+    プロセスで共有するサムネイル作成（launcher のタブ間で共有）
+    """
+    global _renderer
+    with _renderer_lock:
+        if _renderer is None:
+            _renderer = ThumbnailRenderer()
+        return _renderer
+
+
+# ------------------------------------------------------------------
+# プレビュー欄（Tk）
+# ------------------------------------------------------------------
+class PreviewPane(tk.Frame):
+    """
+    選択中の版の 1 ページ目を表示する欄
+
+    show(edition_id, pdf_path, neighbours) で表示を切り替える
+    ・選択行を最初に、続いて neighbours（前後の行）を先読みとして要求
+    ・結果が届いた時点で選択が変わっていれば表示しない（先読み分はディスクに残る）
+    """
+
+    def __init__(
+        self,
+        master: tk.Misc,
+        renderer: Optional[ThumbnailRenderer] = None,
+        width: int = THUMB_WIDTH,
+        poll_ms: int = 50
+    ):
+        super().__init__(master, width=width + 20)
+        self.renderer = renderer or get_renderer()
+        self.poll_ms = poll_ms
+
+        self._current: Optional[int] = None
+        self._image: Optional[tk.PhotoImage] = None
+        self._results: "queue.Queue" = queue.Queue()
+        self._waiting = 0
+        self._polling = False
+
+        self.caption = tk.Label(self, text="", fg="#666666", anchor="w")
+        self.caption.pack(fill=tk.X, padx=5, pady=(5, 0))
+        self.image_label = tk.Label(self, bg="#FFFFFF", relief=tk.SUNKEN)
+        self.image_label.pack(fill=tk.BOTH, expand=True, padx=5, pady=5)
+
+    def clear(self, message: str = ""):
+        self._current = None
+        self._image = None
+        self.image_label.config(image="")
+        self.caption.config(text=message)
+
+    def show(
+        self,
+        edition_id: int,
+        pdf_path: Optional[str],
+        neighbours: Iterable[Tuple[int, Optional[str]]] = ()
+    ):
+        """
+        Args:
+            pdf_path: None なら「PDF なし」
+            neighbours: 先読みする (edition_id, pdf_path)（近い順）
+        """
+        if edition_id == self._current:
+            return
+        if not pdf_path:
+            self.clear("PDF がありません")
+            return
+        if not self.renderer.available:
+            self.clear("プレビューには PyMuPDF が必要です（pip install pymupdf）")
+            return
+
+        self._current = edition_id
+        self.caption.config(text="プレビュー作成中…")
+
+        neighbours = [(e, p) for e, p in neighbours if p]
+        self.renderer.discard_except([edition_id] + [e for e, _ in neighbours])
+
+        self._watch(edition_id, self.renderer.request(edition_id, pdf_path))
+        for neighbour_id, neighbour_path in neighbours:
+            self.renderer.request(neighbour_id, neighbour_path)
+
+    # ------------------------------------------------------------------
+    # 結果受け取り（メインスレッド）
+    # ------------------------------------------------------------------
+    def _watch(self, edition_id: int, future: Future):
+        self._waiting += 1
+        future.add_done_callback(lambda f: self._results.put((edition_id, f)))
+        if not self._polling:
+            self._polling = True
+            self.after(self.poll_ms, self._poll)
+
+    def _poll(self):
+        try:
+            while True:
+                edition_id, future = self._results.get_nowait()
+                self._waiting -= 1
+                if edition_id != self._current or future.cancelled():
+                    continue
+                self._display(future)
+        except queue.Empty:
+            pass
+        if self._waiting > 0:
+            self.after(self.poll_ms, self._poll)
+        else:
+            self._polling = False
+
+    def _display(self, future: Future):
+        try:
+            path = future.result()
+            self._image = tk.PhotoImage(file=path)
+        except FileNotFoundError:
+            self.clear("PDF がありません")
+            return
+        except Exception as e:
+            self.clear(f"プレビューを作成できません: {e}")
+            return
+        self.image_label.config(image=self._image)
+        self.caption.config(text="")
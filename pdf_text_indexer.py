@@ -0,0 +1,284 @@
+import argparse
+import hashlib
+import io
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+from db_pool import get_pool
+from db_migrations import migrate
+
+try:
+    from pypdf import PdfReader
+except ImportError:  # 本文検索を使わない端末では未導入でもよい
+    PdfReader = None
+
+
+# ------------------------------------------------------------------
+# ワーカープロセス側（トップレベル関数であること：Windows の spawn 対策）
+# ------------------------------------------------------------------
+def _extract_text(data: bytes) -> str:
+    reader = PdfReader(io.BytesIO(data))
+    pages = []
+    for page in reader.pages:
+        pages.append(page.extract_text() or "")
+    return "\n".join(pages)
+
+
+def _index_one(job: Tuple) -> Tuple:
+    """
+    1 Edition 分の PDF を確認し、必要なら本文を抽出
+
+    Returns:
+        (edition_id, result, pdf_path, mtime, size, hash, text_or_error)
+        result: "unchanged" / "touched" / "indexed" / "error"
+    """
+    edition_id, pdf_path, prev_mtime, prev_size, prev_hash = job
+    try:
+        st = os.stat(pdf_path)
+        if st.st_mtime == prev_mtime and st.st_size == prev_size:
+            return (edition_id, "unchanged", pdf_path, st.st_mtime, st.st_size, prev_hash, None)
+
+        with open(pdf_path, "rb") as f:
+            data = f.read()
+        content_hash = hashlib.sha256(data).hexdigest()
+
+        # mtime だけ変わった（コピーし直し等）場合は抽出不要
+        if content_hash == prev_hash:
+            return (edition_id, "touched", pdf_path, st.st_mtime, st.st_size, content_hash, None)
+
+        text = _extract_text(data)
+        return (edition_id, "indexed", pdf_path, st.st_mtime, st.st_size, content_hash, text)
+
+    except Exception as e:
+        return (edition_id, "error", pdf_path, None, None, None, f"{type(e).__name__}: {e}")
+
+
+class PdfTextIndexer:
+    """
+    Edition の PDF 本文を edition_pdf_text（FTS5）へ投入するインデクサ
+
+    ・mtime / size が変わった Edition のみ再確認し、
+      内容ハッシュも変わったものだけ本文を再抽出（差分索引）
+    ・stat / 読込 / 抽出はプロセスプールで並列実行
+    ・DB への書込みはメイン側で batch_size 件ずつ 1 トランザクション
+    """
+
+    def __init__(
+        self,
+        db_path: str,
+        workers: Optional[int] = None,
+        batch_size: int = 200,
+    ):
+        if PdfReader is None:
+            raise RuntimeError("PDF 本文索引には pypdf が必要です（pip install pypdf）")
+
+        self.db_path = db_path
+        self.pool = get_pool(db_path)
+        self.workers = workers
+        self.batch_size = batch_size
+        self._thread: Optional[threading.Thread] = None
+
+    # ------------------------------------------------------------------
+    # 対象 Edition の列挙
+    # ------------------------------------------------------------------
+    def _pending_jobs(self, full: bool) -> List[Tuple]:
+        sql = """
+        SELECT
+            e.edition_id,
+            e.pdf_path,
+            s.file_mtime,
+            s.file_size,
+            s.content_hash
+        FROM Document_Edition_Master AS e
+        LEFT JOIN edition_pdf_index_state AS s
+            ON s.edition_id = e.edition_id
+           AND s.pdf_path = e.pdf_path
+        WHERE e.pdf_path IS NOT NULL
+          AND e.pdf_path <> ''
+        ORDER BY e.edition_id
+        """
+        with self.pool.connection() as conn:
+            migrate(conn)
+            rows = conn.execute(sql).fetchall()
+
+        if full:
+            return [(r[0], r[1], None, None, None) for r in rows]
+        return rows
+
+    def _remove_orphans(self):
+        """
+        Edition 削除 / PDF パス未設定になった分を索引から除く
+        """
+        with self.pool.connection() as conn:
+            conn.execute(
+                """
+                DELETE FROM edition_pdf_text
+                WHERE rowid NOT IN (
+                    SELECT edition_id FROM Document_Edition_Master
+                    WHERE pdf_path IS NOT NULL AND pdf_path <> ''
+                )
+                """
+            )
+            conn.execute(
+                """
+                DELETE FROM edition_pdf_index_state
+                WHERE edition_id NOT IN (
+                    SELECT edition_id FROM Document_Edition_Master
+                    WHERE pdf_path IS NOT NULL AND pdf_path <> ''
+                )
+                """
+            )
+
+    # ------------------------------------------------------------------
+    # 書込み
+    # ------------------------------------------------------------------
+    def _write_batch(self, results: List[Tuple]):
+        """
+        ワーカーの結果を 1 トランザクションで書き込む
+
+        エラー時は error 列だけを更新し、既存の本文と mtime / size / hash は残す
+        （共有フォルダの一時的な不達で索引が消えないように。本文の削除は
+        _remove_orphans のみが行う）
+        """
+        now = datetime.now().isoformat(timespec="seconds")
+        with self.pool.connection() as conn:
+            for edition_id, result, pdf_path, mtime, size, content_hash, payload in results:
+                if result == "unchanged":
+                    # 以前のエラーが解消していれば消しておく
+                    conn.execute(
+                        "UPDATE edition_pdf_index_state SET error = NULL "
+                        "WHERE edition_id = ? AND error IS NOT NULL",
+                        (edition_id,)
+                    )
+                    continue
+
+                if result == "error":
+                    conn.execute(
+                        """
+                        INSERT INTO edition_pdf_index_state
+                            (edition_id, pdf_path, indexed_at, error)
+                        VALUES (?, ?, ?, ?)
+                        ON CONFLICT (edition_id) DO UPDATE SET
+                            error = excluded.error
+                        """,
+                        (edition_id, pdf_path, now, payload)
+                    )
+                    continue
+
+                if result == "indexed":
+                    conn.execute("DELETE FROM edition_pdf_text WHERE rowid = ?", (edition_id,))
+                    conn.execute(
+                        "INSERT INTO edition_pdf_text (rowid, body) VALUES (?, ?)",
+                        (edition_id, payload)
+                    )
+
+                conn.execute(
+                    """
+                    INSERT INTO edition_pdf_index_state
+                        (edition_id, pdf_path, file_mtime, file_size, content_hash, indexed_at, error)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ON CONFLICT (edition_id) DO UPDATE SET
+                        pdf_path = excluded.pdf_path,
+                        file_mtime = excluded.file_mtime,
+                        file_size = excluded.file_size,
+                        content_hash = excluded.content_hash,
+                        indexed_at = excluded.indexed_at,
+                        error = excluded.error
+                    """,
+                    (
+                        edition_id,
+                        pdf_path,
+                        mtime,
+                        size,
+                        content_hash,
+                        now,
+                        None,
+                    )
+                )
+
+    # ------------------------------------------------------------------
+    # 実行
+    # ------------------------------------------------------------------
+    def run(
+        self,
+        full: bool = False,
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, int]:
+        """
+        索引を更新して件数集計を返す
+
+        Args:
+            full: True で mtime / hash を無視して全件再抽出
+            progress: (処理済み件数, 対象件数) を受け取るコールバック
+        """
+        jobs = self._pending_jobs(full)
+        counts = {"unchanged": 0, "touched": 0, "indexed": 0, "error": 0}
+
+        batch: List[Tuple] = []
+        done = 0
+        with ProcessPoolExecutor(max_workers=self.workers) as executor:
+            for result in executor.map(_index_one, jobs, chunksize=8):
+                counts[result[1]] += 1
+                batch.append(result)
+                done += 1
+
+                if len(batch) >= self.batch_size:
+                    self._write_batch(batch)
+                    batch = []
+                if progress is not None:
+                    progress(done, len(jobs))
+
+        if batch:
+            self._write_batch(batch)
+
+        self._remove_orphans()
+        return counts
+
+    def start_background(
+        self,
+        full: bool = False,
+        on_done: Optional[Callable[[Dict[str, int]], None]] = None
+    ) -> threading.Thread:
+        """
+        別スレッドで run() を実行（GUI から呼ぶ場合）
+
+        on_done はワーカースレッドから呼ばれる点に注意
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+
+        def target():
+            counts = self.run(full=full)
+            if on_done is not None:
+                on_done(counts)
+
+        self._thread = threading.Thread(target=target, name="pdf-text-indexer", daemon=True)
+        self._thread.start()
+        return self._thread
+
+
+def main():
+    parser = argparse.ArgumentParser(description="PDF 本文の全文検索インデックスを更新")
+    parser.add_argument("db_path", nargs="?", default=r"C:\DataBase\document_master.db")
+    parser.add_argument("--workers", type=int, default=None, help="抽出プロセス数")
+    parser.add_argument("--full", action="store_true", help="全件を再抽出する")
+    args = parser.parse_args()
+
+    indexer = PdfTextIndexer(args.db_path, workers=args.workers)
+
+    def progress(done, total):
+        if done % 100 == 0 or done == total:
+            print(f"{done}/{total}")
+
+    counts = indexer.run(full=args.full, progress=progress)
+    print(
+        f"索引 {counts['indexed']} 件 / 変更なし {counts['unchanged'] + counts['touched']} 件"
+        f" / エラー {counts['error']} 件"
+    )
+
+
+if __name__ == "__main__":
+    main()
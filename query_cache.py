@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, Tuple
+
+
+MISSING = object()
+
+
+class VersionedLRUCache:
+    """
+    DB の更新検知付き LRU キャッシュ
+
+    ・上限 maxsize 件、超えたら最も古く使われたものから破棄
+    ・DB が更新されたときだけ全体を無効化する
+        - 他接続（他端末・他スレッド）のコミット : PRAGMA data_version の変化
+        - 同じ接続でのコミット               : ConnectionPool.write_generation の変化
+    ・data_version は接続ごとの値なので、接続ごとに前回値を覚えて比較する
+    ・確認は接続ごとに check_interval 秒に 1 回まで（連続参照時の問い合わせを省く）
+    """
+
+    def __init__(self, maxsize: int = 2048, check_interval: float = 0.5):
+        self.maxsize = maxsize
+        self.check_interval = check_interval
+
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._seen: Dict[int, Tuple[int, int]] = {}      # 接続 id → (data_version, generation)
+        self._checked_at: Dict[int, float] = {}
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    # ------------------------------------------------------------------
+    # 更新検知
+    # ------------------------------------------------------------------
+    def needs_check(self, conn_id: int, generation: int) -> bool:
+        """
+        自プロセスの書込みがあった / 前回確認から check_interval 秒経過 → True
+        """
+        seen = self._seen.get(conn_id)
+        if seen is None or seen[1] != generation:
+            return True
+        checked_at = self._checked_at.get(conn_id, 0.0)
+        return time.monotonic() - checked_at >= self.check_interval
+
+    def validate(self, conn_id: int, data_version: int, generation: int):
+        """
+        接続 conn_id から見た DB の版を渡し、変わっていれば全体を無効化
+        （初めて見る接続は基準が無いので無効化しておく）
+        """
+        version = (data_version, generation)
+        with self._lock:
+            self._checked_at[conn_id] = time.monotonic()
+            if self._seen.get(conn_id) != version:
+                self._seen[conn_id] = version
+                if self._data:
+                    self._data.clear()
+                    self.invalidations += 1
+
+    # ------------------------------------------------------------------
+    # 取得 / 登録
+    # ------------------------------------------------------------------
+    def get(self, key: Hashable, default: Any = MISSING) -> Any:
+        with self._lock:
+            value = self._data.get(key, MISSING)
+            if value is MISSING:
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key: Hashable, value: Any):
+        with self._lock:
+            self._data[key] = value
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
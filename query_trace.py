@@ -0,0 +1,472 @@
+import logging
+import logging.handlers
+import math
+import os
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter, deque
+from typing import Any, Dict, List, Optional
+
+import db_pool
+
+
+# ------------------------------------------------------------------
+# 問い合わせの計測（既定では無効）
+# ・有効化すると ConnectionPool が開く接続を計測用の派生クラスにする
+#   （既存の接続は次の取り出し時に開き直される）
+# ・1 文ごとに 実行 + 読み出し の経過時間・行数・呼び出し元 を記録
+# ・閾値を超えた文は EXPLAIN QUERY PLAN 付きでスロークエリログへ
+#   （RotatingFileHandler：上限に達したら世代交代）
+# ・summary() で文ごとの 回数 / 合計 / p50 / p95 / p99 / 最大
+#
+# 有効化:
+#   環境変数 DOCDB_TRACE=1（DOCDB_TRACE_SLOW_MS / DOCDB_TRACE_DIR も可）
+#   または enable_tracing() / 各画面で F12
+# ------------------------------------------------------------------
+DEFAULT_SLOW_MS = 200.0
+DEFAULT_LOG_DIR = os.path.join(tempfile.gettempdir(), "document_master_trace")
+SAMPLES_PER_STATEMENT = 5000     # 百分位の計算に残す直近の件数（文ごと）
+
+# 呼び出し元として扱わないモジュール（プール・問い合わせ組み立ての内側）
+_INTERNAL_FILES = ("query_trace.py", "db_pool.py", "document_query.py", "contextlib.py")
+
+# 実行計画を取れる文
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|WITH|INSERT|UPDATE|DELETE|REPLACE)\b", re.IGNORECASE)
+
+_tracer: Optional["QueryTracer"] = None
+_tracer_lock = threading.Lock()
+
+
+def _normalize(sql: str) -> str:
+    return " ".join(sql.split())
+
+
+def _call_site() -> str:
+    frame = sys._getframe(2)
+    while frame is not None:
+        filename = frame.f_code.co_filename
+        if not filename.endswith(_INTERNAL_FILES):
+            return f"{os.path.basename(filename)}:{frame.f_lineno} {frame.f_code.co_name}"
+        frame = frame.f_back
+    return "?"
+
+
+# ------------------------------------------------------------------
+# 計測本体
+# ------------------------------------------------------------------
+class StatementStats:
+    """
+    1 文（正規化した SQL 文字列）ごとの集計
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.rows = 0
+        self.samples = deque(maxlen=SAMPLES_PER_STATEMENT)
+        self.sites: Counter = Counter()
+
+    def percentile(self, p: float) -> float:
+        if not self.samples:
+            return 0.0
+        ordered = sorted(self.samples)
+        index = max(0, math.ceil(p / 100.0 * len(ordered)) - 1)    # 最近接順位法
+        return ordered[index]
+
+
+class QueryTracer:
+    """
+    問い合わせの記録先（プロセスで 1 つ）
+
+    Args:
+        slow_ms: これ以上かかった文をスロークエリログへ書く
+        log_dir: slow_query.log / 集計ダンプの出力先
+        max_bytes, backup_count: ログの世代交代
+    """
+
+    def __init__(
+        self,
+        slow_ms: float = DEFAULT_SLOW_MS,
+        log_dir: str = DEFAULT_LOG_DIR,
+        max_bytes: int = 5 * 1024 * 1024,
+        backup_count: int = 5
+    ):
+        self.slow_ms = slow_ms
+        self.log_dir = log_dir
+        self.started_at = time.time()
+
+        self._lock = threading.Lock()
+        self._stats: Dict[str, StatementStats] = {}
+        self._plans: Dict[str, str] = {}
+
+        os.makedirs(log_dir, exist_ok=True)
+        self.log_path = os.path.join(log_dir, "slow_query.log")
+        self._handler = logging.handlers.RotatingFileHandler(
+            self.log_path, maxBytes=max_bytes, backupCount=backup_count, encoding="utf-8"
+        )
+        self._handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+        self.logger = logging.getLogger(f"{__name__}.slow")
+        self.logger.setLevel(logging.INFO)
+        self.logger.propagate = False
+        self.logger.addHandler(self._handler)
+
+    def close(self):
+        self.logger.removeHandler(self._handler)
+        self._handler.close()
+
+    # ------------------------------------------------------------------
+    # 記録
+    # ------------------------------------------------------------------
+    def record(
+        self,
+        conn: sqlite3.Connection,
+        sql: str,
+        params: Any,
+        elapsed: float,
+        rows: int,
+        site: str,
+        error: Optional[BaseException] = None
+    ):
+        key = _normalize(sql)
+        with self._lock:
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = StatementStats()
+            stats.calls += 1
+            stats.total += elapsed
+            stats.max = max(stats.max, elapsed)
+            stats.rows += rows
+            stats.samples.append(elapsed)
+            stats.sites[site] += 1
+            if error is not None:
+                stats.errors += 1
+
+        if elapsed * 1000.0 >= self.slow_ms:
+            self._log_slow(conn, key, sql, params, elapsed, rows, site, error)
+
+    def _log_slow(self, conn, key, sql, params, elapsed, rows, site, error):
+        plan = self._plan(conn, key, sql, params)
+        lines = [
+            f"{elapsed * 1000.0:.1f} ms / {rows} 行 / {site}",
+            f"  SQL: {key}",
+            f"  params: {_short_repr(params)}",
+        ]
+        if error is not None:
+            lines.append(f"  error: {error!r}")
+        if plan:
+            lines.append("  plan:")
+            lines.extend("    " + line for line in plan.splitlines())
+        self.logger.info("\n".join(lines))
+
+    def _plan(self, conn, key, sql, params) -> str:
+        """
+        EXPLAIN QUERY PLAN（文ごとに初回のみ取得）
+
+        計測対象外の素の Cursor で実行する（記録が再帰しないように）
+        """
+        with self._lock:
+            if key in self._plans:
+                return self._plans[key]
+
+        plan = ""
+        if _EXPLAINABLE.match(sql) and params is not None:
+            cur = sqlite3.Cursor(conn)
+            try:
+                rows = cur.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+                depth = {0: 0}
+                out = []
+                for node, parent, _, detail in rows:
+                    depth[node] = depth.get(parent, 0) + 1
+                    out.append("  " * (depth[node] - 1) + detail)
+                plan = "\n".join(out)
+            except sqlite3.Error as e:
+                plan = f"（実行計画を取得できません: {e}）"
+            finally:
+                cur.close()
+
+        with self._lock:
+            self._plans[key] = plan
+        return plan
+
+    # ------------------------------------------------------------------
+    # 集計
+    # ------------------------------------------------------------------
+    def summary(self, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        文ごとの集計（合計時間の長い順）。時間は ms
+        """
+        with self._lock:
+            items = list(self._stats.items())
+            result = []
+            for sql, stats in items:
+                site, _ = stats.sites.most_common(1)[0]
+                result.append({
+                    "sql": sql,
+                    "calls": stats.calls,
+                    "errors": stats.errors,
+                    "rows": stats.rows,
+                    "total_ms": stats.total * 1000.0,
+                    "p50_ms": stats.percentile(50) * 1000.0,
+                    "p95_ms": stats.percentile(95) * 1000.0,
+                    "p99_ms": stats.percentile(99) * 1000.0,
+                    "max_ms": stats.max * 1000.0,
+                    "site": site,
+                })
+        result.sort(key=lambda r: r["total_ms"], reverse=True)
+        return result[:limit] if limit is not None else result
+
+    def format_summary(self, limit: Optional[int] = None, width: int = 100) -> str:
+        lines = [
+            f"計測開始 {time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(self.started_at))}"
+            f" / スロークエリ閾値 {self.slow_ms:g} ms / ログ {self.log_path}",
+            f"{'回数':>7} {'合計ms':>10} {'p50':>8} {'p95':>8} {'p99':>8} {'最大':>8} {'行数':>9}  SQL / 呼び出し元",
+        ]
+        for r in self.summary(limit):
+            sql = r["sql"] if len(r["sql"]) <= width else r["sql"][:width - 3] + "..."
+            lines.append(
+                f"{r['calls']:>7} {r['total_ms']:>10.1f} {r['p50_ms']:>8.2f} {r['p95_ms']:>8.2f}"
+                f" {r['p99_ms']:>8.2f} {r['max_ms']:>8.2f} {r['rows']:>9}  {sql}"
+            )
+            lines.append(f"{'':>64}  └ {r['site']}")
+        return "\n".join(lines)
+
+    def dump_summary(self) -> str:
+        """
+        集計をテキストファイルへ書き出してパスを返す
+        """
+        path = os.path.join(
+            self.log_dir, time.strftime("summary_%Y%m%d_%H%M%S.txt", time.localtime())
+        )
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(self.format_summary())
+            f.write("\n")
+        return path
+
+    def reset(self):
+        with self._lock:
+            self._stats.clear()
+            self._plans.clear()
+        self.started_at = time.time()
+
+
+def _short_repr(value: Any, limit: int = 300) -> str:
+    text = repr(value)
+    return text if len(text) <= limit else text[:limit - 3] + "..."
+
+
+# ------------------------------------------------------------------
+# 計測用の接続 / カーソル
+# ------------------------------------------------------------------
+class TracingCursor(sqlite3.Cursor):
+    """
+    execute から読み出し終了（行の尽き / 次の execute / close）までを 1 件として記録
+
+    ・経過時間は execute と fetch* の合計（Python 側の処理時間は含めない）
+    ・行数は SELECT なら読み出した行数、更新系なら rowcount
+    """
+
+    _sql: Optional[str] = None
+
+    def _begin(self, sql: str, params: Any):
+        self._finish()
+        self._sql = sql
+        self._params = params
+        self._elapsed = 0.0
+        self._rows = 0
+        self._site = _call_site()
+
+    def _finish(self, error: Optional[BaseException] = None):
+        sql, self._sql = self._sql, None
+        if sql is None:
+            return
+        tracer = _tracer
+        if tracer is None:
+            return
+        rows = self._rows
+        if not rows and self.rowcount > 0:
+            rows = self.rowcount
+        tracer.record(
+            self.connection, sql, self._params, self._elapsed, rows, self._site, error
+        )
+
+    def _timed(self, method, *args):
+        started = time.perf_counter()
+        try:
+            return method(*args)
+        except Exception as e:
+            self._elapsed += time.perf_counter() - started
+            self._finish(e)
+            raise
+        finally:
+            if self._sql is not None:
+                self._elapsed += time.perf_counter() - started
+
+    def execute(self, sql, parameters=()):
+        self._begin(sql, parameters)
+        self._timed(super().execute, sql, parameters)
+        if self.description is None:
+            self._finish()          # 行を返さない文はここで確定
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._begin(sql, None)
+        self._timed(super().executemany, sql, seq_of_parameters)
+        self._finish()
+        return self
+
+    def fetchone(self):
+        row = self._timed(super().fetchone)
+        if row is None:
+            self._finish()
+        elif self._sql is not None:
+            self._rows += 1
+        return row
+
+    def fetchmany(self, size=None):
+        rows = self._timed(super().fetchmany, self.arraysize if size is None else size)
+        if self._sql is not None:
+            self._rows += len(rows)
+            if not rows:
+                self._finish()
+        return rows
+
+    def fetchall(self):
+        rows = self._timed(super().fetchall)
+        if self._sql is not None:
+            self._rows += len(rows)
+            self._finish()
+        return rows
+
+    def __next__(self):
+        try:
+            row = self._timed(super().__next__)
+        except StopIteration:
+            self._finish()
+            raise
+        if self._sql is not None:
+            self._rows += 1
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # 読み切らずに捨てられたカーソル（fetchone で 1 行だけ等）
+        if self._sql is not None:
+            try:
+                self._finish()
+            except Exception:
+                pass
+
+
+class TracingConnection(sqlite3.Connection):
+    """
+    cursor() / execute() が TracingCursor を返す接続
+    """
+
+    def cursor(self, factory=TracingCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+
+# ------------------------------------------------------------------
+# 有効化 / 無効化
+# ------------------------------------------------------------------
+def enable_tracing(
+    slow_ms: Optional[float] = None,
+    log_dir: Optional[str] = None
+) -> QueryTracer:
+    """
+    計測を開始（既に有効ならそのまま返す）
+
+    slow_ms / log_dir の省略時は環境変数 DOCDB_TRACE_SLOW_MS / DOCDB_TRACE_DIR、
+    それも無ければ既定値
+    """
+    global _tracer
+    with _tracer_lock:
+        if _tracer is None:
+            if slow_ms is None:
+                slow_ms = float(os.environ.get("DOCDB_TRACE_SLOW_MS", DEFAULT_SLOW_MS))
+            if log_dir is None:
+                log_dir = os.environ.get("DOCDB_TRACE_DIR", DEFAULT_LOG_DIR)
+            _tracer = QueryTracer(slow_ms=slow_ms, log_dir=log_dir)
+            db_pool.set_connection_factory(TracingConnection)
+        return _tracer
+
+
+def disable_tracing():
+    """
+    計測を停止（以後に開く接続は標準の sqlite3.Connection）
+    """
+    global _tracer
+    with _tracer_lock:
+        tracer, _tracer = _tracer, None
+        db_pool.set_connection_factory(None)
+    if tracer is not None:
+        tracer.close()
+
+
+def get_tracer() -> Optional[QueryTracer]:
+    return _tracer
+
+
+def enable_from_env() -> Optional[QueryTracer]:
+    """
+    環境変数 DOCDB_TRACE が 1 / true / on のときだけ計測を開始
+    """
+    if os.environ.get("DOCDB_TRACE", "").strip().lower() in ("1", "true", "on", "yes"):
+        return enable_tracing()
+    return _tracer
+
+
+# ------------------------------------------------------------------
+# 画面からの操作（F12）
+# ------------------------------------------------------------------
+def install_hotkey(root, sequence: str = "<F12>"):
+    """
+    root（Tk）に計測用のホットキーを割り当てる
+
+    ・計測が無効なら開始
+    ・有効なら集計をファイルへ書き出し、上位を表示
+    """
+    from tkinter import messagebox
+
+    enable_from_env()
+
+    def on_key(event=None):
+        tracer = get_tracer()
+        if tracer is None:
+            tracer = enable_tracing()
+            messagebox.showinfo(
+                "問い合わせ計測",
+                f"計測を開始しました。\n操作を再現した後、もう一度 F12 で集計を出力します。\n\n"
+                f"スロークエリログ: {tracer.log_path}",
+                parent=root
+            )
+            return "break"
+
+        try:
+            path = tracer.dump_summary()
+        except OSError as e:
+            messagebox.showerror("問い合わせ計測", f"集計を書き出せません: {e}", parent=root)
+            return "break"
+        messagebox.showinfo(
+            "問い合わせ計測",
+            f"{tracer.format_summary(limit=5, width=60)}\n\n集計: {path}",
+            parent=root
+        )
+        return "break"
+
+    root.bind_all(sequence, on_key)
@@ -0,0 +1,59 @@
+from tkinter import ttk
+from typing import Callable, Dict, Optional, Tuple
+
+from document_query import column_sort
+
+
+class SortableHeadings:
+    """
+    Treeview の列見出しクリックで並び順を切り替える
+
+    ・並べ替えは画面側で行わず、on_change(sort) で再取得させる
+      （sort は EditionFilter にそのまま渡せる。None = 既定順）
+    ・同じ列を続けてクリックすると昇順 / 降順を反転
+    ・並び替え中の列の見出しに ▲ / ▼ を付ける
+
+    Args:
+        tree: 対象の Treeview（見出しの文字は設定済みであること）
+        columns: {Treeview の列名: 並び替えの列（document_query.COLUMN_SORTS のキー）}
+        on_change: 並び順が変わったときに呼ぶ（メインスレッド）
+    """
+
+    ARROWS = {False: " ▲", True: " ▼"}
+
+    def __init__(
+        self,
+        tree: ttk.Treeview,
+        columns: Dict[str, str],
+        on_change: Callable[[Optional[Tuple[str, ...]]], None]
+    ):
+        self.tree = tree
+        self.columns = columns
+        self.on_change = on_change
+
+        self.column: Optional[str] = None
+        self.descending = False
+
+        self._labels = {}
+        for col in columns:
+            self._labels[col] = tree.heading(col, "text")
+            tree.heading(col, command=lambda c=col: self.toggle(c))
+
+    @property
+    def sort(self) -> Optional[Tuple[str, ...]]:
+        if self.column is None:
+            return None
+        return column_sort(self.columns[self.column], self.descending)
+
+    def toggle(self, col: str):
+        if col == self.column:
+            self.descending = not self.descending
+        else:
+            self.column = col
+            self.descending = False
+
+        for name, label in self._labels.items():
+            arrow = self.ARROWS[self.descending] if name == self.column else ""
+            self.tree.heading(name, text=label + arrow)
+
+        self.on_change(self.sort)
@@ -0,0 +1,219 @@
+import argparse
+import os
+import random
+import sqlite3
+import time
+from typing import Dict, Iterator
+
+from db_migrations import migrate, analyze
+
+
+# ------------------------------------------------------------------
+# 試験用 document_master.db の生成（ベンチマーク / 負荷確認用）
+# ・文書あたりの版数は偏りあり（パレート分布：大半は数版、一部は数十版）
+# ・状態の分布
+#     通常     : 最終版 = 最新版、それ以前 = 旧版
+#     修正中あり : 上記に加えて最終版の次に修正中版
+#     廃止     : 全版が旧版
+# ・本番と同じスキーマ（db_migrations.migrate）で作成
+# ------------------------------------------------------------------
+PREFIXES = ("QM", "QP", "SOP", "WI", "FM", "MS")
+
+SUBJECTS = (
+    "受入検査", "出荷検査", "校正", "教育訓練", "文書管理", "是正処置",
+    "内部監査", "購買管理", "設計審査", "製造工程", "変更管理", "苦情処理",
+    "記録管理", "設備保全", "品質目標", "リスク管理",
+)
+
+SUFFIXES = ("手順書", "規程", "要領", "基準書", "マニュアル", "作業標準")
+
+DEPARTMENTS = ("品質保証部", "製造部", "技術部", "購買部", "総務部", "営業部")
+CATEGORIES = ("品質マニュアル", "規程", "手順書", "作業標準", "様式")
+STATUSES = ((0, "最新版"), (1, "修正中"), (9, "旧版/廃止"))
+
+
+def _edition_counts(
+    rng: random.Random,
+    editions: int,
+    alpha: float,
+    max_editions: int
+) -> Iterator[int]:
+    """
+    合計が editions になるまで文書ごとの版数を返す
+    """
+    remaining = editions
+    while remaining > 0:
+        count = min(max_editions, int(rng.paretovariate(alpha)), remaining)
+        remaining -= count
+        yield count
+
+
+def generate(
+    path: str,
+    editions: int,
+    seed: int = 1,
+    alpha: float = 1.3,
+    max_editions: int = 60,
+    draft_ratio: float = 0.10,
+    retired_ratio: float = 0.05,
+    overwrite: bool = False
+) -> Dict[str, int]:
+    """
+    editions 件の Edition を持つ DB を path に作成
+
+    Returns:
+        {"documents", "editions", "latest", "draft", "archived"}
+    """
+    if os.path.exists(path):
+        if not overwrite:
+            raise FileExistsError(f"既に存在します: {path}")
+        os.remove(path)
+
+    rng = random.Random(seed)
+    counts = {"documents": 0, "editions": 0, "latest": 0, "draft": 0, "archived": 0}
+
+    conn = sqlite3.connect(path)
+    try:
+        migrate(conn)
+
+        # 新規ファイルへの一括投入のみ：ジャーナル・同期を省いて高速化
+        conn.execute("PRAGMA journal_mode = OFF")
+        conn.execute("PRAGMA synchronous = OFF")
+        conn.execute("PRAGMA cache_size = -200000")
+
+        # 索引 / 検索用トリガは投入後に作り直す（1 行ずつの索引更新を避ける）
+        deferred = conn.execute(
+            """
+            SELECT type, name, sql FROM sqlite_master
+            WHERE sql IS NOT NULL
+              AND ((type = 'index' AND tbl_name IN ('document_master', 'Document_Edition_Master'))
+                   OR (type = 'trigger' AND tbl_name = 'document_master'))
+            """
+        ).fetchall()
+        for kind, name, _ in deferred:
+            conn.execute(f"DROP {kind.upper()} {name}")
+
+        conn.executemany(
+            "INSERT INTO department_master (ID, NAME) VALUES (?, ?)",
+            enumerate(DEPARTMENTS, start=1)
+        )
+        conn.executemany(
+            "INSERT INTO categorie_master (ID, NAME) VALUES (?, ?)",
+            enumerate(CATEGORIES, start=1)
+        )
+        conn.executemany("INSERT INTO statuse_master (ID, NAME) VALUES (?, ?)", STATUSES)
+
+        documents = []
+        edition_rows = []
+        serial: Dict[str, int] = {}
+
+        def flush():
+            conn.executemany(
+                "INSERT INTO document_master (document_id, document_number, document_name)"
+                " VALUES (?, ?, ?)",
+                documents
+            )
+            conn.executemany(
+                """
+                INSERT INTO Document_Edition_Master
+                (document_id, edition_no, edition_code, effective_date, edition_status, pdf_path)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                edition_rows
+            )
+            documents.clear()
+            edition_rows.clear()
+
+        for document_id, count in enumerate(
+            _edition_counts(rng, editions, alpha, max_editions), start=1
+        ):
+            prefix = rng.choice(PREFIXES)
+            serial[prefix] = serial.get(prefix, 0) + 1
+            number = f"{prefix}-{serial[prefix]:05d}"
+            name = rng.choice(SUBJECTS) + rng.choice(SUFFIXES)
+            documents.append((document_id, number, name))
+
+            roll = rng.random()
+            retired = roll < retired_ratio
+            has_draft = count > 1 and not retired and roll < retired_ratio + draft_ratio
+
+            year = rng.randint(2000, 2015)
+            for edition_no in range(1, count + 1):
+                if retired:
+                    status = 9
+                elif edition_no == count and has_draft:
+                    status = 1
+                elif edition_no == count - (1 if has_draft else 0):
+                    status = 0
+                else:
+                    status = 9
+
+                year = min(2025, year + rng.randint(0, 2))
+                effective_date = f"{year}-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+                pdf_path = f"\\\\fileserver\\文書\\{prefix}\\{number}_{edition_no}.pdf"
+                edition_rows.append(
+                    (document_id, edition_no, f"{edition_no:02d}", effective_date, status, pdf_path)
+                )
+                counts[{0: "latest", 1: "draft", 9: "archived"}[status]] += 1
+
+            counts["documents"] += 1
+            counts["editions"] += count
+            if len(edition_rows) >= 50000:
+                flush()
+
+        flush()
+        for _, _, sql in deferred:
+            conn.execute(sql)
+        conn.execute("INSERT INTO document_search (document_search) VALUES ('rebuild')")
+        conn.commit()
+        analyze(conn)
+    finally:
+        conn.close()
+
+    return counts
+
+
+def ensure_database(directory: str, editions: int, seed: int = 1) -> str:
+    """
+    同じ件数・seed の DB が directory にあれば再利用し、無ければ生成してパスを返す
+    """
+    os.makedirs(directory, exist_ok=True)
+    path = os.path.join(directory, f"synthetic_{editions}_{seed}.db")
+    if not os.path.exists(path):
+        generate(path + ".tmp", editions, seed=seed, overwrite=True)
+        os.replace(path + ".tmp", path)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description="試験用 document_master.db の生成")
+    parser.add_argument("path")
+    parser.add_argument("--editions", type=int, default=100000, help="Edition の件数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--alpha", type=float, default=1.3, help="版数の偏り（小さいほど長い裾）")
+    parser.add_argument("--max-editions", type=int, default=60, help="文書あたりの最大版数")
+    parser.add_argument("--draft-ratio", type=float, default=0.10, help="修正中版を持つ文書の割合")
+    parser.add_argument("--retired-ratio", type=float, default=0.05, help="廃止文書の割合")
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    counts = generate(
+        args.path,
+        args.editions,
+        seed=args.seed,
+        alpha=args.alpha,
+        max_editions=args.max_editions,
+        draft_ratio=args.draft_ratio,
+        retired_ratio=args.retired_ratio,
+        overwrite=args.overwrite,
+    )
+    print(
+        f"文書 {counts['documents']} 件 / 版 {counts['editions']} 件"
+        f"（最新 {counts['latest']} / 修正中 {counts['draft']} / 旧版 {counts['archived']}）"
+        f" / {time.perf_counter() - started:.1f} 秒"
+    )
+
+
+if __name__ == "__main__":
+    main()
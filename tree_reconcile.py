@@ -0,0 +1,68 @@
+from tkinter import ttk
+from typing import Dict, Iterable, Sequence, Tuple
+
+
+class TreeReconciler:
+    """
+    Treeview の差分更新（iid = edition_id などの行キー）
+
+    ・新しい結果セットと現在の表示を比較し、
+      必要な insert / item（値・タグ更新）/ move / delete だけを発行
+    ・行は消し直さないため、スクロール位置と選択が保たれる
+    ・比較は Tk へ問い合わせず、前回反映した内容の控え（_shown）で行う
+    """
+
+    def __init__(self, tree: ttk.Treeview):
+        self.tree = tree
+        self._shown: Dict[str, Tuple[tuple, tuple]] = {}
+
+    def apply(self, rows: Iterable[Tuple[str, Sequence, Sequence]]) -> Dict[str, int]:
+        """
+        Args:
+            rows: (iid, values, tags) を表示順に並べたもの
+
+        Returns:
+            発行した操作の件数 {"inserted", "updated", "moved", "deleted"}
+        """
+        tree = self.tree
+        counts = {"inserted": 0, "updated": 0, "moved": 0, "deleted": 0}
+
+        new_rows = [(str(iid), tuple(values), tuple(tags)) for iid, values, tags in rows]
+        new_keys = {iid for iid, _, _ in new_rows}
+
+        # ---------- 削除 ----------
+        removed = [iid for iid in self._shown if iid not in new_keys]
+        if removed:
+            tree.delete(*removed)
+            for iid in removed:
+                del self._shown[iid]
+            counts["deleted"] = len(removed)
+
+        # ---------- 追加 / 更新 ----------
+        for index, (iid, values, tags) in enumerate(new_rows):
+            shown = self._shown.get(iid)
+            if shown is None:
+                tree.insert("", index, iid=iid, values=values, tags=tags)
+                counts["inserted"] += 1
+            elif shown != (values, tags):
+                tree.item(iid, values=values, tags=tags)
+                counts["updated"] += 1
+            self._shown[iid] = (values, tags)
+
+        # ---------- 並び替え（位置がずれた行だけ move） ----------
+        order = [iid for iid, _, _ in new_rows]
+        current = list(tree.get_children(""))
+        if current != order:
+            for index, iid in enumerate(order):
+                if current[index] != iid:
+                    tree.move(iid, "", index)
+                    current.remove(iid)
+                    current.insert(index, iid)
+                    counts["moved"] += 1
+
+        return counts
+
+    def clear(self):
+        if self._shown:
+            self.tree.delete(*self._shown)
+        self._shown.clear()
@@ -0,0 +1,424 @@
+import queue
+import tkinter as tk
+from tkinter import ttk, messagebox
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, List, Optional, Sequence, Set, Tuple
+
+
+class VirtualTreeview(tk.Frame):
+    """
+    仮想リスト表示用 Treeview
+
+    ・Tk 側には「見えている行数」分のスロット行だけを作成し、
+      スクロール時はスロットの values / tags を書き換える
+    ・データはブロック単位（block_size 行）で取得し、
+      直近 max_blocks ブロックを LRU で保持（前後 1 ブロックを先読み）
+    ・ブロックの取得は専用のワーカースレッドで 1 つずつ行い、届くまでは
+      「読み込み中…」の行を表示する（スクロール / PgDn / End で画面が止まらない）
+      要求するのは表示中と先読みの分だけ（通り過ぎたブロックは取りに行かない）
+    ・選択はスロットではなく「全体の行番号」で保持する
+
+    set_source() に渡すもの
+        count       : 全行数
+        fetch_block : (offset, limit) -> 行の list（ワーカースレッドから呼ぶ）
+        render      : 行 -> (values, tags)
+    """
+
+    PLACEHOLDER = "読み込み中…"
+    LOADING_TAG = "loading"
+
+    def __init__(
+        self,
+        master,
+        columns: Sequence[str],
+        height: int = 20,
+        block_size: int = 200,
+        max_blocks: int = 8,
+        poll_ms: int = 30,
+        **tree_options
+    ):
+        super().__init__(master)
+
+        self.block_size = block_size
+        self.max_blocks = max_blocks
+        self.poll_ms = poll_ms
+
+        self.tree = ttk.Treeview(
+            self,
+            columns=columns,
+            show="headings",
+            height=height,
+            selectmode="browse",
+            **tree_options
+        )
+        self.scrollbar = ttk.Scrollbar(
+            self, orient=tk.VERTICAL, command=self._on_scrollbar
+        )
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
+        self.tree.tag_configure(self.LOADING_TAG, foreground="#999999")
+        self._placeholder = (self.PLACEHOLDER,) + ("",) * (len(columns) - 1)
+
+        self._count = 0
+        self._fetch_block: Optional[Callable[[int, int], List[Tuple]]] = None
+        self._render: Optional[Callable[[Tuple], Tuple[tuple, tuple]]] = None
+        self._blocks: "OrderedDict[int, List[Tuple]]" = OrderedDict()
+
+        # ブロック取得（ワーカー 1 本。結果はキュー経由で after() ポーリングにより受け取る）
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="list-block")
+        self._results: "queue.Queue" = queue.Queue()
+        self._generation = 0                # set_source ごとに増やす（古いソースの結果は捨てる）
+        self._wanted: List[int] = []        # 取得待ちのブロック番号（先頭から順に）
+        self._loading: Optional[int] = None # 取得中のブロック番号
+        self._failed: Set[int] = set()      # 取得に失敗したブロック（ソースを替えるまで再要求しない）
+        self._reselect: Optional[Tuple[Callable[[Tuple], Any], Any]] = None
+        self._selection_waiting = False     # 選択行が未取得のまま通知した（届いたら通知し直す）
+
+        self._first = 0                 # 先頭に表示している行番号
+        self._visible = height          # スロット数
+        self._slots: List[str] = []
+        self.selected_index: Optional[int] = None
+
+        # 選択行が変わったときに呼ぶ（引数は全体の行番号。スロットの再利用に関係なく通知）
+        # 選択行のブロックが未取得なら、届いたときにもう一度呼ぶ
+        self.on_selection_change: Optional[Callable[[int], None]] = None
+
+        # ブロックの取得に失敗したときに呼ぶ（None ならメッセージボックス）
+        self.on_error: Optional[Callable[[Exception], None]] = None
+
+        self._build_slots(self._visible)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Configure>", self._on_resize)
+        self.tree.bind("<MouseWheel>", self._on_mousewheel)
+        self.tree.bind("<Button-4>", lambda e: self._scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self._scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self._move_selection(-self._visible))
+        self.tree.bind("<Next>", lambda e: self._move_selection(self._visible))
+        self.tree.bind("<Home>", lambda e: self._move_selection(-self._count))
+        self.tree.bind("<End>", lambda e: self._move_selection(self._count))
+
+    # ------------------------------------------------------------------
+    # データソース
+    # ------------------------------------------------------------------
+    def set_source(
+        self,
+        count: int,
+        fetch_block: Callable[[int, int], List[Tuple]],
+        render: Callable[[Tuple], Tuple[tuple, tuple]],
+        first_block: Optional[List[Tuple]] = None,
+        keep_position: bool = False,
+        key: Optional[Callable[[Tuple], Any]] = None
+    ):
+        """
+        新しいデータソースを設定し、表示し直す
+
+        first_block にワーカー側で取得済みの先頭ブロックを渡すと
+        先頭の表示で「読み込み中…」を挟まない
+
+        keep_position=True のときはスクロール位置を保ち、
+        key(行) が一致する行を選択し直す（再読込用。表示範囲の行が届きしだい）
+        """
+        selected_key = None
+        if keep_position and key is not None:
+            selected = self.selected_row()
+            if selected is not None:
+                selected_key = key(selected)
+
+        self._count = count
+        self._fetch_block = fetch_block
+        self._render = render
+        self._blocks.clear()
+        self._generation += 1
+        self._wanted = []
+        self._failed.clear()
+        if first_block is not None:
+            self._blocks[0] = first_block
+        if not keep_position:
+            self._first = 0
+        self._first = max(0, min(self._first, self._count - self._visible))
+
+        self.selected_index = None
+        self._selection_waiting = False
+        self._reselect = (key, selected_key) if selected_key is not None else None
+        if self._reselect is not None:
+            self._reselect_row()
+
+        self._refresh()
+
+    def row(self, index: int) -> Optional[Tuple]:
+        """
+        全体の行番号 index の元データ行を返す
+
+        ブロックが未取得なら None を返して取得を要求する（届いたら表示し直す）
+        """
+        loaded, row = self._lookup(index)
+        if not loaded:
+            self._request(index // self.block_size)
+        return row
+
+    def _lookup(self, index: int) -> Tuple[bool, Optional[Tuple]]:
+        """
+        全体の行番号 → (取得済みか, 行)。取得の要求はしない
+        """
+        if self._fetch_block is None or not 0 <= index < self._count:
+            return True, None
+
+        block_no, pos = divmod(index, self.block_size)
+        block = self._blocks.get(block_no)
+        if block is None:
+            return False, None
+        self._blocks.move_to_end(block_no)
+        return True, (block[pos] if pos < len(block) else None)
+
+    def _reselect_row(self):
+        """
+        再読込前に選択していた行（key が一致）を表示範囲から探して選択し直す
+
+        表示範囲に未取得の行が残っていれば、届いたときにもう一度探す
+        """
+        key, selected_key = self._reselect
+        waiting = False
+        for index in range(self._first, min(self._count, self._first + self._visible)):
+            loaded, row = self._lookup(index)
+            if not loaded:
+                waiting = True
+            elif row is not None and key(row) == selected_key:
+                self.selected_index = index
+                self._reselect = None
+                return
+        if not waiting:
+            self._reselect = None
+
+    def selected_row(self) -> Optional[Tuple]:
+        if self.selected_index is None:
+            return None
+        return self.row(self.selected_index)
+
+    # ------------------------------------------------------------------
+    # ブロック取得（ワーカースレッド）
+    # ------------------------------------------------------------------
+    def _request(self, block_no: int):
+        if (
+            block_no in self._blocks
+            or block_no in self._failed
+            or block_no == self._loading
+            or block_no in self._wanted
+        ):
+            return
+        self._wanted.append(block_no)
+        self._start_next()
+
+    def _start_next(self):
+        if self._loading is not None:
+            return
+        while self._wanted:
+            block_no = self._wanted.pop(0)
+            if block_no in self._blocks or block_no in self._failed:
+                continue
+
+            generation = self._generation
+            future = self._executor.submit(
+                self._fetch_block, block_no * self.block_size, self.block_size
+            )
+            self._loading = block_no
+            future.add_done_callback(lambda f: self._results.put((generation, block_no, f)))
+            self.after(self.poll_ms, self._poll)
+            return
+
+    def _poll(self):
+        try:
+            generation, block_no, future = self._results.get_nowait()
+        except queue.Empty:
+            self.after(self.poll_ms, self._poll)
+            return
+
+        self._loading = None
+        if generation == self._generation:
+            try:
+                block = future.result()
+            except Exception as e:
+                self._failed.add(block_no)
+                self._report_error(e)
+            else:
+                self._store(block_no, block)
+                self._on_block_loaded(block_no)
+        self._start_next()
+
+    def _store(self, block_no: int, block: List[Tuple]):
+        self._blocks[block_no] = block
+        while len(self._blocks) > self.max_blocks:
+            self._blocks.popitem(last=False)
+
+    def _on_block_loaded(self, block_no: int):
+        start = block_no * self.block_size
+        end = start + self.block_size
+
+        if self._reselect is not None:
+            self._reselect_row()
+        if start < self._first + self._visible and self._first < end:
+            self._refresh()
+
+        if self._selection_waiting and self.selected_index is not None \
+                and start <= self.selected_index < end:
+            self._notify_selection()
+
+    def _report_error(self, error: Exception):
+        if self.on_error is not None:
+            self.on_error(error)
+        else:
+            messagebox.showerror("エラー", f"一覧の取得に失敗しました\n{error}")
+
+    def destroy(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        super().destroy()
+
+    # ------------------------------------------------------------------
+    # スロット（Tk 上の実アイテム）
+    # ------------------------------------------------------------------
+    def _build_slots(self, visible: int):
+        for iid in self._slots:
+            self.tree.delete(iid)
+        self._slots = [
+            self.tree.insert("", tk.END, iid=f"slot{i}", values=())
+            for i in range(visible)
+        ]
+        self._visible = visible
+
+    def _slot_index(self, iid: str) -> Optional[int]:
+        if iid not in self._slots:
+            return None
+        return self._first + self._slots.index(iid)
+
+    def _refresh(self):
+        """
+        現在のウィンドウ（_first 〜 _first + _visible）をスロットへ反映
+
+        未取得の行は「読み込み中…」で表示し、取得待ちは表示中と先読みの分に入れ替える
+        """
+        self._first = max(0, min(self._first, self._count - self._visible))
+        self._wanted = []
+
+        selected_slot = None
+        for i, iid in enumerate(self._slots):
+            index = self._first + i
+            loaded, row = self._lookup(index)
+            if not loaded:
+                self._request(index // self.block_size)
+                values, tags = self._placeholder, (self.LOADING_TAG,)
+            elif row is None:
+                self.tree.detach(iid)
+                continue
+            else:
+                values, tags = self._render(row)
+            self.tree.move(iid, "", i)
+            self.tree.item(iid, values=values, tags=tags)
+            if index == self.selected_index:
+                selected_slot = iid
+
+        if selected_slot is not None:
+            if self.tree.selection() != (selected_slot,):
+                self.tree.selection_set(selected_slot)
+        elif self.tree.selection():
+            self.tree.selection_remove(self.tree.selection())
+
+        self._prefetch()
+        self._update_scrollbar()
+
+    def _prefetch(self):
+        """
+        表示ウィンドウ前後のブロックを先読みしておく
+        """
+        if self._count == 0:
+            return
+        last = min(self._count - 1, self._first + self._visible)
+        self.row(last)
+        next_block_start = (last // self.block_size + 1) * self.block_size
+        if next_block_start < self._count and next_block_start - last <= self._visible:
+            self.row(next_block_start)
+
+    def _update_scrollbar(self):
+        if self._count <= self._visible:
+            self.scrollbar.set(0.0, 1.0)
+            return
+        first = self._first / self._count
+        last = (self._first + self._visible) / self._count
+        self.scrollbar.set(first, last)
+
+    # ------------------------------------------------------------------
+    # イベント
+    # ------------------------------------------------------------------
+    def _scroll_to(self, first: int):
+        first = max(0, min(first, self._count - self._visible))
+        if first != self._first:
+            self._first = first
+            self._refresh()
+
+    def _scroll_by(self, rows: int):
+        self._scroll_to(self._first + rows)
+        return "break"
+
+    def _on_scrollbar(self, *args):
+        if args[0] == "moveto":
+            self._scroll_to(int(float(args[1]) * self._count))
+        elif args[0] == "scroll":
+            amount = int(args[1])
+            if args[2] == "pages":
+                amount *= max(1, self._visible - 1)
+            self._scroll_by(amount)
+
+    def _on_mousewheel(self, event):
+        return self._scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_select(self, event):
+        selected = self.tree.selection()
+        if selected:
+            index = self._slot_index(selected[0])
+            if index is not None and index != self.selected_index:
+                self.selected_index = index
+                self._reselect = None
+                self._notify_selection()
+
+    def _notify_selection(self):
+        if self.on_selection_change is not None and self.selected_index is not None:
+            self._selection_waiting = not self._lookup(self.selected_index)[0]
+            self.on_selection_change(self.selected_index)
+
+    def _move_selection(self, delta: int):
+        if self._count == 0:
+            return "break"
+
+        if self.selected_index is None:
+            index = self._first
+        else:
+            index = max(0, min(self._count - 1, self.selected_index + delta))
+        changed = index != self.selected_index
+        self.selected_index = index
+        self._reselect = None
+
+        if index < self._first:
+            self._first = index
+        elif index >= self._first + self._visible:
+            self._first = index - self._visible + 1
+        self._refresh()
+
+        slot = self._slots[index - self._first]
+        self.tree.focus(slot)
+        if changed:
+            self._notify_selection()
+        return "break"
+
+    def _on_resize(self, event):
+        rowheight = int(ttk.Style().lookup("Treeview", "rowheight") or 20)
+        header = 0
+        if self._slots:
+            bbox = self.tree.bbox(self._slots[0])
+            if bbox:
+                header = bbox[1]
+        visible = max(1, (event.height - header) // rowheight)
+        if visible != self._visible:
+            self._build_slots(visible)
+            self._refresh()